@@ -4,7 +4,9 @@
 """
 
 import os
-import json
+import atexit
+
+from src.utils import json_compat
 
 
 class Settings:
@@ -22,18 +24,25 @@ class Settings:
         "grid_size": 10,
         "default_export_format": "json"
     }
+
+    # set()之后延迟写盘的时间（毫秒），连续修改只写一次
+    FLUSH_DELAY_MS = 500
     
     def __init__(self):
         self.config_file = "config.json"
         self.settings = self.DEFAULTS.copy()
+        self._dirty = False
+        self._flush_scheduled = False
         self.load()
+        # 退出时写回未保存的修改
+        atexit.register(self._flush_if_dirty)
     
     def load(self):
         """加载配置"""
         if os.path.exists(self.config_file):
             try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    loaded = json.load(f)
+                with open(self.config_file, 'rb') as f:
+                    loaded = json_compat.loads(f.read())
                     self.settings.update(loaded)
             except Exception as e:
                 print(f"加载配置失败: {e}")
@@ -41,8 +50,9 @@ class Settings:
     def save(self):
         """保存配置"""
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.settings, f, ensure_ascii=False, indent=2)
+            with open(self.config_file, 'wb') as f:
+                f.write(json_compat.dumps(self.settings))
+            self._dirty = False
         except Exception as e:
             print(f"保存配置失败: {e}")
     
@@ -51,11 +61,31 @@ class Settings:
         return self.settings.get(key, default)
     
     def set(self, key: str, value):
-        """设置配置项"""
+        """设置配置项（仅标记修改，延迟合并写盘）"""
         self.settings[key] = value
-        self.save()
+        self._dirty = True
+        self._schedule_flush()
     
     def reset(self):
         """重置为默认"""
         self.settings = self.DEFAULTS.copy()
         self.save()
+
+    def _schedule_flush(self):
+        """在Qt事件循环空闲时写盘；没有QApplication时由atexit兜底"""
+        if self._flush_scheduled:
+            return
+        try:
+            from PyQt5.QtCore import QCoreApplication, QTimer
+        except ImportError:
+            return
+        if QCoreApplication.instance() is None:
+            return
+        self._flush_scheduled = True
+        QTimer.singleShot(self.FLUSH_DELAY_MS, self._flush_if_dirty)
+
+    def _flush_if_dirty(self):
+        """有未保存的修改时才写盘"""
+        self._flush_scheduled = False
+        if self._dirty:
+            self.save()
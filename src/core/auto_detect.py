@@ -4,11 +4,77 @@
 支持圆形检测、红点检测、UI元素识别
 """
 
+import copy
+import threading
+from collections import OrderedDict
 import cv2
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple, Optional
-from PyQt5.QtGui import QPixmap, QImage
+from PyQt5.QtGui import QPixmap
 from ..models.roi import ROI
+from ..utils.image_convert import cv2_to_qpixmap, qpixmap_to_cv2
+
+# 可选：Numba加速逐像素颜色掩码（未安装时使用NumPy实现）
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+# 形态学操作复用的结构元素
+KERNEL_3 = np.ones((3, 3), np.uint8)
+KERNEL_5 = np.ones((5, 5), np.uint8)
+
+# 红色的HSV范围（红色在HSV中跨越0度，分两段）
+RED_LOWER_1 = np.array([0, 100, 100], np.uint8)
+RED_UPPER_1 = np.array([10, 255, 255], np.uint8)
+RED_LOWER_2 = np.array([160, 100, 100], np.uint8)
+RED_UPPER_2 = np.array([180, 255, 255], np.uint8)
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _color_mask_numba(img, sb, sg, sr, tol_sq, mask):
+        """单次遍历计算L2颜色距离掩码，按行并行"""
+        for y in prange(img.shape[0]):
+            for x in range(img.shape[1]):
+                d0 = np.int32(img[y, x, 0]) - sb
+                d1 = np.int32(img[y, x, 1]) - sg
+                d2 = np.int32(img[y, x, 2]) - sr
+                mask[y, x] = 255 if d0 * d0 + d1 * d1 + d2 * d2 <= tol_sq else 0
+else:
+    _color_mask_numba = None
+
+
+def color_distance_mask(img: np.ndarray, seed_color, color_tolerance: int) -> np.ndarray:
+    """
+    计算与种子颜色L2距离不超过容差的像素掩码
+
+    Returns:
+        uint8掩码，相似为255，其他为0
+    """
+    tol_sq = int(color_tolerance) * int(color_tolerance)
+
+    if _color_mask_numba is not None and img.flags['C_CONTIGUOUS']:
+        mask = np.empty(img.shape[:2], np.uint8)
+        _color_mask_numba(img, int(seed_color[0]), int(seed_color[1]), int(seed_color[2]), tol_sq, mask)
+        return mask
+
+    # 在整数域比较距离平方，避免float临时数组和sqrt
+    diff = cv2.absdiff(img, np.full_like(img, seed_color)).astype(np.int32)
+    dist_sq = np.einsum('ijk,ijk->ij', diff, diff)
+    return np.where(dist_sq <= tol_sq, 255, 0).astype(np.uint8)
+
+
+def warmup_color_mask():
+    """
+    在当前线程预先运行一次Numba并行颜色掩码
+
+    需要在主线程调用：TBB线程层如果第一次在子线程中启动，进程退出时会卡住
+    """
+    if _color_mask_numba is not None:
+        color_distance_mask(np.zeros((1, 1, 3), np.uint8), (0, 0, 0), 0)
 
 
 class AutoDetector:
@@ -21,6 +87,23 @@ class AutoDetector:
         self.param1 = 50
         self.param2 = 30
 
+        # 大图先缩小再检测，结果坐标按比例还原（1.0表示不缩放）
+        self.detect_scale = 0.5
+        # 长边不小于该值时才缩放，小图保持原分辨率检测
+        self.detect_scale_min_size = 1000
+
+        # 中间结果缓冲区，按(用途, 形状, 类型)复用，避免每次检测重新分配
+        self._arena = {}
+        self._arena_lock = threading.Lock()
+
+        # 检测结果缓存：同一截图、同一参数重复检测时直接返回（LRU，最多8条）
+        self.result_cache_size = 8
+        self._result_cache = OrderedDict()
+        self._result_cache_lock = threading.Lock()
+
+        # 点选识别用的BGR图：(截图cacheKey, 只读数组)，连续点击同一张图时不再重复转换
+        self._point_image = None
+
     def detect_circles(self, pixmap: QPixmap, min_radius: int = 5, max_radius: int = 100) -> List[ROI]:
         """
         使用霍夫圆变换检测圆形（适合图标、红点、按钮）
@@ -33,43 +116,41 @@ class AutoDetector:
         Returns:
             ROI列表（正方形边界框包含圆形）
         """
-        img = self._qpixmap_to_cv2(pixmap)
-        if img is None:
-            return []
+        return self._cached('circles', pixmap, (min_radius, max_radius,),
+                            lambda prepared: self._detect_circles_impl(prepared, min_radius, max_radius))
 
-        # 转为灰度图
-        if len(img.shape) == 3:
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = img
+    def _detect_circles_impl(self, prepared: dict, min_radius: int = 5, max_radius: int = 100) -> List[ROI]:
+        """霍夫圆检测（使用预处理结果）"""
+        gray = prepared['gray']
+        scale = prepared['scale']
+        img_w, img_h = prepared['size']
 
         # 高斯模糊降噪
-        gray_blur = cv2.medianBlur(gray, 5)
+        gray_blur = cv2.medianBlur(gray, 5, dst=self._buf('median_blur', gray.shape))
 
         rois = []
 
-        # 霍夫圆检测
+        # 霍夫圆检测（半径和间距换算到检测分辨率）
         circles = cv2.HoughCircles(
             gray_blur,
             cv2.HOUGH_GRADIENT,
             dp=1,
-            minDist=20,
+            minDist=max(1, int(20 * scale)),
             param1=50,
             param2=30,
-            minRadius=min_radius,
-            maxRadius=max_radius
+            minRadius=int(min_radius * scale),
+            maxRadius=max(1, int(max_radius * scale))
         )
 
         if circles is not None:
-            circles = np.uint16(np.around(circles))
             for i, circle in enumerate(circles[0, :]):
-                center_x, center_y, radius = circle
+                center_x, center_y, radius = (int(round(v / scale)) for v in circle)
 
                 # 创建包含圆的正方形ROI
                 x = max(0, center_x - radius - 2)  # 留一点边距
                 y = max(0, center_y - radius - 2)
-                w = min(pixmap.width() - x, radius * 2 + 4)
-                h = min(pixmap.height() - y, radius * 2 + 4)
+                w = min(img_w - x, radius * 2 + 4)
+                h = min(img_h - y, radius * 2 + 4)
 
                 roi = ROI(x=x, y=y, width=w, height=h)
                 roi.name = f"circle_{i+1:02d}"
@@ -87,27 +168,24 @@ class AutoDetector:
         Returns:
             ROI列表
         """
-        img = self._qpixmap_to_cv2(pixmap)
-        if img is None:
-            return []
-
-        # 转为HSV色彩空间
-        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+        return self._cached('red_dots', pixmap, (),
+                            lambda prepared: self._detect_red_dots_impl(prepared))
 
-        # 定义红色的HSV范围（红色在HSV中跨越0度）
-        lower_red1 = np.array([0, 100, 100])
-        upper_red1 = np.array([10, 255, 255])
-        lower_red2 = np.array([160, 100, 100])
-        upper_red2 = np.array([180, 255, 255])
+    def _detect_red_dots_impl(self, prepared: dict) -> List[ROI]:
+        """红点检测（使用预处理结果）"""
+        hsv = prepared['hsv']
+        scale = prepared['scale']
+        img_w, img_h = prepared['size']
+        area_scale = scale * scale
 
         # 创建红色掩码
-        mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
-        mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
-        red_mask = cv2.bitwise_or(mask1, mask2)
+        mask_shape = hsv.shape[:2]
+        mask1 = cv2.inRange(hsv, RED_LOWER_1, RED_UPPER_1, dst=self._buf('red_mask1', mask_shape))
+        mask2 = cv2.inRange(hsv, RED_LOWER_2, RED_UPPER_2, dst=self._buf('red_mask2', mask_shape))
+        red_mask = cv2.bitwise_or(mask1, mask2, dst=self._buf('red_mask', mask_shape))
 
         # 形态学操作连接相邻区域
-        kernel = np.ones((3, 3), np.uint8)
-        red_mask = cv2.morphologyEx(red_mask, cv2.MORPH_CLOSE, kernel, iterations=2)
+        red_mask = cv2.morphologyEx(red_mask, cv2.MORPH_CLOSE, KERNEL_3, dst=red_mask, iterations=2)
 
         # 查找轮廓
         contours, _ = cv2.findContours(red_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -117,13 +195,13 @@ class AutoDetector:
             area = cv2.contourArea(contour)
 
             # 过滤太小的（可能是噪点）和太大的
-            if area < 30 or area > 5000:
+            if area < 30 * area_scale or area > 5000 * area_scale:
                 continue
 
-            # 获取最小外接圆
+            # 获取最小外接圆（还原到原图坐标）
             (x, y), radius = cv2.minEnclosingCircle(contour)
-            center = (int(x), int(y))
-            radius = int(radius)
+            center = (int(x / scale), int(y / scale))
+            radius = int(radius / scale)
 
             # 检查圆度（确保是圆形而不是不规则形状）
             perimeter = cv2.arcLength(contour, True)
@@ -133,8 +211,8 @@ class AutoDetector:
                 if circularity > 0.6:
                     x = max(0, center[0] - radius - 2)
                     y = max(0, center[1] - radius - 2)
-                    w = min(pixmap.width() - x, radius * 2 + 4)
-                    h = min(pixmap.height() - y, radius * 2 + 4)
+                    w = min(img_w - x, radius * 2 + 4)
+                    h = min(img_h - y, radius * 2 + 4)
 
                     roi = ROI(x=x, y=y, width=w, height=h)
                     roi.name = f"red_dot_{i+1:02d}"
@@ -152,27 +230,31 @@ class AutoDetector:
         Returns:
             ROI列表
         """
-        img = self._qpixmap_to_cv2(pixmap)
-        if img is None:
-            return []
+        return self._cached('ui_buttons', pixmap, (),
+                            lambda prepared: self._detect_ui_buttons_impl(prepared))
 
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img
+    def _detect_ui_buttons_impl(self, prepared: dict) -> List[ROI]:
+        """UI按钮检测（使用预处理结果）"""
+        gray = prepared['gray']
+        scale = prepared['scale']
+        img_h, img_w = gray.shape[:2]
 
         rois = []
 
         # 方法1: 检测高对比度的闭合区域
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0, dst=self._buf('gaussian_blur', gray.shape))
 
         # 自适应阈值
         thresh = cv2.adaptiveThreshold(
             blurred, 255,
             cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY_INV, 11, 2
+            cv2.THRESH_BINARY_INV, 11, 2,
+            dst=self._buf('thresh', gray.shape)
         )
 
         # 形态学操作
-        kernel = np.ones((5, 5), np.uint8)
-        morph = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel, iterations=2)
+        morph = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, KERNEL_5,
+                                 dst=self._buf('morph', gray.shape), iterations=2)
 
         # 查找轮廓
         contours, _ = cv2.findContours(morph, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -181,7 +263,7 @@ class AutoDetector:
             area = cv2.contourArea(contour)
 
             # 过滤太小或太大的
-            if area < 200 or area > (pixmap.width() * pixmap.height() * 0.5):
+            if area < 200 * scale * scale or area > (img_w * img_h * 0.5):
                 continue
 
             # 获取边界框
@@ -197,7 +279,7 @@ class AutoDetector:
 
             # 4个点可能是矩形，更多点可能是圆角矩形或圆形
             if len(approx) >= 4:
-                roi = ROI(x=x, y=y, width=w, height=h)
+                roi = self._scaled_roi(x, y, w, h, scale)
                 roi.name = f"button_{i+1:02d}"
                 rois.append(roi)
 
@@ -210,30 +292,32 @@ class AutoDetector:
         Returns:
             ROI列表
         """
-        img = self._qpixmap_to_cv2(pixmap)
-        if img is None:
-            return []
+        return self._cached('icons', pixmap, (),
+                            lambda prepared: self._detect_icons_impl(prepared))
 
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img
+    def _detect_icons_impl(self, prepared: dict) -> List[ROI]:
+        """图标检测（使用预处理结果）"""
+        gray = prepared['gray']
+        scale = prepared['scale']
+        img_h, img_w = gray.shape[:2]
 
         # 边缘检测
-        edges = cv2.Canny(gray, 50, 150)
+        edges = cv2.Canny(gray, 50, 150, edges=self._buf('edges', gray.shape))
 
         # 膨胀连接边缘
-        kernel = np.ones((3, 3), np.uint8)
-        edges = cv2.dilate(edges, kernel, iterations=1)
+        edges = cv2.dilate(edges, KERNEL_3, dst=self._buf('edges_dilated', gray.shape), iterations=1)
 
         # 查找轮廓
         contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
         rois = []
-        img_area = pixmap.width() * pixmap.height()
+        img_area = img_w * img_h
 
         for i, contour in enumerate(contours):
             area = cv2.contourArea(contour)
 
             # 过滤
-            if area < 100 or area > img_area * 0.3:
+            if area < 100 * scale * scale or area > img_area * 0.3:
                 continue
 
             x, y, w, h = cv2.boundingRect(contour)
@@ -243,7 +327,7 @@ class AutoDetector:
             if aspect_ratio > 2:  # 太扁的不是图标
                 continue
 
-            roi = ROI(x=x, y=y, width=w, height=h)
+            roi = self._scaled_roi(x, y, w, h, scale)
             roi.name = f"icon_{i+1:02d}"
             rois.append(roi)
 
@@ -256,23 +340,22 @@ class AutoDetector:
         Returns:
             ROI列表
         """
-        all_rois = []
-
-        # 1. 检测圆形（图标、按钮）
-        circles = self.detect_circles(pixmap)
-        all_rois.extend(circles)
-
-        # 2. 检测红点
-        red_dots = self.detect_red_dots(pixmap)
-        all_rois.extend(red_dots)
-
-        # 3. 检测UI按钮
-        buttons = self.detect_ui_buttons(pixmap)
-        all_rois.extend(buttons)
-
-        # 4. 检测图标
-        icons = self.detect_icons(pixmap)
-        all_rois.extend(icons)
+        return self._cached('all', pixmap, (), self._detect_all_impl)
+
+    def _detect_all_impl(self, prepared: dict) -> List[ROI]:
+        """综合检测（使用预处理结果，图像转换、灰度、HSV只计算一次，四种检测共用）"""
+        # 四种检测互不依赖，耗时都在OpenCV内部（释放GIL），并行执行
+        detectors = [
+            self._detect_circles_impl,      # 1. 检测圆形（图标、按钮）
+            self._detect_red_dots_impl,     # 2. 检测红点
+            self._detect_ui_buttons_impl,   # 3. 检测UI按钮
+            self._detect_icons_impl,        # 4. 检测图标
+        ]
+        with ThreadPoolExecutor(max_workers=len(detectors)) as executor:
+            futures = [executor.submit(detector, prepared) for detector in detectors]
+            all_rois = []
+            for future in futures:
+                all_rois.extend(future.result())
 
         # 合并重叠的ROI
         merged = self._merge_overlapping_rois(all_rois)
@@ -283,14 +366,14 @@ class AutoDetector:
 
         return merged
 
-    def detect_at_point(self, pixmap: QPixmap, x: int, y: int,
+    def detect_at_point(self, pixmap, x: int, y: int,
                        color_tolerance: int = 30, merge_all: bool = False) -> Optional[ROI]:
         """
         以点击位置为中心，识别颜色相同的最小封闭边界
         使用泛洪填充找到连通的颜色区域
 
         Args:
-            pixmap: 输入图片
+            pixmap: 输入图片（QPixmap，或已转换好的BGR数组）
             x, y: 点击位置（图片坐标）
             color_tolerance: 颜色容差（0-255，越大包含的颜色范围越广）
             merge_all: 是否合并所有相似颜色的区域（默认只返回点击位置的连通区域）
@@ -298,7 +381,7 @@ class AutoDetector:
         Returns:
             ROI或None
         """
-        img = self._qpixmap_to_cv2(pixmap)
+        img = self._point_source(pixmap)
         if img is None:
             return None
 
@@ -309,19 +392,15 @@ class AutoDetector:
         y = int(max(0, min(y, h - 1)))
 
         # 在点击位置取样颜色
-        seed_color = img[y, x].astype(np.int32)
-
-        # 创建颜色差异掩码 - 计算每个像素与点击位置的颜色距离
-        # 使用L2距离（欧几里得距离）
-        diff = np.sqrt(np.sum((img.astype(np.float32) - seed_color) ** 2, axis=2))
+        seed_color = img[y, x]
 
-        # 创建二值掩码：颜色相似的区域为255，其他为0
-        mask = (diff <= color_tolerance).astype(np.uint8) * 255
+        # 创建颜色差异掩码 - 计算每个像素与点击位置的颜色距离（L2距离）
+        # 二值掩码：颜色相似的区域为255，其他为0
+        mask = color_distance_mask(img, seed_color, color_tolerance)
 
         # 形态学操作清理小噪点
-        kernel = np.ones((3, 3), np.uint8)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=1)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=1)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, KERNEL_3, iterations=1)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, KERNEL_3, iterations=1)
 
         # 查找连通区域
         num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity=8)
@@ -378,77 +457,164 @@ class AutoDetector:
             roi = ROI(x=int(x1), y=int(y1), width=int(w1), height=int(h1))
             roi.name = "color_blob"
 
-            # 提取该连通区域的轮廓（用于显示）
-            component_mask = (labels == clicked_label).astype(np.uint8) * 255
-            contours, _ = cv2.findContours(component_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            # 提取该连通区域的轮廓（用于显示）：只比较边界框内的标签，轮廓坐标偏移回原图；
+            # findContours把非零都当作前景，不必再乘255
+            component_mask = (labels[y1:y1 + h1, x1:x1 + w1] == clicked_label).view(np.uint8)
+            contours, _ = cv2.findContours(component_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE,
+                                           offset=(int(x1), int(y1)))
             if contours:
                 roi.contour = max(contours, key=cv2.contourArea)
 
             return roi
 
     def _merge_overlapping_rois(self, rois: List[ROI], iou_threshold: float = 0.3) -> List[ROI]:
-        """合并重叠的ROI"""
+        """
+        合并重叠的ROI
+
+        按面积从大到小贪心保留，与已保留框IoU超过阈值的丢弃。
+        等价于以面积为分数的NMS，交给cv2.dnn.NMSBoxes在C++中完成。
+        """
         if not rois:
             return []
 
-        # 按面积排序
-        sorted_rois = sorted(rois, key=lambda r: r.area, reverse=True)
+        # 一次遍历取出框和面积（直接用宽高相乘，不经过area属性）
+        # 分数整体+1，保证面积为0的框也能通过score_threshold（与逐对比较行为一致）
+        boxes = []
+        scores = []
+        for r in rois:
+            w, h = int(r.width), int(r.height)
+            boxes.append([int(r.x), int(r.y), w, h])
+            scores.append(float(w * h) + 1.0)
+
+        keep = cv2.dnn.NMSBoxes(boxes, scores, score_threshold=0.0, nms_threshold=iou_threshold)
+        if len(keep) == 0:
+            return []
 
-        merged = []
-        for roi in sorted_rois:
-            should_merge = False
-            for existing in merged:
-                iou = self._calculate_iou(roi, existing)
-                if iou > iou_threshold:
-                    should_merge = True
-                    break
+        return [rois[i] for i in np.asarray(keep).flatten()]
 
-            if not should_merge:
-                merged.append(roi)
+    def _cached(self, name: str, pixmap: QPixmap, params: tuple, compute) -> List[ROI]:
+        """
+        按(截图cacheKey, 检测类型, 参数)缓存检测结果
 
-        return merged
+        命中时返回深拷贝并重新生成roi_id，调用方修改结果不会污染缓存，
+        多次添加同一批结果也不会出现重复ID
+        """
+        if pixmap is None or pixmap.isNull():
+            return []
 
-    def _calculate_iou(self, roi1: ROI, roi2: ROI) -> float:
-        """计算IoU（交并比）"""
-        x1 = max(roi1.x, roi2.x)
-        y1 = max(roi1.y, roi2.y)
-        x2 = min(roi1.right, roi2.right)
-        y2 = min(roi1.bottom, roi2.bottom)
+        key = (pixmap.cacheKey(), name, params,
+               self.detect_scale, self.detect_scale_min_size)
+        with self._result_cache_lock:
+            cached = self._result_cache.get(key)
+            if cached is not None:
+                self._result_cache.move_to_end(key)
+                return [self._fresh_copy(roi) for roi in cached]
 
-        if x2 <= x1 or y2 <= y1:
-            return 0.0
+        prepared = self._prepare(pixmap)
+        if prepared is None:
+            return []
+        rois = compute(prepared)
 
-        intersection = (x2 - x1) * (y2 - y1)
-        union = roi1.area + roi2.area - intersection
+        with self._result_cache_lock:
+            self._result_cache[key] = copy.deepcopy(rois)
+            self._result_cache.move_to_end(key)
+            while len(self._result_cache) > self.result_cache_size:
+                self._result_cache.popitem(last=False)
+        return rois
 
-        return intersection / union if union > 0 else 0.0
+    def _fresh_copy(self, roi: ROI) -> ROI:
+        """深拷贝缓存中的ROI，并像新检测结果一样分配ID和时间戳"""
+        new_roi = copy.deepcopy(roi)
+        fresh = ROI()
+        new_roi.roi_id = fresh.roi_id
+        new_roi.created_at = fresh.created_at
+        new_roi.modified_at = fresh.modified_at
+        return new_roi
+
+    def clear_cache(self):
+        """清空检测结果缓存"""
+        with self._result_cache_lock:
+            self._result_cache.clear()
+
+    def _prepare(self, pixmap: QPixmap) -> Optional[dict]:
+        """
+        一次性完成检测所需的预处理
 
-    def _qpixmap_to_cv2(self, pixmap: QPixmap) -> Optional[np.ndarray]:
-        """QPixmap转OpenCV格式"""
-        if pixmap.isNull():
+        大图按detect_scale缩小后再计算灰度/HSV，检测结果需除以scale还原
+
+        Returns:
+            {'img': 检测用BGR图, 'gray': 灰度图, 'hsv': HSV图,
+             'scale': 缩放比例, 'size': 原图(宽, 高)}，图片无效时返回None
+        """
+        img = self._qpixmap_to_cv2(pixmap)
+        if img is None:
             return None
 
-        image = pixmap.toImage()
-        if image.format() != QImage.Format_RGB888:
-            image = image.convertToFormat(QImage.Format_RGB888)
+        h, w = img.shape[:2]
+        scale = 1.0
+        if 0 < self.detect_scale < 1.0 and max(h, w) >= self.detect_scale_min_size:
+            scale = self.detect_scale
+            img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        if len(img.shape) == 3:
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY, dst=self._buf('gray', img.shape[:2]))
+        else:
+            gray = img
+        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV, dst=self._buf('hsv', img.shape))
+
+        return {'img': img, 'gray': gray, 'hsv': hsv, 'scale': scale, 'size': (w, h)}
+
+    def _buf(self, key: str, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        """取出可复用的中间结果缓冲区（形状变化时重新分配）"""
+        arena_key = (key, tuple(shape), np.dtype(dtype).str)
+        # detect_all在多个线程中取缓冲区，各检测器用途不同，这里只需保护字典本身
+        with self._arena_lock:
+            buf = self._arena.get(arena_key)
+            if buf is None:
+                # 同一用途只保留最近一种尺寸，换图后旧缓冲区随之释放
+                for old_key in [k for k in self._arena if k[0] == key]:
+                    del self._arena[old_key]
+                buf = np.empty(shape, dtype)
+                self._arena[arena_key] = buf
+        return buf
+
+    def _scaled_roi(self, x: int, y: int, w: int, h: int, scale: float) -> ROI:
+        """把检测分辨率下的矩形还原为原图坐标的ROI"""
+        if scale == 1.0:
+            return ROI(x=int(x), y=int(y), width=int(w), height=int(h))
+        return ROI(x=int(round(x / scale)), y=int(round(y / scale)),
+                   width=int(round(w / scale)), height=int(round(h / scale)))
+
+    def _point_source(self, image) -> Optional[np.ndarray]:
+        """
+        获取点选识别用的BGR图
+
+        QPixmap按cacheKey缓存最近一张的转换结果（只读，调用方不能原地修改）；
+        传入ndarray时直接使用
+        """
+        if isinstance(image, np.ndarray):
+            return image
+        if image is None or image.isNull():
+            return None
 
-        width = image.width()
-        height = image.height()
-        ptr = image.bits()
-        ptr.setsize(image.byteCount())
+        key = image.cacheKey()
+        cached = self._point_image
+        if cached is not None and cached[0] == key:
+            return cached[1]
 
-        arr = np.array(ptr).reshape(height, width, 3)
-        arr = cv2.cvtColor(arr, cv2.COLOR_RGB2BGR)
+        img = self._qpixmap_to_cv2(image)
+        if img is not None:
+            img.flags.writeable = False
+            self._point_image = (key, img)
+        return img
 
-        return arr
+    def _qpixmap_to_cv2(self, pixmap: QPixmap) -> Optional[np.ndarray]:
+        """QPixmap转OpenCV格式"""
+        return qpixmap_to_cv2(pixmap)
 
     def _cv2_to_qpixmap(self, img: np.ndarray) -> QPixmap:
         """OpenCV格式转QPixmap"""
-        rgb_img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        height, width, channels = rgb_img.shape
-        bytes_per_line = channels * width
-        q_image = QImage(rgb_img.data, width, height, bytes_per_line, QImage.Format_RGB888)
-        return QPixmap.fromImage(q_image)
+        return cv2_to_qpixmap(img)
 
     def preview_detection(self, pixmap: QPixmap, rois: List[ROI]) -> QPixmap:
         """生成检测预览图"""
@@ -473,17 +639,8 @@ class AutoDetector:
             cv2.putText(img, label, (roi.x, roi.y - 5),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1)
 
-        # 确保图像是3通道BGR格式
-        if len(img.shape) == 3 and img.shape[2] == 3:
-            rgb_img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        elif len(img.shape) == 2:
-            # 灰度图像转为RGB
-            rgb_img = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
-        else:
+        # 只支持3通道BGR或灰度图
+        if not (len(img.shape) == 2 or (len(img.shape) == 3 and img.shape[2] == 3)):
             return pixmap  # 不支持的格式，返回原始pixmap
 
-        height, width, channels = rgb_img.shape
-        bytes_per_line = channels * width
-        q_image = QImage(rgb_img.data, width, height, bytes_per_line, QImage.Format_RGB888)
-
-        return QPixmap.fromImage(q_image)
+        return cv2_to_qpixmap(img)
@@ -6,37 +6,58 @@
 
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
-from PyQt5.QtGui import QPixmap
+import cv2
+import numpy as np
+from PyQt5.QtGui import QPixmap, QImage
 from ..models.roi import ROI
+from ..utils.image_convert import qimage_bgra_view, qimage_to_cv2
 
 
 class CropEngine:
     """切图引擎"""
+
+    # PNG压缩级别：快速（导出后马上给脚本使用）/ 均衡（体积更小）
+    FAST_PNG_COMPRESSION = 1
+    BALANCED_PNG_COMPRESSION = 3
     
     def __init__(self, output_dir: str = "./res_output"):
         self.output_dir = output_dir
+        # 已确认存在的输出目录，避免每次切图都调用makedirs
+        self._dir_ready = set()
         self.ensure_output_dir()
         
-        # 命名模板
-        self.naming_template = "{prefix}{roi_name}_{timestamp}.png"
+        # 命名模板（同一批次共用时间戳，用roi_id区分）
+        self.naming_template = "{prefix}{roi_name}_{timestamp}_{roi_id}.png"
+
+        # 批量保存的线程数
+        self.max_workers = os.cpu_count() or 4
+
+        # PNG压缩级别（0-9），默认快速压缩：编码耗时主要在zlib，级别1比3快约三分之一，体积只大几个百分点
+        self.png_compression = self.FAST_PNG_COMPRESSION
         
     def ensure_output_dir(self):
-        """确保输出目录存在"""
-        os.makedirs(self.output_dir, exist_ok=True)
+        """确保输出目录存在（同一目录只创建一次）"""
+        if self.output_dir not in self._dir_ready:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self._dir_ready.add(self.output_dir)
     
     def set_output_dir(self, path: str):
         """设置输出目录"""
         self.output_dir = path
+        self._dir_ready.discard(path)
         self.ensure_output_dir()
     
-    def generate_filename(self, roi: ROI, prefix: str = "") -> str:
+    def generate_filename(self, roi: ROI, prefix: str = "", timestamp: Optional[int] = None) -> str:
         """生成文件名"""
-        timestamp = int(time.time())
+        if timestamp is None:
+            timestamp = int(time.time())
         return self.naming_template.format(
             prefix=prefix,
             roi_name=roi.name,
-            timestamp=timestamp
+            timestamp=timestamp,
+            roi_id=roi.roi_id
         )
     
     def crop(self, source_pixmap: QPixmap, roi: ROI, prefix: str = "") -> Optional[Dict]:
@@ -53,59 +74,153 @@ class CropEngine:
         """
         if not source_pixmap or source_pixmap.isNull():
             return None
-        
+
+        self.ensure_output_dir()
+        return self._crop_image(source_pixmap.toImage(), roi, prefix, int(time.time()))
+
+    def _crop_image(self, source_image: QImage, roi: ROI, prefix: str, timestamp: int) -> Optional[Dict]:
+        """
+        裁剪并保存单个ROI（QImage可在工作线程中使用，QPixmap不行）
+        """
         try:
             # 裁剪
             rect = roi.rect
-            cropped = source_pixmap.copy(rect)
+            cropped = source_image.copy(rect)
             
             if cropped.isNull():
                 return None
             
             # 生成文件名
-            filename = self.generate_filename(roi, prefix)
+            filename = self.generate_filename(roi, prefix, timestamp)
             filepath = os.path.join(self.output_dir, filename)
             
-            # 保存
-            success = cropped.save(filepath)
+            # 保存（Qt的PNG质量0-100按 (100-quality)*9/91 换算为zlib级别）
+            quality = 100 - (self.png_compression * 91 + 8) // 9
+            success = cropped.save(filepath, "PNG", quality)
             if not success:
                 return None
             
-            # 更新ROI信息
-            roi.image_path = filepath
-            
-            return {
-                "roi_id": roi.roi_id,
-                "roi_name": roi.name,
-                "filename": filename,
-                "filepath": filepath,
-                "x": roi.x,
-                "y": roi.y,
-                "width": roi.width,
-                "height": roi.height,
-                "center_x": roi.center[0],
-                "center_y": roi.center[1]
-            }
+            return self._crop_result(roi, filename, filepath)
             
         except Exception as e:
             print(f"裁剪失败: {e}")
             return None
+
+    def _crop_ndarray(self, img_bgr: np.ndarray, roi: ROI, prefix: str, timestamp: int) -> Optional[Dict]:
+        """
+        裁剪并保存单个ROI（切片视图不复制像素，OpenCV直接编码PNG）
+        """
+        try:
+            # 裁剪（限制在图像范围内，负坐标不能直接用于切片）
+            img_h, img_w = img_bgr.shape[:2]
+            x1, y1 = max(0, roi.x), max(0, roi.y)
+            x2, y2 = min(img_w, roi.x + roi.width), min(img_h, roi.y + roi.height)
+            if x2 <= x1 or y2 <= y1:
+                return None
+            view = img_bgr[y1:y2, x1:x2]
+
+            # 生成文件名
+            filename = self.generate_filename(roi, prefix, timestamp)
+            filepath = os.path.join(self.output_dir, filename)
+
+            # 编码并保存（imencode+写字节，路径含中文时也能正常保存）
+            success, buf = cv2.imencode('.png', view, [cv2.IMWRITE_PNG_COMPRESSION, self.png_compression])
+            if not success:
+                return None
+            with open(filepath, 'wb') as f:
+                f.write(buf.tobytes())
+
+            return self._crop_result(roi, filename, filepath)
+
+        except Exception as e:
+            print(f"裁剪失败: {e}")
+            return None
+
+    def _crop_result(self, roi: ROI, filename: str, filepath: str) -> Dict:
+        """更新ROI图片路径并生成裁剪信息"""
+        roi.image_path = filepath
+
+        return {
+            "roi_id": roi.roi_id,
+            "roi_name": roi.name,
+            "filename": filename,
+            "filepath": filepath,
+            "x": roi.x,
+            "y": roi.y,
+            "width": roi.width,
+            "height": roi.height,
+            "center_x": roi.center[0],
+            "center_y": roi.center[1]
+        }
     
     def crop_all(self, source_pixmap: QPixmap, rois: List[ROI], prefix: str = "") -> List[Dict]:
         """
         批量裁剪所有ROI
         
+        PNG编码互相独立，使用线程池并行保存
+        
         Args:
             source_pixmap: 源图片
             rois: ROI列表
             prefix: 文件名前缀
             
         Returns:
-            裁剪结果列表
+            裁剪结果列表（顺序与rois一致）
+        """
+        if not source_pixmap or source_pixmap.isNull() or not rois:
+            return []
+
+        # QPixmap只能在GUI线程使用，先转换为QImage再分发给工作线程
+        return self.crop_all_from_image(source_pixmap.toImage(), rois, prefix)
+
+    def crop_all_from_image(self, source_image: QImage, rois: List[ROI], prefix: str = "") -> List[Dict]:
+        """
+        从QImage批量裁剪所有ROI（不涉及QPixmap，可在工作线程中调用）
+
+        Returns:
+            裁剪结果列表（顺序与rois一致）
+        """
+        if source_image is None or source_image.isNull() or not rois:
+            return []
+
+        # 不透明图片转为cv2图像后用OpenCV编码（更快）
+        if not source_image.hasAlphaChannel():
+            img_bgr = qimage_to_cv2(source_image)
+            if img_bgr is not None:
+                return self.crop_all_from_ndarray(img_bgr, rois, prefix)
+            return self._crop_batch(self._crop_image, source_image, rois, prefix)
+
+        # 带透明通道：整图只转换一次为ARGB32，各ROI在BGRA视图上切片编码（保留alpha），
+        # 不再每个ROI调用QImage.copy。image需存活到批次结束，视图引用其内存
+        image = source_image.convertToFormat(QImage.Format_ARGB32)
+        img_bgra = qimage_bgra_view(image)
+        if img_bgra is None:
+            return self._crop_batch(self._crop_image, source_image, rois, prefix)
+        return self._crop_batch(self._crop_ndarray, img_bgra, rois, prefix)
+
+    def crop_all_from_ndarray(self, img_bgr: np.ndarray, rois: List[ROI], prefix: str = "") -> List[Dict]:
+        """
+        从OpenCV图像批量裁剪所有ROI
+
+        Returns:
+            裁剪结果列表（顺序与rois一致）
         """
-        results = []
-        for roi in rois:
-            result = self.crop(source_pixmap, roi, prefix)
-            if result:
-                results.append(result)
-        return results
+        if img_bgr is None or img_bgr.size == 0 or not rois:
+            return []
+
+        return self._crop_batch(self._crop_ndarray, img_bgr, rois, prefix)
+
+    def _crop_batch(self, crop_func, source, rois: List[ROI], prefix: str) -> List[Dict]:
+        """用线程池并行裁剪保存，同一批次共用时间戳"""
+        self.ensure_output_dir()
+        timestamp = int(time.time())
+
+        workers = max(1, min(self.max_workers, len(rois)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(crop_func, source, roi, prefix, timestamp)
+                for roi in rois
+            ]
+            results = [future.result() for future in futures]
+
+        return [result for result in results if result]
@@ -4,11 +4,13 @@
 负责导出各种格式的数据
 """
 
-import json
+import io
 import os
 import time
 from typing import Dict, List, Optional
 from ..models.roi import ROI, ROICollection
+from ..utils import json_compat
+
 
 
 class ExportManager:
@@ -16,21 +18,55 @@ class ExportManager:
     
     def __init__(self, output_dir: str = "./res_output"):
         self.output_dir = output_dir
-        os.makedirs(output_dir, exist_ok=True)
+        # 已确认存在的输出目录，避免每次导出都调用makedirs
+        self._dir_ready = set()
+        self.ensure_output_dir()
+
+    def ensure_output_dir(self):
+        """确保输出目录存在（同一目录只创建一次）"""
+        if self.output_dir not in self._dir_ready:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self._dir_ready.add(self.output_dir)
+
+    def set_output_dir(self, path: str):
+        """设置输出目录"""
+        self.output_dir = path
+        self._dir_ready.discard(path)
+        self.ensure_output_dir()
+
+    def _write_bytes(self, filepath: str, payload: bytes):
+        """一次性写出整个文件（无缓冲，单次write系统调用）"""
+        self.ensure_output_dir()
+        with open(filepath, 'wb', buffering=0) as f:
+            f.write(payload)
+
+    def _write_text(self, filepath: str, text: str):
+        """整体编码为UTF-8后一次性写出文本文件"""
+        self._write_bytes(filepath, text.encode('utf-8'))
     
-    def export_json(self, rois: ROICollection, source_info: Dict = None) -> str:
+    def export_json(self, rois: ROICollection, source_info: Dict = None,
+                    export_time: Optional[str] = None,
+                    roi_dicts: Optional[List[Dict]] = None) -> str:
         """
         导出为JSON格式
         
+        Args:
+            roi_dicts: 已转换好的ROI字典列表（export_all传入，避免重复转换）
+        
         Returns:
             导出的文件路径
         """
+        if export_time is None:
+            export_time = time.strftime("%Y-%m-%d %H:%M:%S")
+        if roi_dicts is None:
+            roi_dicts = rois.to_list()
+
         data = {
             "version": "1.0.0",
-            "export_time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "export_time": export_time,
             "source": "安卓脚本切图神器",
-            "roi_count": len(rois),
-            "rois": rois.to_list()
+            "roi_count": len(roi_dicts),
+            "rois": roi_dicts
         }
         
         if source_info:
@@ -39,144 +75,137 @@ class ExportManager:
         filename = f"roi_data_{int(time.time())}.json"
         filepath = os.path.join(self.output_dir, filename)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        self._write_bytes(filepath, json_compat.dumps(data))
         
         return filepath
     
-    def export_autojs(self, rois: ROICollection, source_info: Dict = None) -> str:
+    def export_autojs(self, rois: ROICollection, source_info: Dict = None,
+                      export_time: Optional[str] = None) -> str:
         """
         导出为Auto.js格式
         
         Returns:
             导出的文件路径
         """
-        lines = [
-            "// Auto.js 脚本",
-            f"// 生成时间: {time.strftime('%Y-%m-%d %H:%M:%S')}",
-            "",
-            "// ROI区域定义",
-            "const REGIONS = {"
-        ]
+        if export_time is None:
+            export_time = time.strftime("%Y-%m-%d %H:%M:%S")
+
+        buf = io.StringIO()
+        buf.write(
+            "// Auto.js 脚本\n"
+            f"// 生成时间: {export_time}\n"
+            "\n"
+            "// ROI区域定义\n"
+            "const REGIONS = {\n"
+        )
+        
+        buf.writelines(
+            f'    "{roi.name}": {{x: {roi.x}, y: {roi.y}, w: {roi.width}, h: {roi.height}}},\n'
+            for roi in rois
+        )
+        
+        buf.write("};\n\n// 点击函数\n")
         
         for roi in rois:
-            lines.append(f'    "{roi.name}": {{'
-                        f'x: {roi.x}, y: {roi.y}, '
-                        f'w: {roi.width}, h: {roi.height}}},')
+            cx, cy = roi.center
+            buf.write(f"function click_{roi.name}() {{\n    click({cx}, {cy});\n}}\n")
         
-        lines.extend([
-            "};",
-            "",
-            "// 点击函数"
-        ])
-        
-        for roi in rois:
-            center = roi.center
-            lines.extend([
-                f"function click_{roi.name}() {{",
-                f'    click({center[0]}, {center[1]});',
-                "}"
-            ])
-        
-        lines.extend([
-            "",
-            "// 找图函数"
-        ])
+        buf.write("\n// 找图函数\n")
         
         for roi in rois:
             if roi.image_path:
                 filename = os.path.basename(roi.image_path)
-                lines.extend([
-                    f"function find_{roi.name}() {{",
-                    f'    return images.findImage(captureScreen(), images.read("./res/{filename}"));',
-                    "}"
-                ])
+                buf.write(
+                    f"function find_{roi.name}() {{\n"
+                    f'    return images.findImage(captureScreen(), images.read("./res/{filename}"));\n'
+                    "}\n"
+                )
         
         filename = f"auto_script_{int(time.time())}.js"
         filepath = os.path.join(self.output_dir, filename)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(lines))
+        self._write_text(filepath, buf.getvalue())
         
         return filepath
     
-    def export_python(self, rois: ROICollection, source_info: Dict = None) -> str:
+    def export_python(self, rois: ROICollection, source_info: Dict = None,
+                      export_time: Optional[str] = None) -> str:
         """
         导出为Python格式（OpenCV模板匹配）
         
         Returns:
             导出的文件路径
         """
-        lines = [
-            "# Python OpenCV 脚本",
-            f"# 生成时间: {time.strftime('%Y-%m-%d %H:%M:%S')}",
-            "",
-            "import cv2",
-            "import numpy as np",
-            "",
-            "# ROI区域定义",
-            "ROI_DATA = {"
-        ]
-        
-        for roi in rois:
-            lines.append(f'    "{roi.name}": {{'
-                        f'"x": {roi.x}, "y": {roi.y}, '
-                        f'"w": {roi.width}, "h": {roi.height}}},')
-        
-        lines.extend([
-            "}",
-            "",
-            "# 模板路径"
-        ])
-        
-        for roi in rois:
-            if roi.image_path:
-                filename = os.path.basename(roi.image_path)
-                lines.append(f'# {roi.name}: ./res/{filename}')
-        
-        lines.extend([
-            "",
-            "def match_template(screen, template_path, threshold=0.8):",
-            "    \"\"\"模板匹配\"\"\"",
-            "    template = cv2.imread(template_path)",
-            "    if template is None:",
-            "        return None",
-            "    ",
-            "    result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)",
-            "    min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)",
-            "    ",
-            "    if max_val >= threshold:",
-            "        return max_loc",
-            "    return None",
-            "",
-            "def click(x, y):",
-            "    \"\"\"点击坐标\"\"\"",
-            "    print(f'点击: ({x}, {y})')",
-        ])
+        if export_time is None:
+            export_time = time.strftime("%Y-%m-%d %H:%M:%S")
+
+        buf = io.StringIO()
+        buf.write(
+            "# Python OpenCV 脚本\n"
+            f"# 生成时间: {export_time}\n"
+            "\n"
+            "import cv2\n"
+            "import numpy as np\n"
+            "\n"
+            "# ROI区域定义\n"
+            "ROI_DATA = {\n"
+        )
+        
+        buf.writelines(
+            f'    "{roi.name}": {{"x": {roi.x}, "y": {roi.y}, "w": {roi.width}, "h": {roi.height}}},\n'
+            for roi in rois
+        )
+        
+        buf.write("}\n\n# 模板路径\n")
+        
+        buf.writelines(
+            f'# {roi.name}: ./res/{os.path.basename(roi.image_path)}\n'
+            for roi in rois if roi.image_path
+        )
+        
+        buf.write(
+            "\n"
+            "def match_template(screen, template_path, threshold=0.8):\n"
+            "    \"\"\"模板匹配\"\"\"\n"
+            "    template = cv2.imread(template_path)\n"
+            "    if template is None:\n"
+            "        return None\n"
+            "    \n"
+            "    result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)\n"
+            "    min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)\n"
+            "    \n"
+            "    if max_val >= threshold:\n"
+            "        return max_loc\n"
+            "    return None\n"
+            "\n"
+            "def click(x, y):\n"
+            "    \"\"\"点击坐标\"\"\"\n"
+            "    print(f'点击: ({x}, {y})')\n"
+        )
         
         # 为每个ROI生成点击函数
         for roi in rois:
-            center = roi.center
-            lines.extend([
-                "",
-                f"def click_{roi.name}(screen=None):",
-                f'    \"\"\"点击 {roi.name}\"\"\"',
-                f'    click({center[0]}, {center[1]})',
-            ])
+            name = roi.name
+            cx, cy = roi.center
+            buf.write(
+                "\n"
+                f"def click_{name}(screen=None):\n"
+                f'    \"\"\"点击 {name}\"\"\"\n'
+                f'    click({cx}, {cy})\n'
+            )
             
             if roi.image_path:
                 filename = os.path.basename(roi.image_path)
-                lines.extend([
-                    f'    # 如需匹配图片:',
-                    f'    # pos = match_template(screen, "./res/{filename}")',
-                    f'    # if pos: click(pos[0] + {roi.width//2}, pos[1] + {roi.height//2})',
-                ])
+                buf.write(
+                    f'    # 如需匹配图片:\n'
+                    f'    # pos = match_template(screen, "./res/{filename}")\n'
+                    f'    # if pos: click(pos[0] + {roi.width//2}, pos[1] + {roi.height//2})\n'
+                )
         
         filename = f"auto_script_{int(time.time())}.py"
         filepath = os.path.join(self.output_dir, filename)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(lines))
+        self._write_text(filepath, buf.getvalue())
         
         return filepath
     
@@ -224,19 +253,23 @@ class ExportManager:
             格式名到文件路径的映射
         """
         results = {}
+        # 三种格式共用同一个导出时间、ROI快照和字典转换结果
+        export_time = time.strftime("%Y-%m-%d %H:%M:%S")
+        snapshot = list(rois)
+        roi_dicts = [roi.to_dict() for roi in snapshot]
         
         try:
-            results['json'] = self.export_json(rois, source_info)
+            results['json'] = self.export_json(rois, source_info, export_time, roi_dicts)
         except Exception as e:
             print(f"导出JSON失败: {e}")
         
         try:
-            results['autojs'] = self.export_autojs(rois, source_info)
+            results['autojs'] = self.export_autojs(snapshot, source_info, export_time)
         except Exception as e:
             print(f"导出Auto.js失败: {e}")
         
         try:
-            results['python'] = self.export_python(rois, source_info)
+            results['python'] = self.export_python(snapshot, source_info, export_time)
         except Exception as e:
             print(f"导出Python失败: {e}")
         
@@ -6,11 +6,61 @@
 
 import subprocess
 import os
+import re
+import mmap
+import socket
+import queue
 import tempfile
+import threading
 import time
 import glob
-from typing import Optional, List
-from PyQt5.QtGui import QPixmap
+import atexit
+import struct
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Optional, List
+from PyQt5.QtGui import QPixmap, QImage
+from ..utils import json_compat
+
+
+# 雷电模拟器配置文件中的ADB端口项
+_ADB_PORT_RE = re.compile(rb'adb_port[=:]\s*(\d+)')
+
+
+def _list_dir(path: str) -> set:
+    """列出目录中的文件名（Windows文件名不区分大小写，统一转小写），目录不存在返回空集合"""
+    try:
+        with os.scandir(path) as it:
+            if os.name == 'nt':
+                return {entry.name.lower() for entry in it}
+            return {entry.name for entry in it}
+    except OSError:
+        return set()
+
+
+def _port_open(host: str, port: int, timeout: float = 0.5) -> bool:
+    """端口是否有程序在监听（只建立TCP连接，不执行adb connect）"""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def _subprocess_kwargs() -> dict:
+    """
+    启动adb子进程的平台参数
+
+    Windows下不弹出控制台窗口，也不扫描继承句柄；其他平台保持默认
+    """
+    if os.name != 'nt':
+        return {}
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    return {
+        'creationflags': subprocess.CREATE_NO_WINDOW,
+        'startupinfo': startupinfo,
+        'close_fds': False,
+    }
 
 
 class ScreenshotManager:
@@ -33,13 +83,59 @@ class ScreenshotManager:
     # 雷电模拟器常见ADB端口
     LD_PORTS = [5555, 5557, 5559, 5561, 5563, 5565]
 
+    # 已找到的ADB路径和上次连接成功的端口缓存到本地，启动时免去查找
+    ADB_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".android_roi_tool", "adb_cache.json")
+
+    # 设备列表缓存时间（秒），连续截图时不必每次都执行 adb devices
+    DEVICE_CACHE_TTL = 1.0
+
+    # 常驻shell的命令结束标记和设备端截图临时路径
+    SHELL_SENTINEL = "__ROI_TOOL_DONE__"
+    REMOTE_SCREENSHOT = "/data/local/tmp/roi_tool_screencap.png"
+    REMOTE_RAW_SCREENSHOT = "/data/local/tmp/roi_tool_screencap.raw"
+
+    # 原始帧超过该字节数（约4K分辨率）时改用 adb pull 传输
+    RAW_PULL_THRESHOLD = 3840 * 2160 * 4
+
+    # screencap原始帧像素格式(Android PixelFormat) -> QImage格式，均为每像素4字节
+    RAW_FORMATS = {
+        1: QImage.Format_RGBA8888,  # RGBA_8888
+        2: QImage.Format_RGBX8888,  # RGBX_8888
+        5: QImage.Format_ARGB32,    # BGRA_8888（小端下与ARGB32内存布局一致）
+    }
+
     def __init__(self):
         self.temp_dir = tempfile.gettempdir()
-        self.adb_path = self._find_adb()
+        self._cache_lock = threading.Lock()
+        self._adb_cache = self._load_adb_cache()
+
+        # 缓存的ADB路径仍然存在就直接使用；启动时不做全盘搜索
+        cached_adb = self._adb_cache.get('adb_path')
+        if cached_adb and os.path.exists(cached_adb):
+            self.adb_path = cached_adb
+        else:
+            self.adb_path = self._find_adb()
         self.adb_available = self.adb_path is not None
         print(f"[ADB] Path: {self.adb_path}")
         print(f"[ADB] Available: {self.adb_available}")
 
+        # 设备列表缓存: (monotonic时间戳, 设备列表)
+        self._devices_cache = None
+        self._server_started = False
+
+        # 帧数据较大、改用pull传输原始帧的设备
+        self._prefer_pull = {}
+
+        # 常驻 adb shell 进程（按设备复用，Qt回调可能重叠，用锁保护）
+        self._shell = None
+        self._shell_device = None
+        self._shell_lines = None
+        self._shell_lock = threading.Lock()
+
+        # 多设备截图、多端口连接都是等待adb的IO操作，用线程池并行
+        self._pool = ThreadPoolExecutor(max_workers=8)
+        atexit.register(self.close)
+
     def _get_builtin_adb_path(self) -> Optional[str]:
         """获取内置ADB的路径"""
         # 获取项目根目录
@@ -56,8 +152,43 @@ class ScreenshotManager:
 
         return None
 
-    def _find_adb(self) -> Optional[str]:
-        """查找ADB可执行文件"""
+    def _load_adb_cache(self) -> dict:
+        """读取ADB缓存（路径、雷电端口）"""
+        try:
+            with open(self.ADB_CACHE_FILE, 'rb') as f:
+                cache = json_compat.loads(f.read())
+            return cache if isinstance(cache, dict) else {}
+        except Exception:
+            return {}
+
+    def _save_adb_cache(self, **values):
+        """更新ADB缓存，值未变化时不写盘"""
+        with self._cache_lock:
+            if all(self._adb_cache.get(k) == v for k, v in values.items()):
+                return
+            self._adb_cache.update(values)
+            try:
+                os.makedirs(os.path.dirname(self.ADB_CACHE_FILE), exist_ok=True)
+                with open(self.ADB_CACHE_FILE, 'wb') as f:
+                    f.write(json_compat.dumps(self._adb_cache))
+            except Exception as e:
+                print(f"[ADB] 保存缓存失败: {e}")
+
+    def _find_adb(self, full_scan: bool = False) -> Optional[str]:
+        """
+        查找ADB可执行文件
+
+        Args:
+            full_scan: 是否允许全盘搜索（耗时很长，只在用户主动操作时开启）
+        """
+        adb_path = self._search_adb(full_scan)
+        # 只缓存具体文件路径，系统PATH中的adb每次检查代价很小
+        if adb_path and os.path.isabs(adb_path):
+            self._save_adb_cache(adb_path=adb_path)
+        return adb_path
+
+    def _search_adb(self, full_scan: bool) -> Optional[str]:
+        """按优先级查找ADB"""
         # 0. 优先使用内置ADB
         builtin_adb = self._get_builtin_adb_path()
         if builtin_adb:
@@ -69,28 +200,35 @@ class ScreenshotManager:
                 ['adb', 'version'],
                 capture_output=True,
                 text=True,
-                timeout=5
+                timeout=5,
+                **_subprocess_kwargs()
             )
             if result.returncode == 0:
                 return 'adb'
         except:
             pass
 
-        # 2. 查找雷电模拟器自带的adb
+        # 2. 查找雷电模拟器自带的adb（每个安装目录只列一次目录，不逐个路径检查存在）
         for ld_path in self.LD_PLAYER_PATHS:
-            adb_exe = os.path.join(ld_path, "adb.exe")
-            if os.path.exists(adb_exe):
+            entries = _list_dir(ld_path)
+            if not entries:
+                continue
+
+            if "adb.exe" in entries:
+                adb_exe = os.path.join(ld_path, "adb.exe")
                 print(f"[ADB] 找到雷电模拟器ADB: {adb_exe}")
                 return adb_exe
 
             # 也可能在子目录中
-            for adb_sub in ['.', 'bin', 'tools']:
-                adb_exe = os.path.join(ld_path, adb_sub, "adb.exe")
-                if os.path.exists(adb_exe):
+            for adb_sub in ['bin', 'tools']:
+                if adb_sub in entries and "adb.exe" in _list_dir(os.path.join(ld_path, adb_sub)):
+                    adb_exe = os.path.join(ld_path, adb_sub, "adb.exe")
                     print(f"[ADB] 找到雷电模拟器ADB: {adb_exe}")
                     return adb_exe
 
         # 3. 全盘搜索（仅Windows）
+        if not full_scan:
+            return None
         try:
             for drive in ['C:', 'D:', 'E:']:
                 pattern = f"{drive}\\\**\\adb.exe"
@@ -125,14 +263,127 @@ class ScreenshotManager:
                 cmd,
                 capture_output=True,
                 text=not binary,
-                timeout=timeout
+                timeout=timeout,
+                **_subprocess_kwargs()
             )
+            # 服务未启动导致失败时才执行 start-server 并重试一次
+            if result.returncode != 0 and not self._server_started and self._is_daemon_error(result.stderr):
+                self._server_started = True
+                subprocess.run([self.adb_path, 'start-server'], capture_output=True, timeout=timeout,
+                               **_subprocess_kwargs())
+                result = subprocess.run(cmd, capture_output=True, text=not binary, timeout=timeout,
+                                        **_subprocess_kwargs())
             return result.returncode, result.stdout, result.stderr
         except Exception as e:
             return -1, b"" if binary else "", str(e)
 
-    def get_devices(self) -> List[str]:
-        """获取连接的设备列表"""
+    @staticmethod
+    def _is_daemon_error(stderr) -> bool:
+        """判断错误是否由ADB服务未运行引起"""
+        if isinstance(stderr, bytes):
+            stderr = stderr.decode('utf-8', errors='ignore')
+        return 'daemon' in (stderr or '').lower()
+
+    def _open_shell(self, device_id: str) -> bool:
+        """启动（或复用）指定设备的常驻 adb shell 进程，需持有 _shell_lock"""
+        if self._shell and self._shell.poll() is None and self._shell_device == device_id:
+            return True
+
+        self._close_shell()
+        try:
+            self._shell = subprocess.Popen(
+                [self.adb_path, '-s', device_id, 'shell'],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                bufsize=0,
+                **_subprocess_kwargs()
+            )
+        except Exception as e:
+            print(f"[ADB] 启动shell失败: {e}")
+            self._shell = None
+            return False
+
+        self._shell_device = device_id
+        # 后台线程逐行读取输出，便于带超时等待结束标记
+        self._shell_lines = queue.Queue()
+        threading.Thread(
+            target=self._read_shell_output,
+            args=(self._shell.stdout, self._shell_lines),
+            daemon=True
+        ).start()
+        return True
+
+    @staticmethod
+    def _read_shell_output(stream, lines: queue.Queue):
+        """读取shell输出直到进程结束"""
+        for line in iter(stream.readline, b''):
+            lines.put(line)
+        lines.put(None)
+
+    def _shell_run(self, device_id: str, command: str, timeout: int = 10) -> Optional[tuple]:
+        """
+        在常驻shell中执行命令
+
+        Returns:
+            (returncode, 输出文本)，shell不可用或超时返回None
+        """
+        with self._shell_lock:
+            if not self._open_shell(device_id):
+                return None
+            try:
+                self._shell.stdin.write(f"{command}; echo {self.SHELL_SENTINEL}$?\n".encode('utf-8'))
+                self._shell.stdin.flush()
+            except Exception as e:
+                print(f"[ADB] shell写入失败: {e}")
+                self._close_shell()
+                return None
+
+            output = []
+            deadline = time.time() + timeout
+            while True:
+                try:
+                    line = self._shell_lines.get(timeout=max(0.0, deadline - time.time()))
+                except queue.Empty:
+                    print("[ADB] shell命令超时")
+                    self._close_shell()
+                    return None
+                if line is None:
+                    # shell进程已退出
+                    self._close_shell()
+                    return None
+                text = line.decode('utf-8', errors='ignore').rstrip('\r\n')
+                if text.startswith(self.SHELL_SENTINEL):
+                    code = text[len(self.SHELL_SENTINEL):]
+                    return (int(code) if code.isdigit() else -1), '\n'.join(output)
+                output.append(text)
+
+    def _close_shell(self):
+        """结束常驻shell进程"""
+        if self._shell:
+            try:
+                self._shell.stdin.close()
+                self._shell.kill()
+                self._shell.wait(timeout=2)
+            except Exception:
+                pass
+        self._shell = None
+        self._shell_device = None
+        self._shell_lines = None
+
+    def close(self):
+        """释放常驻ADB进程"""
+        with self._shell_lock:
+            self._close_shell()
+        self._pool.shutdown(wait=False)
+
+    def get_devices(self, use_cache: bool = True) -> List[str]:
+        """获取连接的设备列表（结果缓存 DEVICE_CACHE_TTL 秒）"""
+        if use_cache and self._devices_cache is not None:
+            cached_at, cached = self._devices_cache
+            if time.monotonic() - cached_at < self.DEVICE_CACHE_TTL:
+                return list(cached)
+
         returncode, stdout, stderr = self._run_adb(['devices'])
 
         if returncode != 0:
@@ -149,6 +400,8 @@ class ScreenshotManager:
                 if status == 'device':
                     devices.append(device_id)
 
+        # 空列表也缓存（没有设备时 devices/connect/devices 不再重复启动进程），连接成功时会清除
+        self._devices_cache = (time.monotonic(), list(devices))
         return devices
 
     def connect_device(self, host: str = "127.0.0.1", port: int = 5555) -> bool:
@@ -171,6 +424,9 @@ class ScreenshotManager:
         stdout_str = stdout or ""
         success = returncode == 0 and ('connected' in stdout_str.lower() or 'already connected' in stdout_str.lower())
         if success:
+            self._devices_cache = None
+            if host == "127.0.0.1":
+                self._save_adb_cache(ld_port=port)
             print(f"[ADB] 连接成功: {host}:{port}")
         else:
             print(f"[ADB] 连接失败: {stderr or stdout}")
@@ -187,17 +443,21 @@ class ScreenshotManager:
         try:
             print("[ADB] 尝试连接雷电模拟器...")
 
-            # 尝试常见端口
-            for port in self.LD_PORTS:
-                if self.connect_device("127.0.0.1", port):
-                    return True
+            # 先尝试上次连接成功的端口，再尝试常见端口
+            cached_port = self._adb_cache.get('ld_port')
+            if cached_port and self.connect_device("127.0.0.1", cached_port):
+                return True
+
+            ports = [port for port in self.LD_PORTS if port != cached_port]
+            if self._connect_any(ports):
+                return True
 
             # 如果都不行，尝试从模拟器配置文件中读取端口
             ld_ports = self._get_ld_player_ports_from_config()
-            for port in ld_ports:
-                if port not in self.LD_PORTS:
-                    if self.connect_device("127.0.0.1", port):
-                        return True
+            extra_ports = [port for port in dict.fromkeys(ld_ports)
+                           if port not in self.LD_PORTS and port != cached_port]
+            if self._connect_any(extra_ports):
+                return True
 
             print("[ADB] 无法连接到雷电模拟器，请检查:")
             print("  1. 雷电模拟器是否已启动")
@@ -209,31 +469,51 @@ class ScreenshotManager:
             print(f"[ADB] 连接雷电模拟器异常: {e}")
             return False
 
+    def _connect_any(self, ports: List[int], host: str = "127.0.0.1") -> bool:
+        """
+        依次连接多个端口，任一成功即返回
+
+        先并行检查哪些端口在监听（最坏耗时为一次连接超时而非逐个累加），
+        只对在监听的端口按顺序执行adb connect，不会连上多余的模拟器实例
+        """
+        if not ports:
+            return False
+
+        reachable = list(self._pool.map(lambda port: _port_open(host, port), ports))
+        for port, is_open in zip(ports, reachable):
+            if is_open and self.connect_device(host, port):
+                return True
+        return False
+
     def _get_ld_player_ports_from_config(self) -> List[int]:
         """从雷电模拟器配置文件中读取端口"""
         ports = []
 
         for ld_path in self.LD_PLAYER_PATHS:
-            # 查找配置文件
+            # 查找配置文件（按目录列出文件名，不逐个检查存在）
+            if "vms" not in _list_dir(ld_path):
+                continue
+            vms_dir = os.path.join(ld_path, "vms")
+            config_dir = os.path.join(vms_dir, "config")
+            config_entries = _list_dir(config_dir)
             config_paths = [
-                os.path.join(ld_path, "vms", "config", "leidian0.config"),
-                os.path.join(ld_path, "vms", "config", "leidian1.config"),
-                os.path.join(ld_path, "vms", "leidian0", "leidian0.config"),
+                os.path.join(config_dir, name)
+                for name in ("leidian0.config", "leidian1.config") if name in config_entries
             ]
+            if "leidian0.config" in _list_dir(os.path.join(vms_dir, "leidian0")):
+                config_paths.append(os.path.join(vms_dir, "leidian0", "leidian0.config"))
 
             for config_path in config_paths:
-                if os.path.exists(config_path):
-                    try:
-                        with open(config_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                            # 查找adb端口配置
-                            if 'adb_port' in content:
-                                import re
-                                matches = re.findall(r'adb_port[=:]\s*(\d+)', content)
-                                for match in matches:
-                                    ports.append(int(match))
-                    except Exception as e:
-                        print(f"[ADB] 读取配置失败: {e}")
+                try:
+                    # 二进制映射文件直接扫描，不读入内存再解码
+                    with open(config_path, 'rb') as f, \
+                            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        ports.extend(int(match) for match in _ADB_PORT_RE.findall(mm))
+                except ValueError:
+                    # 空文件无法映射
+                    pass
+                except Exception as e:
+                    print(f"[ADB] 读取配置失败: {e}")
 
         return ports
 
@@ -265,8 +545,68 @@ class ScreenshotManager:
 
         print(f"[ADB] 截图设备: {device_id}")
 
+        image = self._capture_image(device_id)
+        if image is None:
+            return None
+
+        pixmap = QPixmap.fromImage(image)
+        if pixmap.isNull():
+            print("[ADB] 截图加载失败")
+            return None
+
+        print(f"[ADB] 截图成功: {pixmap.width()}x{pixmap.height()}")
+        return pixmap
+
+    def capture_all(self, devices: Optional[List[str]] = None, timeout: float = 15) -> Dict[str, QPixmap]:
+        """
+        同时截取多个设备（各设备的adb传输互不影响，并行执行）
+
+        Args:
+            devices: 设备ID列表，None则使用所有已连接设备
+            timeout: 总等待时间（秒）
+
+        Returns:
+            {设备ID: QPixmap}，失败或超时的设备不包含在内
+        """
+        if not self.adb_available:
+            print("[ADB] ADB不可用")
+            return {}
+
+        if devices is None:
+            devices = self.get_devices()
+
+        # 工作线程只产出QImage，QPixmap必须在GUI线程创建
+        futures = [(device, self._pool.submit(self._capture_image, device)) for device in devices]
+        done, _ = wait([future for _, future in futures], timeout=timeout)
+
+        results = {}
+        for device, future in futures:
+            if future not in done:
+                print(f"[ADB] 截图超时: {device}")
+                continue
+            image = future.result()
+            if image is not None:
+                pixmap = QPixmap.fromImage(image)
+                if not pixmap.isNull():
+                    results[device] = pixmap
+        return results
+
+    def _capture_image(self, device_id: str) -> Optional[QImage]:
+        """
+        截取指定设备，返回QImage（可在工作线程中调用）
+        """
         try:
-            # 构建命令
+            # 优先用 exec-out 读取原始帧，省去设备端PNG编码、本机解码和临时文件
+            image = self._capture_raw(device_id)
+            if image is not None:
+                return image
+
+            # 旧设备不支持 exec-out 时，在常驻shell中截图到设备文件再pull（不必每帧启动shell进程，pull为二进制传输）
+            image = self._capture_pull(device_id)
+            if image is not None:
+                return image
+
+            # 回退：一次性执行 screencap 并从stdout读取
             args = ['-s', device_id, 'shell', 'screencap', '-p']
 
             # 执行截图（使用二进制模式）
@@ -274,44 +614,134 @@ class ScreenshotManager:
 
             if returncode != 0:
                 print(f"[ADB] 截图失败: {stderr}")
+                self._devices_cache = None
                 return None
 
             if not stdout:
                 print("[ADB] 截图返回空数据")
                 return None
 
-            # 保存临时文件
-            timestamp = int(time.time())
-            temp_path = os.path.join(self.temp_dir, f'adb_screenshot_{timestamp}.png')
+            # 旧版ADB经过终端时会把\n替换为\r\n，PNG文件头不完整时才需要还原（文件头本身含\r\n）
+            data = stdout
+            if not data.startswith(b'\x89PNG\r\n\x1a\n'):
+                data = data.replace(b'\r\n', b'\n')
+
+            # 直接从内存解码，不写临时文件
+            image = QImage()
+            if not image.loadFromData(data, 'PNG'):
+                print("[ADB] 截图加载失败")
+                return None
+
+            return image
+
+        except Exception as e:
+            print(f"[ADB] 截图异常: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+
+    def _capture_pull(self, device_id: str) -> Optional[QImage]:
+        """在常驻shell中截图到设备文件，再用adb pull取回（pull只能写文件）"""
+        shell_result = self._shell_run(device_id, f"screencap -p {self.REMOTE_SCREENSHOT}", timeout=15)
+        if not shell_result or shell_result[0] != 0:
+            return None
 
-            # ADB输出可能有Windows换行符问题，需要处理
-            data = stdout.replace(b'\r\n', b'\n')
+        timestamp = int(time.time())
+        temp_path = os.path.join(self.temp_dir, f'adb_screenshot_{device_id.replace(":", "_")}_{timestamp}.png')
+        returncode, _, _ = self._run_adb(['-s', device_id, 'pull', self.REMOTE_SCREENSHOT, temp_path], timeout=15)
+        if returncode != 0 or not os.path.exists(temp_path):
+            return None
 
-            with open(temp_path, 'wb') as f:
-                f.write(data)
+        # 加载图片
+        image = QImage(temp_path)
 
-            # 加载图片
-            pixmap = QPixmap(temp_path)
+        # 清理临时文件
+        try:
+            os.remove(temp_path)
+        except:
+            pass
 
-            # 清理临时文件
+        return None if image.isNull() else image
+
+    def _capture_raw(self, device_id: str) -> Optional[QImage]:
+        """
+        获取原始帧（不经过PNG）
+
+        默认用 adb exec-out screencap；帧数据超过 RAW_PULL_THRESHOLD 的设备
+        之后改为设备端写文件再 adb pull（块传输，大数据量时更快），失败再回退 exec-out。
+
+        Returns:
+            QImage对象，不支持或数据异常时返回None
+        """
+        if self._prefer_pull.get(device_id):
+            data = self._pull_raw(device_id)
+            if data:
+                image = self._decode_raw(data)
+                if image is not None:
+                    return image
+
+        returncode, stdout, stderr = self._run_adb(['-s', device_id, 'exec-out', 'screencap'],
+                                                   timeout=15, binary=True)
+        if returncode != 0 or not stdout:
+            return None
+
+        # 按首次截图的数据量决定之后的传输方式
+        if len(stdout) >= self.RAW_PULL_THRESHOLD:
+            self._prefer_pull[device_id] = True
+
+        return self._decode_raw(stdout)
+
+    def _pull_raw(self, device_id: str) -> Optional[bytes]:
+        """在常驻shell中截取原始帧到设备文件，再pull到本地读取（adb pull只能写文件）"""
+        shell_result = self._shell_run(device_id, f"screencap {self.REMOTE_RAW_SCREENSHOT}", timeout=15)
+        if not shell_result or shell_result[0] != 0:
+            return None
+
+        temp_path = os.path.join(self.temp_dir, f'adb_screenshot_{device_id.replace(":", "_")}.raw')
+        returncode, _, _ = self._run_adb(['-s', device_id, 'pull', self.REMOTE_RAW_SCREENSHOT, temp_path],
+                                         timeout=30)
+        if returncode != 0:
+            return None
+
+        try:
+            with open(temp_path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+        finally:
             try:
                 os.remove(temp_path)
-            except:
+            except OSError:
                 pass
 
-            if pixmap.isNull():
-                print("[ADB] 截图加载失败")
-                return None
+    def _decode_raw(self, raw: bytes) -> Optional[QImage]:
+        """
+        解析screencap原始帧
 
-            print(f"[ADB] 截图成功: {pixmap.width()}x{pixmap.height()}")
-            return pixmap
+        原始帧格式：头部(宽, 高, 像素格式[, 色彩空间])，每项4字节小端，后接像素数据。
+        Android 9之前头部为12字节，之后为16字节，按数据长度判断。
+        """
+        if len(raw) < 12:
+            return None
 
-        except Exception as e:
-            print(f"[ADB] 截图异常: {e}")
-            import traceback
-            traceback.print_exc()
+        width, height, pixel_format = struct.unpack_from('<III', raw, 0)
+        image_format = self.RAW_FORMATS.get(pixel_format)
+        if image_format is None or width == 0 or height == 0:
+            print(f"[ADB] 不支持的原始帧格式: {pixel_format}")
             return None
 
+        pixel_bytes = width * height * 4
+        header_size = len(raw) - pixel_bytes
+        if header_size not in (12, 16):
+            print("[ADB] 原始帧数据长度异常")
+            return None
+
+        # QImage只引用缓冲区；转换为RGB32得到独立的拷贝，也是QPixmap和cv2转换最快的格式
+        data = memoryview(raw)[header_size:]
+        image = QImage(data, width, height, width * 4, image_format)
+        image = image.convertToFormat(QImage.Format_RGB32)
+        return None if image.isNull() else image
+
     def capture_pc_screen(self) -> Optional[QPixmap]:
         """
         截取PC屏幕（需要PyQt5的grabWindow）
@@ -377,6 +807,7 @@ class ScreenshotManager:
             print(f"[LD] 截图雷电模拟器实例 {index}")
 
             if not self.adb_available:
+                # 只做快速查找（内置、PATH、雷电安装目录）；全盘搜索需用户通过rescan()主动触发
                 print("[LD] ADB不可用，尝试自动查找...")
                 self.adb_path = self._find_adb()
                 self.adb_available = self.adb_path is not None
@@ -411,6 +842,22 @@ class ScreenshotManager:
             traceback.print_exc()
             return None
 
+    def rescan(self) -> bool:
+        """
+        重新查找ADB（包含全盘搜索，耗时可能很长，只在用户主动要求时调用）
+
+        清除缓存的ADB路径后重新查找
+
+        Returns:
+            是否找到ADB
+        """
+        self._save_adb_cache(adb_path=None)
+        self.adb_path = self._find_adb(full_scan=True)
+        self.adb_available = self.adb_path is not None
+        self._devices_cache = None
+        print(f"[ADB] 重新查找结果: {self.adb_path}")
+        return self.adb_available
+
     def get_ld_player_devices(self) -> List[str]:
         """获取雷电模拟器设备列表"""
         all_devices = self.get_devices()
@@ -8,8 +8,9 @@
 import cv2
 import numpy as np
 from typing import Optional, Tuple, List
-from PyQt5.QtGui import QPixmap, QImage
+from PyQt5.QtGui import QPixmap
 from ..models.roi import ROI
+from ..utils.image_convert import qpixmap_to_cv2
 
 
 class SmartSegmenter:
@@ -18,6 +19,16 @@ class SmartSegmenter:
     def __init__(self):
         self.iterations = 5  # GrabCut迭代次数
 
+        # 大图先缩小再运行GrabCut，掩码放大回原尺寸（1.0表示不缩放）
+        self.grabcut_scale = 0.5
+        # 长边超过该值时才缩放
+        self.grabcut_scale_min_size = 1000
+
+        # GrabCut的掩码和模型缓冲区，连续点击时复用
+        self._mask_buf = None
+        self._bgd_model = np.zeros((1, 65), np.float64)
+        self._fgd_model = np.zeros((1, 65), np.float64)
+
     def segment_at_point(self, pixmap: QPixmap, x: int, y: int,
                         expansion: int = 50) -> Optional[Tuple[ROI, np.ndarray]]:
         """
@@ -43,89 +54,116 @@ class SmartSegmenter:
         x = max(0, min(x, w - 1))
         y = max(0, min(y, h - 1))
 
-        # 创建初始掩码
-        mask = np.zeros((h, w), np.uint8)
+        # GrabCut耗时与像素数成正比，大图在缩小的图像上运行
+        scale = self.grabcut_scale if max(h, w) > self.grabcut_scale_min_size else 1.0
+        if scale < 1.0:
+            small_w, small_h = max(1, int(w * scale)), max(1, int(h * scale))
+            gc_img = cv2.resize(img, (small_w, small_h), interpolation=cv2.INTER_AREA)
+        else:
+            small_w, small_h = w, h
+            gc_img = img
+        sx = min(int(x * scale), small_w - 1)
+        sy = min(int(y * scale), small_h - 1)
+        s_expansion = max(1, int(expansion * scale))
+
+        # 初始掩码复用上次的缓冲区（GC_INIT_WITH_RECT会整体重写掩码，无需清零）
+        if self._mask_buf is None or self._mask_buf.shape != (small_h, small_w):
+            self._mask_buf = np.zeros((small_h, small_w), np.uint8)
+        mask = self._mask_buf
 
         # 定义矩形区域（以点击点为中心）
-        rect_x = max(0, x - expansion)
-        rect_y = max(0, y - expansion)
-        rect_w = min(w - rect_x, expansion * 2)
-        rect_h = min(h - rect_y, expansion * 2)
+        rect_x = max(0, sx - s_expansion)
+        rect_y = max(0, sy - s_expansion)
+        rect_w = min(small_w - rect_x, s_expansion * 2)
+        rect_h = min(small_h - rect_y, s_expansion * 2)
         rect = (rect_x, rect_y, rect_w, rect_h)
 
-        # 背景模型和前景模型
-        bgd_model = np.zeros((1, 65), np.float64)
-        fgd_model = np.zeros((1, 65), np.float64)
+        # 背景模型和前景模型（GC_INIT_WITH_RECT会重新初始化，直接复用）
+        bgd_model = self._bgd_model
+        fgd_model = self._fgd_model
 
         try:
             # 运行GrabCut
-            cv2.grabCut(img, mask, rect, bgd_model, fgd_model,
+            cv2.grabCut(gc_img, mask, rect, bgd_model, fgd_model,
                        self.iterations, cv2.GC_INIT_WITH_RECT)
 
-            # 创建最终掩码：0和2是背景，1和3是前景
-            mask2 = np.where((mask == 2) | (mask == 0), 0, 1).astype('uint8')
+            return self._extract_region(mask, x, y, w, h, scale)
 
-            # 找到前景区域的轮廓
-            contours, _ = cv2.findContours(mask2 * 255, cv2.RETR_EXTERNAL,
-                                          cv2.CHAIN_APPROX_SIMPLE)
-
-            if not contours:
-                return None
+        except Exception as e:
+            print(f"GrabCut failed: {e}")
+            return None
 
-            # 找到包含点击点的轮廓
-            best_contour = None
-            best_area = 0
-
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                if area < 100:  # 过滤太小的
-                    continue
-
-                # 检查点击点是否在这个轮廓内
-                if cv2.pointPolygonTest(contour, (x, y), False) >= 0:
-                    if area > best_area:
-                        best_area = area
-                        best_contour = contour
-
-            # 如果没有轮廓包含点击点，选择离点击点最近的
-            if best_contour is None:
-                min_dist = float('inf')
-                for contour in contours:
-                    area = cv2.contourArea(contour)
-                    if area < 100:
-                        continue
-                    # 计算轮廓中心到点击点的距离
-                    M = cv2.moments(contour)
-                    if M["m00"] != 0:
-                        cx = int(M["m10"] / M["m00"])
-                        cy = int(M["m01"] / M["m00"])
-                        dist = np.sqrt((x - cx)**2 + (y - cy)**2)
-                        if dist < min_dist:
-                            min_dist = dist
-                            best_contour = contour
-
-            if best_contour is None:
-                return None
+    def _extract_region(self, mask: np.ndarray, x: int, y: int, w: int, h: int,
+                        scale: float) -> Optional[Tuple[ROI, np.ndarray]]:
+        """
+        从GrabCut掩码中选出包含点击点（或离点击点最近）的前景区域
 
-            # 获取边界框
-            bx, by, bw, bh = cv2.boundingRect(best_contour)
+        Returns:
+            (ROI, mask) 或 None
+        """
+        # 创建最终掩码：0和2是背景，1和3是前景，即最低位为1（单次按位与，不产生int64临时数组）
+        mask2 = cv2.bitwise_and(mask, 1)
 
-            # 创建ROI
-            roi = ROI(x=bx, y=by, width=bw, height=bh)
-            roi.name = "segmented"
-            roi.is_segmented = True
-            roi.contour = best_contour
+        # 放大回原图尺寸，之后的轮廓和边界框都在原图坐标下计算
+        if scale < 1.0:
+            mask2 = cv2.resize(mask2, (w, h), interpolation=cv2.INTER_NEAREST)
 
-            # 创建精细掩码（只保留选中的轮廓）
-            final_mask = np.zeros((h, w), dtype=np.uint8)
-            cv2.drawContours(final_mask, [best_contour], -1, 255, -1)
+        # 找到前景区域的轮廓（findContours把非零像素都当作前景，无需再乘255）
+        contours, _ = cv2.findContours(mask2, cv2.RETR_EXTERNAL,
+                                      cv2.CHAIN_APPROX_SIMPLE)
 
-            return roi, final_mask
+        # 面积只计算一次，过滤太小的
+        candidates = []
+        for contour in contours:
+            area = cv2.contourArea(contour)
+            if area >= 100:
+                candidates.append((contour, area))
 
-        except Exception as e:
-            print(f"GrabCut failed: {e}")
+        if not candidates:
             return None
 
+        # 找到包含点击点的轮廓：先用边界框排除，再做多边形测试
+        best_contour = None
+        best_area = 0
+
+        for contour, area in candidates:
+            if area <= best_area:
+                continue
+            cx, cy, cw, ch = cv2.boundingRect(contour)
+            if not (cx <= x < cx + cw and cy <= y < cy + ch):
+                continue
+            if cv2.pointPolygonTest(contour, (x, y), False) >= 0:
+                best_area = area
+                best_contour = contour
+
+        # 如果没有轮廓包含点击点，选择中心离点击点最近的
+        if best_contour is None:
+            centers = []
+            for contour, _ in candidates:
+                M = cv2.moments(contour)
+                if M["m00"] != 0:
+                    centers.append((int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"]), contour))
+            if not centers:
+                return None
+            center_arr = np.array([(cx, cy) for cx, cy, _ in centers], dtype=np.float64)
+            dist = np.hypot(center_arr[:, 0] - x, center_arr[:, 1] - y)
+            best_contour = centers[int(np.argmin(dist))][2]
+
+        # 获取边界框
+        bx, by, bw, bh = cv2.boundingRect(best_contour)
+
+        # 创建ROI
+        roi = ROI(x=bx, y=by, width=bw, height=bh)
+        roi.name = "segmented"
+        roi.is_segmented = True
+        roi.contour = best_contour
+
+        # 创建精细掩码（只保留选中的轮廓）
+        final_mask = np.zeros((h, w), dtype=np.uint8)
+        cv2.drawContours(final_mask, [best_contour], -1, 255, -1)
+
+        return roi, final_mask
+
     def segment_with_refinement(self, pixmap: QPixmap, x: int, y: int,
                                 expansion: int = 80) -> Optional[Tuple[ROI, np.ndarray]]:
         """
@@ -138,20 +176,27 @@ class SmartSegmenter:
 
         roi, mask = result
 
+        # 掩码只在ROI内非零，各步影响范围不超过几个像素，只处理ROI加边距的区域，结果与整图处理相同
+        h, w = mask.shape[:2]
+        margin = 8
+        x1, y1 = max(0, roi.x - margin), max(0, roi.y - margin)
+        x2, y2 = min(w, roi.right + margin), min(h, roi.bottom + margin)
+        band = mask[y1:y2, x1:x2]
+
         # 形态学优化
         kernel = np.ones((5, 5), np.uint8)
 
         # 开运算去除小噪点
-        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=1)
+        band = cv2.morphologyEx(band, cv2.MORPH_OPEN, kernel, iterations=1)
 
         # 闭运算填充小孔
-        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=1)
+        band = cv2.morphologyEx(band, cv2.MORPH_CLOSE, kernel, dst=band, iterations=1)
 
         # 高斯模糊平滑边缘
-        mask = cv2.GaussianBlur(mask, (5, 5), 0)
+        band = cv2.GaussianBlur(band, (5, 5), 0, dst=band)
 
-        # 重新二值化
-        _, mask = cv2.threshold(mask, 127, 255, cv2.THRESH_BINARY)
+        # 重新二值化（写回掩码）
+        _, mask[y1:y2, x1:x2] = cv2.threshold(band, 127, 255, cv2.THRESH_BINARY)
 
         return roi, mask
 
@@ -186,19 +231,4 @@ class SmartSegmenter:
 
     def _qpixmap_to_cv2(self, pixmap: QPixmap) -> Optional[np.ndarray]:
         """QPixmap转OpenCV格式"""
-        if pixmap.isNull():
-            return None
-
-        image = pixmap.toImage()
-        if image.format() != QImage.Format_RGB888:
-            image = image.convertToFormat(QImage.Format_RGB888)
-
-        width = image.width()
-        height = image.height()
-        ptr = image.bits()
-        ptr.setsize(image.byteCount())
-
-        arr = np.array(ptr).reshape(height, width, 3)
-        arr = cv2.cvtColor(arr, cv2.COLOR_RGB2BGR)
-
-        return arr
+        return qpixmap_to_cv2(pixmap)
@@ -6,72 +6,336 @@
 
 import cv2
 import numpy as np
-from typing import List, Tuple, Optional, Set
-from dataclasses import dataclass
+from typing import Dict, List, Tuple, Optional, Set
+from dataclasses import dataclass, field
 from PyQt5.QtGui import QPixmap
 from ..models.roi import ROI
+from ..utils.image_convert import qpixmap_to_cv2
+
+# 可选：Numba加速自动合并的两两比较（未安装时使用NumPy实现）
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# 可选：cuCIM在GPU上做SLIC（需要cupy、cucim和CUDA设备），只在导入时检查一次
+try:
+    import cupy as cp
+    from cucim.skimage.segmentation import slic as cu_slic
+except ImportError:
+    cp = None
+    cu_slic = None
+else:
+    if not cp.cuda.is_available():
+        cu_slic = None
+
+
+def _cpu_has_avx2() -> bool:
+    """CPU是否支持AVX2（fast-slic的AVX2实现在不支持的CPU上会直接崩溃）"""
+    try:
+        try:
+            from numpy._core._multiarray_umath import __cpu_features__
+        except ImportError:
+            from numpy.core._multiarray_umath import __cpu_features__
+        return bool(__cpu_features__.get('AVX2'))
+    except Exception:
+        return False
 
 
 @dataclass
 class SuperpixelRegion:
     """超像素区域"""
     label: int
-    mask: np.ndarray  # 二值mask
-    contour: np.ndarray  # 轮廓
     bbox: Tuple[int, int, int, int]  # x, y, w, h
-    area: int
-    center: Tuple[int, int]  # 中心点
+    area: int  # 像素数
+    center: Tuple[int, int]  # 中心点（像素质心）
     avg_color: Tuple[float, float, float]  # 平均颜色
+    labels: Optional[np.ndarray] = field(default=None, repr=False, compare=False)  # 所属的整图标签图
+    _contour: Optional[np.ndarray] = field(default=None, repr=False, compare=False)
+
+    @property
+    def mask(self) -> np.ndarray:
+        """bbox范围内的二值mask（按需从标签图生成，不为每个区域常驻保存）"""
+        x, y, w, h = self.bbox
+        return _label_mask(self.labels[y:y + h, x:x + w], self.label)
+
+    @property
+    def full_mask(self) -> np.ndarray:
+        """整图大小的二值mask"""
+        return _label_mask(self.labels, self.label)
+
+    def paint_mask(self, target: np.ndarray, offset: Tuple[int, int] = (0, 0)):
+        """把区域的mask按bbox或(置255)到target上，offset为target左上角在原图中的坐标"""
+        x, y, w, h = self.bbox
+        x -= offset[0]
+        y -= offset[1]
+        window = target[y:y + h, x:x + w]
+        np.bitwise_or(window, self.mask, out=window)
+
+    @property
+    def contour(self) -> Optional[np.ndarray]:
+        """轮廓（首次访问时在边界框内提取并缓存）"""
+        if self._contour is None and self.labels is not None:
+            self._contour = _label_contour(self.labels, self.label, self.bbox)
+        return self._contour
+
+
+def _label_mask(labels: np.ndarray, label: int) -> np.ndarray:
+    """标签等于label的像素为255，其余为0（int32标签图用cv2.compare直接生成uint8，不经过bool中间数组）"""
+    if labels.dtype == np.int32:
+        return cv2.compare(labels, float(label), cv2.CMP_EQ)
+    return (labels == label).astype(np.uint8) * 255
+
+
+def _label_stats(labels: np.ndarray):
+    """
+    一次排序求出每个标签的边界框、像素数和质心
+
+    Returns:
+        (标签值, x, y, w, h, 面积, 质心x, 质心y)，均为按标签升序排列的一维数组
+    """
+    h, w = labels.shape
+    flat = labels.ravel()
+    order = np.argsort(flat, kind='stable')
+    sorted_labels = flat[order]
+    starts = np.flatnonzero(np.r_[True, sorted_labels[1:] != sorted_labels[:-1]])
+    counts = np.diff(np.r_[starts, flat.size])
+
+    ys, xs = np.divmod(order, w)
+    x_min = np.minimum.reduceat(xs, starts)
+    y_min = np.minimum.reduceat(ys, starts)
+    x_max = np.maximum.reduceat(xs, starts)
+    y_max = np.maximum.reduceat(ys, starts)
+    cx = np.add.reduceat(xs, starts) // counts
+    cy = np.add.reduceat(ys, starts) // counts
+    return (sorted_labels[starts], x_min, y_min, x_max - x_min + 1, y_max - y_min + 1,
+            counts, cx, cy)
+
+
+def _label_contour(labels: np.ndarray, label: int, bbox: Tuple[int, int, int, int],
+                   approx: int = cv2.CHAIN_APPROX_SIMPLE) -> Optional[np.ndarray]:
+    """在标签的边界框内提取最大外轮廓（坐标为原图坐标）"""
+    bx, by, bw, bh = bbox
+    # 四周补一圈0，轮廓不会贴着边界截断
+    padded = np.zeros((bh + 2, bw + 2), dtype=np.uint8)
+    # 比较结果直接写进padded内部（值为1，findContours只看非零）
+    np.equal(labels[by:by + bh, bx:bx + bw], label, out=padded[1:-1, 1:-1].view(np.bool_))
+
+    contours, _ = cv2.findContours(padded, cv2.RETR_EXTERNAL, approx,
+                                   offset=(bx - 1, by - 1))
+    if not contours:
+        return None
+    return max(contours, key=cv2.contourArea)
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _merge_groups_numba(colors, centers, sizes, small, thr_sq, group):
+        """按顺序贪心分组：每个未合并的小区域吸收其后颜色相近且相邻的区域"""
+        n = colors.shape[0]
+        merged = np.zeros(n, np.bool_)
+        for i in range(n):
+            if merged[i] or not small[i]:
+                continue
+            merged[i] = True
+            for j in range(i + 1, n):
+                if merged[j]:
+                    continue
+                d0 = colors[i, 0] - colors[j, 0]
+                d1 = colors[i, 1] - colors[j, 1]
+                d2 = colors[i, 2] - colors[j, 2]
+                if d0 * d0 + d1 * d1 + d2 * d2 >= thr_sq:
+                    continue
+                dx = centers[i, 0] - centers[j, 0]
+                dy = centers[i, 1] - centers[j, 1]
+                reach = sizes[i] + sizes[j]
+                if dx * dx + dy * dy < reach * reach:
+                    group[j] = i
+                    merged[j] = True
+else:
+    _merge_groups_numba = None
+
+
+def _merge_groups(colors: np.ndarray, centers: np.ndarray, sizes: np.ndarray,
+                  small: np.ndarray, color_threshold: float) -> np.ndarray:
+    """
+    计算自动合并的分组
+
+    Returns:
+        每个区域被并入的首区域下标，未被并入为-1
+    """
+    n = len(colors)
+    group = np.full(n, -1, np.int64)
+    thr_sq = float(color_threshold) * float(color_threshold)
+
+    if _merge_groups_numba is not None:
+        _merge_groups_numba(colors, centers, sizes, small, thr_sq, group)
+        return group
+
+    # 距离都用平方比较，内层循环按j整体向量化
+    merged = np.zeros(n, bool)
+    for i in range(n):
+        if merged[i] or not small[i]:
+            continue
+        merged[i] = True
+        diff = colors[i + 1:] - colors[i]
+        color_sq = np.einsum('ij,ij->i', diff, diff)
+        delta = centers[i + 1:] - centers[i]
+        dist_sq = np.einsum('ij,ij->i', delta, delta)
+        reach = sizes[i] + sizes[i + 1:]
+        hit = ~merged[i + 1:] & (color_sq < thr_sq) & (dist_sq < reach * reach)
+        idx = np.flatnonzero(hit) + i + 1
+        group[idx] = i
+        merged[idx] = True
+    return group
 
 
 class SuperpixelSegmenter:
     """超像素分割器"""
 
-    def __init__(self, region_size: int = 30, ruler: float = 10.0):
+    def __init__(self, region_size: int = 30, ruler: float = 10.0,
+                 max_iter: int = 5, compactness: float = 20.0, algorithm: str = 'slic',
+                 use_gpu: bool = True):
         """
         初始化
 
         Args:
             region_size: 超像素区域大小（像素数）
             ruler: 颜色与空间距离的权衡参数（越大越平滑）
+            max_iter: SLIC迭代次数（UI截图颜色少、边缘锐利，少量迭代即可收敛）
+            compactness: scikit-image SLIC的紧致度
+            algorithm: 'slic'（fast-slic/scikit-image/OpenCV依次回退）、'slico'（OpenCV）或'snic'
+            use_gpu: SLIC是否优先尝试cuCIM（需要cupy、cucim和CUDA设备，不可用时直接跳过）
         """
         self.region_size = region_size
         self.ruler = ruler
+        self.max_iter = max_iter
+        self.compactness = compactness
+        self.algorithm = algorithm
+        self.use_gpu = use_gpu
+        # OpenCV SLICO会按区域自适应紧致度，迭代次数可以更少
+        self.opencv_iterations = 4
         self.slic = None
         self.labels = None
         self.regions: List[SuperpixelRegion] = []
-
-    def segment(self, pixmap: QPixmap) -> List[SuperpixelRegion]:
+        self._by_label: Dict[int, SuperpixelRegion] = {}  # 标签 -> 区域
+        # 与regions顺序一致的区域属性数组（面积、宽高、中心、平均颜色），用于向量化过滤
+        self._arrays = None
+        self._arrays_regions = None
+        # 边界mask缓存：(对应的标签图, mask)，标签图不变时直接复用
+        self._boundary_cache = None
+
+    def segment(self, pixmap, extract_contours: bool = False) -> List[SuperpixelRegion]:
         """
         执行超像素分割
 
+        Args:
+            pixmap: QPixmap或BGR数组（后台线程中只能传数组）
+            extract_contours: 是否立即为所有区域提取轮廓（默认按需提取）
+
         Returns:
             超像素区域列表
         """
-        img = self._qpixmap_to_cv2(pixmap)
+        img = pixmap if isinstance(pixmap, np.ndarray) else self._qpixmap_to_cv2(pixmap)
         if img is None:
             return []
 
-        # 优先使用scikit-image（效果更好），失败时回退到OpenCV
-        try:
-            self.labels = self._segment_skimage(img)
-            print("[Superpixel] 使用 scikit-image SLIC (效果更好)")
-        except Exception as e:
-            print(f"[Superpixel] scikit-image 失败 ({e}), 尝试 OpenCV")
-            self.labels = self._segment_opencv(img)
+        # fast-slic和OpenCV共用同一份Lab图，只转换一次
+        lab_img = cv2.cvtColor(img, cv2.COLOR_BGR2Lab)
+
+        if self.algorithm == 'slico':
+            self.labels = self._segment_opencv(lab_img)
+        elif self.algorithm == 'snic':
+            try:
+                self.labels = self._segment_snic(lab_img)
+                print("[Superpixel] 使用 SNIC")
+            except Exception as e:
+                print(f"[Superpixel] SNIC 不可用 ({e}), 改用 SLIC")
+                self.labels = self._segment_slic(img, lab_img)
+        else:
+            self.labels = self._segment_slic(img, lab_img)
 
         if self.labels is None:
             return []
 
         # 提取每个超像素区域
-        self.regions = self._extract_regions(img, self.labels)
+        self.regions = self._extract_regions(img, self.labels, extract_contours)
+        self._by_label = {r.label: r for r in self.regions}
 
         return self.regions
 
-    def _segment_opencv(self, img: np.ndarray) -> np.ndarray:
-        """使用OpenCV ximgproc进行SLIC分割"""
-        lab_img = cv2.cvtColor(img, cv2.COLOR_BGR2Lab)
+    def _segment_slic(self, img: np.ndarray, lab_img: np.ndarray) -> np.ndarray:
+        """
+        SLIC分割：可用GPU时优先cuCIM，其次fast-slic（最快）、scikit-image（效果更好），最后回退到OpenCV
+        """
+        rgb_float = None
+        if self.use_gpu and cu_slic is not None:
+            try:
+                rgb_float = self._rgb_float(img)
+                labels = self._segment_cucim(rgb_float)
+                print("[Superpixel] 使用 cuCIM SLIC (GPU)")
+                return labels
+            except Exception as e:
+                print(f"[Superpixel] cuCIM 不可用 ({e}), 尝试 fast-slic")
+
+        try:
+            labels = self._segment_fastslic(lab_img)
+            print("[Superpixel] 使用 fast-slic")
+            return labels
+        except Exception as e:
+            print(f"[Superpixel] fast-slic 不可用 ({e}), 尝试 scikit-image")
 
+        try:
+            if rgb_float is None:
+                rgb_float = self._rgb_float(img)
+            labels = self._segment_skimage(rgb_float)
+            print("[Superpixel] 使用 scikit-image SLIC (效果更好)")
+            return labels
+        except Exception as e:
+            print(f"[Superpixel] scikit-image 失败 ({e}), 尝试 OpenCV")
+
+        return self._segment_opencv(lab_img)
+
+    @staticmethod
+    def _rgb_float(img: np.ndarray) -> np.ndarray:
+        """BGR转为归一化到[0, 1]的float RGB（等价于img_as_float）"""
+        rgb_float = cv2.cvtColor(img, cv2.COLOR_BGR2RGB).astype(np.float32)
+        rgb_float *= 1.0 / 255.0
+        return rgb_float
+
+    def _segment_cucim(self, float_img: np.ndarray) -> np.ndarray:
+        """使用cuCIM在GPU上进行SLIC分割（参数与scikit-image路径一致）"""
+        if cu_slic is None:
+            raise RuntimeError("未安装 cupy / cucim 或没有可用的CUDA设备")
+
+        h, w = float_img.shape[:2]
+        n_segments = max((h * w) // (self.region_size ** 2), 10)
+
+        labels = cu_slic(
+            cp.asarray(float_img),
+            n_segments=n_segments,
+            compactness=self.compactness,
+            sigma=0.5,
+            start_label=0,
+            max_num_iter=self.max_iter
+        )
+        return cp.asnumpy(labels).astype(np.int32)
+
+    def _segment_snic(self, lab_img: np.ndarray) -> np.ndarray:
+        """使用SNIC进行分割（非迭代，单次优先队列扫描）"""
+        try:
+            from pysnic.algorithms.snic import snic
+        except ImportError:
+            raise RuntimeError("未安装 pysnic (uv pip install pysnic)")
+
+        h, w = lab_img.shape[:2]
+        num_segments = max((h * w) // (self.region_size ** 2), 10)
+
+        segmentation, _, _ = snic(lab_img.tolist(), num_segments, self.ruler)
+        return np.asarray(segmentation, dtype=np.int32)
+
+    def _segment_opencv(self, lab_img: np.ndarray) -> np.ndarray:
+        """使用OpenCV ximgproc进行SLIC分割（输入为Lab图）"""
         try:
             slic = cv2.ximgproc.createSuperpixelSLIC(
                 lab_img,
@@ -87,31 +351,47 @@ class SuperpixelSegmenter:
                 ruler=self.ruler
             )
 
-        slic.iterate(10)
+        slic.iterate(self.opencv_iterations)
         return slic.getLabels()
 
-    def _segment_skimage(self, img: np.ndarray) -> np.ndarray:
-        """使用scikit-image进行SLIC分割（备选）"""
+    def _segment_fastslic(self, lab_img: np.ndarray) -> np.ndarray:
+        """使用fast-slic进行SLIC分割（SIMD实现，速度最快，输入为Lab图；CPU支持时用AVX2版本）"""
+        try:
+            from fast_slic import Slic
+        except ImportError:
+            raise RuntimeError("未安装 fast-slic (uv pip install fast-slic)")
+        slic_cls = Slic
+        if _cpu_has_avx2():
+            try:
+                from fast_slic.avx2 import SlicAvx2
+                slic_cls = SlicAvx2
+            except ImportError:
+                pass
+
+        h, w = lab_img.shape[:2]
+        num_components = max((h * w) // (self.region_size ** 2), 10)
+
+        slic = slic_cls(num_components=num_components, compactness=int(self.ruler))
+        labels = slic.iterate(lab_img, max_iter=self.max_iter)
+        return labels.astype(np.int32)
+
+    def _segment_skimage(self, float_img: np.ndarray) -> np.ndarray:
+        """使用scikit-image进行SLIC分割（备选，输入为[0, 1]的float RGB图）"""
         try:
             from skimage.segmentation import slic as sk_slic
-            from skimage.util import img_as_float
-
-            # 转换为float并归一化到[0, 1]
-            rgb_img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            float_img = img_as_float(rgb_img)
 
             # 计算n_segments (基于图片大小和region_size)
-            h, w = img.shape[:2]
+            h, w = float_img.shape[:2]
             n_segments = max((h * w) // (self.region_size ** 2), 10)
 
             # 执行SLIC - 优化参数以获得更好的边界保持
             labels = sk_slic(
                 float_img,
                 n_segments=n_segments,
-                compactness=15.0,  # 增加紧致性，区域更均匀
+                compactness=self.compactness,  # 增加紧致性，区域更均匀
                 sigma=0.5,  # 降低平滑，保持更多边界细节
                 start_label=0,
-                max_num_iter=20  # 增加迭代次数，收敛更好
+                max_num_iter=self.max_iter
             )
 
             return labels.astype(np.int32)
@@ -124,69 +404,93 @@ class SuperpixelSegmenter:
                 "  uv pip install opencv-contrib-python"
             )
 
-    def _extract_regions(self, img: np.ndarray, labels: np.ndarray) -> List[SuperpixelRegion]:
-        """从标签图提取超像素区域"""
-        regions = []
-        unique_labels = np.unique(labels)
-
-        for label in unique_labels:
-            if label < 0:  # 跳过无效标签
-                continue
-
-            # 创建mask
-            mask = (labels == label).astype(np.uint8) * 255
-
-            # 找轮廓
-            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            if not contours:
-                continue
+    @staticmethod
+    def _mean_colors(img: np.ndarray, labels: np.ndarray,
+                     label_ids: np.ndarray) -> Optional[np.ndarray]:
+        """
+        用bincount一次求出所有标签的平均颜色
 
-            contour = max(contours, key=cv2.contourArea)
+        Returns:
+            与label_ids一一对应的(N, 3)数组，非彩色图像返回None
+        """
+        if len(img.shape) != 3 or img.shape[2] < 3:
+            return None
 
-            # 边界框
-            x, y, w, h = cv2.boundingRect(contour)
+        flat = labels.ravel()
+        valid = flat >= 0
+        has_invalid = not valid.all()
+        if has_invalid:
+            flat = flat[valid]
+        size = int(label_ids.max()) + 1 if len(label_ids) else 0
+        counts = np.bincount(flat, minlength=size)
+
+        # 处理前3个通道（BGR或RGB）
+        means = np.zeros((size, 3), dtype=np.float64)
+        for c in range(3):
+            channel = img[:, :, c].ravel()
+            if has_invalid:
+                channel = channel[valid]
+            sums = np.bincount(flat, weights=channel, minlength=size)
+            np.divide(sums, counts, out=means[:, c], where=counts > 0)
+
+        return means[np.maximum(label_ids, 0)]
+
+    def _extract_regions(self, img: np.ndarray, labels: np.ndarray,
+                         extract_contours: bool = False,
+                         approx: int = cv2.CHAIN_APPROX_SIMPLE) -> List[SuperpixelRegion]:
+        """
+        从标签图提取超像素区域
 
-            # 面积
-            area = cv2.contourArea(contour)
+        Args:
+            extract_contours: 是否立即提取轮廓（默认在首次访问 region.contour 时再提取）
+            approx: 立即提取时的轮廓近似方式
+        """
+        label_ids, xs, ys, ws, hs, areas, cxs, cys = _label_stats(labels)
+        mean_colors = self._mean_colors(img, labels, label_ids)
+        if mean_colors is None:
+            mean_colors = np.full((len(label_ids), 3), 128.0)
 
-            # 中心点
-            M = cv2.moments(contour)
-            # 检查m00是否有效（大于0且不是NaN/无穷大）
-            m00 = M["m00"]
-            if m00 > 0 and np.isfinite(m00):
-                cx = int(M["m10"] / m00)
-                cy = int(M["m01"] / m00)
-            else:
-                cx, cy = x + w // 2, y + h // 2
-
-            # 平均颜色
-            mask_bool = mask > 0
-            if len(img.shape) == 3 and img.shape[2] >= 3:
-                # 处理前3个通道（BGR或RGB）
-                avg_color = (
-                    float(np.mean(img[:, :, 0][mask_bool])),
-                    float(np.mean(img[:, :, 1][mask_bool])),
-                    float(np.mean(img[:, :, 2][mask_bool]))
-                )
-            else:
-                avg_color = (128.0, 128.0, 128.0)
+        # 跳过无效标签，按面积排序（大到小，面积相同保持标签顺序）
+        keep = np.flatnonzero(label_ids >= 0)
+        order = keep[np.argsort(-areas[keep], kind='stable')]
 
+        regions = []
+        for i in order.tolist():
             region = SuperpixelRegion(
-                label=int(label),
-                mask=mask,
-                contour=contour,
-                bbox=(x, y, w, h),
-                area=int(area),
-                center=(cx, cy),
-                avg_color=avg_color
+                label=int(label_ids[i]),
+                bbox=(int(xs[i]), int(ys[i]), int(ws[i]), int(hs[i])),
+                area=int(areas[i]),
+                center=(int(cxs[i]), int(cys[i])),
+                avg_color=tuple(mean_colors[i].tolist()),
+                labels=labels
             )
+            if extract_contours:
+                region._contour = _label_contour(labels, region.label, region.bbox, approx)
             regions.append(region)
 
-        # 按面积排序（大到小）
-        regions.sort(key=lambda r: r.area, reverse=True)
-
+        self._arrays = (areas[order], np.stack([ws[order], hs[order]], axis=1),
+                        np.stack([cxs[order], cys[order]], axis=1), mean_colors[order])
+        self._arrays_regions = regions
         return regions
 
+    def _region_arrays(self):
+        """
+        获取与self.regions顺序一致的区域属性数组
+
+        Returns:
+            (面积, 宽高, 中心, 平均颜色)，regions被外部替换时按列表重新生成
+        """
+        if self._arrays_regions is not self.regions:
+            regions = self.regions
+            self._arrays = (
+                np.array([r.area for r in regions], dtype=np.int64),
+                np.array([r.bbox[2:] for r in regions], dtype=np.int64).reshape(-1, 2),
+                np.array([r.center for r in regions], dtype=np.int64).reshape(-1, 2),
+                np.array([r.avg_color for r in regions], dtype=np.float64).reshape(-1, 3),
+            )
+            self._arrays_regions = regions
+        return self._arrays
+
     def get_region_at_point(self, x: int, y: int) -> Optional[SuperpixelRegion]:
         """获取指定点所在的超像素区域"""
         if self.labels is None:
@@ -196,11 +500,11 @@ class SuperpixelSegmenter:
         if x < 0 or x >= w or y < 0 or y >= h:
             return None
 
-        label = self.labels[y, x]
-        for region in self.regions:
-            if region.label == label:
-                return region
-        return None
+        return self._by_label.get(int(self.labels[y, x]))
+
+    def get_region(self, label: int) -> Optional[SuperpixelRegion]:
+        """按标签获取超像素区域"""
+        return self._by_label.get(label)
 
     def get_regions_in_rect(self, x1: int, y1: int, x2: int, y2: int) -> List[SuperpixelRegion]:
         """获取矩形框内的所有超像素区域"""
@@ -220,22 +524,21 @@ class SuperpixelSegmenter:
 
         # 获取区域内的所有标签
         region_labels = self.labels[y1:y2, x1:x2]
-        unique_labels = set(np.unique(region_labels))
+        unique_labels = np.unique(region_labels)
 
         # 找到对应的区域
-        regions = []
-        for region in self.regions:
-            if region.label in unique_labels:
-                regions.append(region)
-
-        return regions
+        by_label = self._by_label
+        return [by_label[label] for label in unique_labels.tolist() if label in by_label]
 
-    def merge_regions(self, regions: List[SuperpixelRegion]) -> Optional[ROI]:
+    def merge_regions(self, regions: List[SuperpixelRegion],
+                      approx: int = cv2.CHAIN_APPROX_SIMPLE) -> Optional[ROI]:
         """
         合并多个超像素区域为一个ROI
 
         Args:
             regions: 要合并的区域列表
+            approx: 轮廓近似方式。默认SIMPLE与像素边界完全一致；
+                CHAIN_APPROX_TC89_KCOS点数更少，但填充后与原mask有少量像素差异
 
         Returns:
             合并后的ROI
@@ -250,13 +553,18 @@ class SuperpixelSegmenter:
             roi.is_segmented = True
             return roi
 
-        # 合并所有mask
-        merged_mask = np.zeros_like(regions[0].mask)
+        # 只在所有区域的外接框内合并mask（四周补一圈0，轮廓不会贴着边界截断）
+        x0 = min(r.bbox[0] for r in regions) - 1
+        y0 = min(r.bbox[1] for r in regions) - 1
+        x1 = max(r.bbox[0] + r.bbox[2] for r in regions) + 1
+        y1 = max(r.bbox[1] + r.bbox[3] for r in regions) + 1
+        merged_mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
         for r in regions:
-            merged_mask = cv2.bitwise_or(merged_mask, r.mask)
+            r.paint_mask(merged_mask, (x0, y0))
 
-        # 找合并后的轮廓
-        contours, _ = cv2.findContours(merged_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        # 找合并后的轮廓（坐标偏移回原图）
+        contours, _ = cv2.findContours(merged_mask, cv2.RETR_EXTERNAL, approx,
+                                       offset=(x0, y0))
         if not contours:
             return None
 
@@ -270,6 +578,25 @@ class SuperpixelSegmenter:
 
         return roi
 
+    @staticmethod
+    def merged_mask(regions: List[SuperpixelRegion]) -> Optional[Tuple[int, int, np.ndarray]]:
+        """
+        在所有区域的外接框内合并mask
+
+        Returns:
+            (x, y, mask)：mask左上角在原图中的坐标和外接框大小的二值mask，没有区域时返回None
+        """
+        if not regions:
+            return None
+        x0 = min(r.bbox[0] for r in regions)
+        y0 = min(r.bbox[1] for r in regions)
+        x1 = max(r.bbox[0] + r.bbox[2] for r in regions)
+        y1 = max(r.bbox[1] + r.bbox[3] for r in regions)
+        mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        for r in regions:
+            r.paint_mask(mask, (x0, y0))
+        return x0, y0, mask
+
     def filter_regions(self,
                       min_area: int = 100,
                       max_area: Optional[int] = None,
@@ -285,35 +612,26 @@ class SuperpixelSegmenter:
         Returns:
             过滤后的区域列表
         """
-        filtered = []
-        for r in self.regions:
-            if r.area < min_area:
-                continue
-            if max_area and r.area > max_area:
-                continue
-            if r.bbox[2] < min_wh or r.bbox[3] < min_wh:
-                continue
-            filtered.append(r)
-        return filtered
+        areas, bbox_wh, _, _ = self._region_arrays()
+        keep = (areas >= min_area) & (bbox_wh.min(axis=1) >= min_wh)
+        if max_area:
+            keep &= areas <= max_area
+        regions = self.regions
+        return [regions[i] for i in np.flatnonzero(keep).tolist()]
 
     def visualize(self, img: np.ndarray, alpha: float = 0.5) -> np.ndarray:
         """可视化超像素分割结果"""
         if self.labels is None:
             return img
 
-        # 创建彩色标签图
-        h, w = self.labels.shape
-        vis = np.zeros((h, w, 3), dtype=np.uint8)
-
         # 为每个标签分配随机颜色
         np.random.seed(42)
         colors = np.random.randint(0, 255, size=(np.max(self.labels) + 2, 3), dtype=np.uint8)
 
-        for i in range(h):
-            for j in range(w):
-                label = self.labels[i, j]
-                if label >= 0:
-                    vis[i, j] = colors[label]
+        # 创建彩色标签图（按标签整体查表，无效标签为黑色）
+        valid = self.labels >= 0
+        vis = colors[np.where(valid, self.labels, 0)]
+        vis[~valid] = 0
 
         # 混合
         result = cv2.addWeighted(img, 1 - alpha, vis, alpha, 0)
@@ -329,43 +647,27 @@ class SuperpixelSegmenter:
         if self.labels is None:
             return np.zeros((10, 10), dtype=np.uint8)
 
-        h, w = self.labels.shape
-        boundary = np.zeros((h, w), dtype=np.uint8)
-
-        # 检查每个像素的4邻域
-        for i in range(1, h - 1):
-            for j in range(1, w - 1):
-                label = self.labels[i, j]
-                # 如果邻居有不同标签，就是边界
-                if (self.labels[i-1, j] != label or
-                    self.labels[i+1, j] != label or
-                    self.labels[i, j-1] != label or
-                    self.labels[i, j+1] != label):
-                    boundary[i, j] = 255
+        labels = self.labels
+        cache = self._boundary_cache
+        if cache is not None and cache[0] is labels:
+            return cache[1]
+
+        boundary = np.zeros(labels.shape, dtype=np.uint8)
+
+        # 检查每个内部像素的4邻域（错位切片整体比较），邻居有不同标签就是边界
+        inner = labels[1:-1, 1:-1]
+        diff = labels[:-2, 1:-1] != inner
+        diff |= labels[2:, 1:-1] != inner
+        diff |= labels[1:-1, :-2] != inner
+        diff |= labels[1:-1, 2:] != inner
+        boundary[1:-1, 1:-1][diff] = 255
 
+        self._boundary_cache = (labels, boundary)
         return boundary
 
     def _qpixmap_to_cv2(self, pixmap: QPixmap) -> Optional[np.ndarray]:
         """QPixmap转OpenCV格式"""
-        if pixmap.isNull():
-            return None
-
-        from PyQt5.QtGui import QImage
-
-        image = pixmap.toImage()
-        if image.format() != QImage.Format_RGB888:
-            image = image.convertToFormat(QImage.Format_RGB888)
-
-        width = image.width()
-        height = image.height()
-        ptr = image.bits()
-        ptr.setsize(image.byteCount())
-
-        # 创建副本确保数据安全，避免悬空指针
-        arr = np.array(ptr).reshape(height, width, 3).copy()
-        arr = cv2.cvtColor(arr, cv2.COLOR_RGB2BGR)
-
-        return arr
+        return qpixmap_to_cv2(pixmap)
 
 
 class SuperpixelMergeTool:
@@ -445,38 +747,22 @@ class SuperpixelMergeTool:
             合并后的ROI列表
         """
         regions = list(self.segmenter.regions)
-        merged = [False] * len(regions)
-        rois = []
-
-        for i, r1 in enumerate(regions):
-            if merged[i] or r1.area >= min_area:
-                continue
-
-            # 找颜色相似的相邻区域
-            to_merge = [r1]
-            merged[i] = True
-
-            for j, r2 in enumerate(regions[i+1:], i+1):
-                if merged[j]:
-                    continue
-
-                # 颜色距离
-                color_dist = np.sqrt(sum((a - b) ** 2
-                    for a, b in zip(r1.avg_color, r2.avg_color)))
+        if not regions:
+            return []
 
-                if color_dist < color_threshold:
-                    # 检查是否相邻（简化：中心点距离）
-                    dx = r1.center[0] - r2.center[0]
-                    dy = r1.center[1] - r2.center[1]
-                    dist = np.sqrt(dx * dx + dy * dy)
+        # 两两比较在_merge_groups中按区域属性数组完成
+        areas, bbox_wh, centers, colors = self.segmenter._region_arrays()
+        sizes = bbox_wh.max(axis=1)
+        group = _merge_groups(colors, centers, sizes, areas < min_area, color_threshold)
 
-                    if dist < max(r1.bbox[2], r1.bbox[3]) + max(r2.bbox[2], r2.bbox[3]):
-                        to_merge.append(r2)
-                        merged[j] = True
+        members = {}
+        for j in np.flatnonzero(group >= 0):
+            members.setdefault(int(group[j]), []).append(regions[j])
 
-            if len(to_merge) >= 2:
-                roi = self.segmenter.merge_regions(to_merge)
-                if roi:
-                    rois.append(roi)
+        rois = []
+        for i in sorted(members):
+            roi = self.segmenter.merge_regions([regions[i]] + members[i])
+            if roi:
+                rois.append(roi)
 
         return rois
@@ -5,12 +5,13 @@ ROI数据模型
 
 import uuid
 import time
-from typing import List, Dict, Optional, Tuple
+from typing import Any, List, Dict, Optional, Tuple
 from dataclasses import dataclass, field
+import numpy as np
 from PyQt5.QtCore import QRect, QPoint
 
 
-@dataclass
+@dataclass(slots=True)
 class ROI:
     """ROI数据类 - 支持图片切图和功能区域"""
     # 基础坐标
@@ -48,6 +49,13 @@ class ROI:
     modified_at: float = field(default_factory=time.time)
     tags: List[str] = field(default_factory=list)
     image_path: str = ""
+
+    # 检测/分割结果附带的运行时信息（不参与序列化和比较）
+    contour: Optional[Any] = field(default=None, repr=False, compare=False)
+    is_segmented: bool = field(default=False, repr=False, compare=False)
+    is_circle: bool = field(default=False, repr=False, compare=False)
+    circle_center: Optional[Tuple[int, int]] = field(default=None, repr=False, compare=False)
+    circle_radius: int = field(default=0, repr=False, compare=False)
     
     @property
     def rect(self) -> QRect:
@@ -57,10 +65,18 @@ class ROI:
     @rect.setter
     def rect(self, rect: QRect):
         """从QRect设置"""
+        self.set_rect_no_stamp(rect)
+        self.modified_at = time.time()
+
+    def set_rect_no_stamp(self, rect: QRect):
+        """从QRect设置，不更新修改时间（拖拽等连续操作结束后调用commit_modification）"""
         self.x = rect.x()
         self.y = rect.y()
         self.width = rect.width()
         self.height = rect.height()
+
+    def commit_modification(self):
+        """更新修改时间"""
         self.modified_at = time.time()
     
     @property
@@ -89,9 +105,13 @@ class ROI:
     
     def translate(self, dx: int, dy: int):
         """平移ROI"""
+        self.translate_no_stamp(dx, dy)
+        self.modified_at = time.time()
+
+    def translate_no_stamp(self, dx: int, dy: int):
+        """平移ROI，不更新修改时间"""
         self.x += dx
         self.y += dy
-        self.modified_at = time.time()
     
     def resize(self, new_rect: QRect):
         """调整大小"""
@@ -112,17 +132,18 @@ class ROI:
     
     def to_dict(self) -> Dict:
         """转换为字典 - 只包含相关字段"""
+        x, y, width, height = self.x, self.y, self.width, self.height
         # 基础字段（所有类型都有）
         result = {
             "id": self.roi_id,
             "name": self.name,
             "node_name": self.node_name,
             "roi_type": self.roi_type,
-            "x": self.x,
-            "y": self.y,
-            "width": self.width,
-            "height": self.height,
-            "center": self.center
+            "x": x,
+            "y": y,
+            "width": width,
+            "height": height,
+            "center": (x + width // 2, y + height // 2)
         }
 
         # 根据类型添加特定字段
@@ -132,14 +153,15 @@ class ROI:
             result["image_action"] = self.image_action
         else:
             # 区域类型：添加动作
-            result["action"] = self.action
+            action = self.action
+            result["action"] = action
 
             # 根据动作添加详细配置
-            if self.action == "click":
+            if action == "click":
                 result["click_mode"] = self.click_mode
                 result["click_count"] = self.click_count
                 result["click_interval"] = self.click_interval
-            elif self.action == "swipe":
+            elif action == "swipe":
                 result["swipe_direction"] = self.swipe_direction
                 result["swipe_speed"] = self.swipe_speed
             # OCR动作不需要额外配置
@@ -193,6 +215,9 @@ class ROICollection:
         self.rois: List[ROI] = []
         self.selected_index: int = -1
         self._name_counter = 0
+        self._bboxes: Optional[np.ndarray] = None  # (N, 4) 的 left, top, right, bottom（右下不含）缓存，用于命中测试
+        self._bounds = None  # 所有ROI的外接范围 (left, top, right, bottom)，用于快速排除
+        self._id_index: Optional[Dict[str, int]] = None  # roi_id -> 索引（同id取第一个），删除后重建
     
     def add(self, roi: ROI) -> int:
         """添加ROI，返回索引"""
@@ -200,12 +225,17 @@ class ROICollection:
             self._name_counter += 1
             roi.name = f"ROI_{self._name_counter:03d}"
         self.rois.append(roi)
+        self._bboxes = None
+        if self._id_index is not None:
+            self._id_index.setdefault(roi.roi_id, len(self.rois) - 1)
         return len(self.rois) - 1
     
     def remove(self, index: int) -> bool:
         """删除指定索引的ROI"""
         if 0 <= index < len(self.rois):
             del self.rois[index]
+            self._bboxes = None
+            self._id_index = None
             if self.selected_index == index:
                 self.selected_index = -1
             elif self.selected_index > index:
@@ -225,6 +255,21 @@ class ROICollection:
             return self.rois[index]
         return None
     
+    def index_of(self, roi_id: str) -> int:
+        """按roi_id查找索引，找不到返回-1"""
+        index = self._id_index.get(roi_id, -1) if self._id_index is not None else -1
+        if self._id_index is None or (index >= 0 and self.rois[index].roi_id != roi_id):
+            # 索引未建立或已过期（roi_id在集合外被修改）时重建
+            self._id_index = {}
+            for i, roi in enumerate(self.rois):
+                self._id_index.setdefault(roi.roi_id, i)
+            index = self._id_index.get(roi_id, -1)
+        return index
+
+    def find_by_id(self, roi_id: str) -> Optional[ROI]:
+        """按roi_id查找ROI"""
+        return self.get(self.index_of(roi_id))
+
     def get_selected(self) -> Optional[ROI]:
         """获取选中的ROI"""
         return self.get(self.selected_index)
@@ -236,14 +281,72 @@ class ROICollection:
         else:
             self.selected_index = -1
     
+    def mark_dirty(self):
+        """在集合外直接修改了ROI的位置或大小后调用，使命中测试缓存失效"""
+        self._bboxes = None
+
+    def _get_bboxes(self) -> np.ndarray:
+        """(N, 4) 的 left, top, right, bottom 数组（ROI变化后重建）"""
+        boxes = self._bboxes
+        if boxes is None or len(boxes) != len(self.rois):
+            boxes = np.array([(r.x, r.y, r.width, r.height) for r in self.rois],
+                             dtype=np.int64).reshape(-1, 4)
+            boxes[:, 2:] += boxes[:, :2]
+            self._bboxes = boxes
+            self._bounds = (tuple(boxes[:, :2].min(axis=0).tolist()) +
+                            tuple(boxes[:, 2:].max(axis=0).tolist())) if len(boxes) else None
+        return boxes
+
+    def find_similar(self, roi: ROI, tolerance: int = 5) -> int:
+        """
+        查找位置和大小都与roi相近的已有ROI
+
+        Args:
+            tolerance: x/y/宽/高各自允许的差值（不含）
+
+        Returns:
+            第一个相近ROI的索引，没有返回-1
+        """
+        boxes = self._get_bboxes()
+        if len(boxes) == 0:
+            return -1
+        x, y = boxes[:, 0], boxes[:, 1]
+        similar = ((np.abs(x - roi.x) < tolerance) & (np.abs(y - roi.y) < tolerance) &
+                   (np.abs(boxes[:, 2] - x - roi.width) < tolerance) &
+                   (np.abs(boxes[:, 3] - y - roi.height) < tolerance))
+        idx = np.flatnonzero(similar)
+        return int(idx[0]) if len(idx) else -1
+
+    def hit_test(self, point: QPoint, last: bool = False) -> int:
+        """
+        获取包含指定点的ROI索引
+
+        Args:
+            last: 多个ROI重叠时返回最后一个（最上层），否则返回第一个
+
+        Returns:
+            ROI索引，没有命中返回-1
+        """
+        boxes = self._get_bboxes()
+
+        # 点在所有ROI的外接范围之外时不必逐个比较
+        px, py = point.x(), point.y()
+        bounds = self._bounds
+        if bounds is None or not (bounds[0] <= px < bounds[2] and bounds[1] <= py < bounds[3]):
+            return -1
+
+        # 与QRect.contains一致（ROI均为规范化矩形，宽高<=0时不命中）
+        hits = ((px >= boxes[:, 0]) & (px < boxes[:, 2]) &
+                (py >= boxes[:, 1]) & (py < boxes[:, 3]))
+        idx = np.flatnonzero(hits)
+        if len(idx) == 0:
+            return -1
+        return int(idx[-1] if last else idx[0])
+
     def select_by_point(self, point: QPoint) -> int:
         """根据点选ROI，返回索引"""
-        for i, roi in enumerate(self.rois):
-            if roi.contains(point):
-                self.selected_index = i
-                return i
-        self.selected_index = -1
-        return -1
+        self.selected_index = self.hit_test(point)
+        return self.selected_index
     
     def copy_selected(self) -> Optional[ROI]:
         """复制选中的ROI"""
@@ -262,6 +365,8 @@ class ROICollection:
         self.rois.clear()
         self.selected_index = -1
         self._name_counter = 0
+        self._bboxes = None
+        self._id_index = None
     
     def get_resize_handle(self, point: QPoint, roi_index: int) -> int:
         """
@@ -321,13 +426,21 @@ class ROICollection:
             rect.setRight(new_pos.x())
             rect.setBottom(new_pos.y())
         
-        roi.rect = rect.normalized()
+        # 连续调整时不逐次更新修改时间，结束后调用commit_modification
+        roi.set_rect_no_stamp(rect.normalized())
+        self._bboxes = None
     
     def move_roi(self, roi_index: int, delta: QPoint):
         """移动ROI"""
         if roi_index < 0 or roi_index >= len(self.rois):
             return
-        self.rois[roi_index].translate(delta.x(), delta.y())
+        self.rois[roi_index].translate_no_stamp(delta.x(), delta.y())
+        self._bboxes = None
+
+    def commit_modification(self, roi_index: int):
+        """连续移动/调整结束后更新ROI的修改时间"""
+        if 0 <= roi_index < len(self.rois):
+            self.rois[roi_index].commit_modification()
     
     def to_list(self) -> List[Dict]:
         """转换为列表"""
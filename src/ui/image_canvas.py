@@ -19,10 +19,16 @@
 └─────────────┴──────────┴─────────────┴────────────────────┴──────────────┘
 """
 
+import time
+from typing import Optional
+
+import numpy as np
+
 from PyQt5.QtWidgets import QWidget, QMenu, QAction, QMessageBox, QInputDialog, QApplication
-from PyQt5.QtCore import Qt, QRect, QPoint, pyqtSignal, QSize, QTimer
-from PyQt5.QtGui import QPolygon, QPainter, QPen, QColor, QBrush, QFont, QPixmap, QCursor
+from PyQt5.QtCore import Qt, QRect, QRectF, QPoint, pyqtSignal, QSize, QSizeF, QTimer, QEvent
+from PyQt5.QtGui import QPolygon, QPainter, QPen, QColor, QBrush, QFont, QPixmap, QCursor, QPixmapCache
 from ..models.roi import ROI, ROICollection
+from ..utils.image_convert import qpixmap_to_cv2
 
 
 class ImageCanvas(QWidget):
@@ -35,7 +41,7 @@ class ImageCanvas(QWidget):
     roi_deleted = pyqtSignal(int)
     roi_copied = pyqtSignal(object)
     mouse_moved = pyqtSignal(int, int)
-    point_clicked = pyqtSignal(int, int, bool)  # x, y, continuous
+    point_clicked = pyqtSignal(int, int, bool, int)  # x, y, continuous, 鼠标事件的modifiers
     superpixel_merge_clicked = pyqtSignal(int, int)
     superpixel_cancel_clicked = pyqtSignal(int, int)
     superpixel_merge_finished = pyqtSignal(object)
@@ -89,10 +95,78 @@ class ImageCanvas(QWidget):
         self.fit_to_window = False
         self.min_scale = 0.1
 
-        # Ctrl状态检测定时器（100ms）
+        # 悬停时的鼠标移动节流（约60Hz），间隔内只保留最新位置
+        self._move_min_interval_ns = 16_000_000
+        self._last_move_ns = 0
+        self._pending_move_pos = None
+        self._move_timer = QTimer(self)
+        self._move_timer.setSingleShot(True)
+        self._move_timer.timeout.connect(self._flush_move)
+
+        # 鼠标坐标只在图片坐标变化时发送；状态栏提示在30ms内连续切换时只补发最后一条
+        self._last_moved_xy = None
+        self._pending_status = None
+        self._status_timer = QTimer(self)
+        self._status_timer.setSingleShot(True)
+        self._status_timer.setInterval(30)
+        self._status_timer.timeout.connect(self._flush_status)
+
+        # 适应窗口时的缩放图按(图片, 尺寸)放进QPixmapCache；
+        # 拖动窗口大小期间只更新缩放比例，停止50ms后再重新缩放
+        if QPixmapCache.cacheLimit() < 64 * 1024:
+            QPixmapCache.setCacheLimit(64 * 1024)
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(50)
+        self._resize_timer.timeout.connect(self._update_display_and_repaint)
+
+        # 拖拽/调整/方向键微调时的roi_modified合并发送：16ms内改动过的ROI只通知一次
+        self._modified_pending = []
+        self._modified_timer = QTimer(self)
+        self._modified_timer.setSingleShot(True)
+        self._modified_timer.setInterval(16)
+        self._modified_timer.timeout.connect(self.flush_modified_sync)
+
+        # 当前图片的BGR数组缓存：(pixmap cacheKey, 只读数组)
+        self._bgr_cache = None
+
+        # 未选中ROI的预渲染图层：(屏幕左上角, QPixmap)，内容变化时按key重建
+        self._roi_layer = None
+        self._roi_layer_key = None
+
+        # 绘制用字体在初始化时创建一次；ROI标签尺寸按文字缓存（控件字体变化时清空）
+        self._font_status = QFont("Microsoft YaHei", 10, QFont.Bold)
+        self._font_empty = QFont("Microsoft YaHei", 12)
+        self._label_size_cache = {}
+
+        # 待合并超像素的屏幕多边形缓存：label -> (轮廓对象, QPolygon)，缩放或偏移变化时清空
+        self._polygon_cache = {}
+        self._polygon_cache_view = None
+
+        # Ctrl状态：画布有焦点时由按键事件驱动；没有焦点时才用定时器兜底轮询，
+        # 状态变化后30ms快速轮询，状态不变时逐步放慢到500ms；程序不在前台时暂停
         self._last_ctrl_state = False
+        self._ctrl_poll_min = 30
+        self._ctrl_poll_max = 500
         self._ctrl_timer = QTimer(self)
+        self._ctrl_timer.setInterval(self._ctrl_poll_min)
         self._ctrl_timer.timeout.connect(self._check_ctrl_state)
+        self._ctrl_timer_enabled = False
+        app = QApplication.instance()
+        if app is not None:
+            app.applicationStateChanged.connect(self._on_app_state_changed)
+
+        # 各切图模式的Ctrl变化/左键按下处理函数（按crop_mode查表，未命中时走选择模式）
+        self._ctrl_handlers = {
+            "manual": self._handle_manual_ctrl,
+            "superpixel": self._handle_superpixel_ctrl,
+            "auto_detect": self._handle_auto_detect_ctrl,
+        }
+        self._press_handlers = {
+            "manual": self._press_manual_draw,
+            "superpixel": self._press_superpixel,
+            "auto_detect": self._press_auto_detect,
+        }
 
         # 窗口设置
         self.setMouseTracking(True)
@@ -101,49 +175,97 @@ class ImageCanvas(QWidget):
         self.setStyleSheet("background-color: #1e1e1e; border: 2px solid #333;")
 
     def start_ctrl_timer(self):
-        """启动Ctrl检测定时器"""
-        self._ctrl_timer.start(100)
+        """启动Ctrl检测（有焦点时靠按键事件，无焦点时轮询）"""
+        self._ctrl_timer_enabled = True
+        self._update_ctrl_polling()
+        self._check_ctrl_state()
 
     def stop_ctrl_timer(self):
-        """停止Ctrl检测定时器"""
+        """停止Ctrl检测"""
+        self._ctrl_timer_enabled = False
         self._ctrl_timer.stop()
 
+    def _update_ctrl_polling(self):
+        """只在需要兜底时运行轮询定时器（已启用、程序在前台、画布无键盘焦点）"""
+        need_poll = (self._ctrl_timer_enabled and not self.hasFocus() and
+                     QApplication.applicationState() == Qt.ApplicationActive)
+        if need_poll and not self._ctrl_timer.isActive():
+            self._reset_ctrl_poll()
+            self._ctrl_timer.start()
+        elif not need_poll and self._ctrl_timer.isActive():
+            self._ctrl_timer.stop()
+
+    def _reset_ctrl_poll(self):
+        """恢复为快速轮询"""
+        if self._ctrl_timer.interval() != self._ctrl_poll_min:
+            self._ctrl_timer.setInterval(self._ctrl_poll_min)
+
+    def _on_app_state_changed(self, state):
+        """程序切到后台时暂停Ctrl检测，回到前台时立即检测一次"""
+        if not self._ctrl_timer_enabled:
+            return
+        self._update_ctrl_polling()
+        if state == Qt.ApplicationActive:
+            self._check_ctrl_state()
+
+    def focusInEvent(self, event):
+        """获得焦点后Ctrl由按键事件驱动，停止轮询（焦点外按下的Ctrl先同步一次）"""
+        super().focusInEvent(event)
+        if self._ctrl_timer_enabled:
+            self._update_ctrl_polling()
+            self._check_ctrl_state()
+
+    def focusOutEvent(self, event):
+        """失去焦点后收不到按键事件，改为轮询"""
+        super().focusOutEvent(event)
+        if self._ctrl_timer_enabled:
+            self._update_ctrl_polling()
+
     def _is_ctrl_pressed(self) -> bool:
         """读取键盘Ctrl状态"""
         return bool(QApplication.keyboardModifiers() & Qt.ControlModifier)
 
     def _check_ctrl_state(self):
-        """定时检测Ctrl状态（100ms）"""
+        """检测Ctrl状态（轮询间隔自适应，见__init__）"""
         current_ctrl = self._is_ctrl_pressed()
 
         if current_ctrl != self._last_ctrl_state:
             self._last_ctrl_state = current_ctrl
+            self._reset_ctrl_poll()
+            self._on_ctrl_changed(current_ctrl)
+        else:
+            interval = self._ctrl_timer.interval()
+            if interval < self._ctrl_poll_max:
+                self._ctrl_timer.setInterval(min(interval * 2, self._ctrl_poll_max))
+
+    def _sync_ctrl_state(self, modifiers):
+        """按事件携带的修饰键立即同步Ctrl状态（不必等下一次轮询）"""
+        current_ctrl = bool(modifiers & Qt.ControlModifier)
+        if current_ctrl != self._last_ctrl_state:
+            self._last_ctrl_state = current_ctrl
+            self._reset_ctrl_poll()
             self._on_ctrl_changed(current_ctrl)
 
     def _on_ctrl_changed(self, ctrl_pressed: bool):
         """Ctrl状态变化处理 - 严格按照交互矩阵"""
-        if self.crop_mode == "manual":
-            self._handle_manual_ctrl(ctrl_pressed)
-        elif self.crop_mode == "superpixel":
-            self._handle_superpixel_ctrl(ctrl_pressed)
-        elif self.crop_mode == "auto_detect":
-            self._handle_auto_detect_ctrl(ctrl_pressed)
+        handler = self._ctrl_handlers.get(self.crop_mode)
+        if handler is not None:
+            handler(ctrl_pressed)
 
     def _handle_manual_ctrl(self, ctrl_pressed: bool):
         """手动框选模式Ctrl处理"""
         if ctrl_pressed:
-            # 按住Ctrl - 进入框选模式
+            # 按住Ctrl - 进入框选模式（set_mode内部会请求重绘）
             if self.mode != "draw":
                 self.set_mode("draw")
             self.setCursor(Qt.CrossCursor)
-            self.statusbar_msg.emit("框选模式: 拖动创建ROI，松开鼠标完成")
+            self._emit_status("框选模式: 拖动创建ROI，松开鼠标完成")
         else:
             # 松开Ctrl - 如果不在绘制中，回到选择模式
             if self.mode == "draw" and not self.is_drawing:
                 self.set_mode("select")
                 self.setCursor(Qt.ArrowCursor)
-                self.statusbar_msg.emit("选择模式: 点击选中ROI，拖拽移动，手柄调整大小")
-        self.update()
+                self._emit_status("选择模式: 点击选中ROI，拖拽移动，手柄调整大小")
 
     def _handle_superpixel_ctrl(self, ctrl_pressed: bool):
         """超像素合并模式Ctrl处理"""
@@ -151,14 +273,17 @@ class ImageCanvas(QWidget):
         if ctrl_pressed:
             # 按住Ctrl - 进入合并模式
             self.setCursor(Qt.CrossCursor)
-            self.statusbar_msg.emit("合并模式: 左键添加区域，右键取消，松开Ctrl完成")
+            self._emit_status("合并模式: 左键添加区域，右键取消，松开Ctrl完成")
         else:
             # 松开Ctrl - 触发完成
             self.setCursor(Qt.ArrowCursor)
-            self.statusbar_msg.emit("选择模式")
+            self._emit_status("选择模式")
             if self.pending_merge_labels:
+                # 先发出积压的提示，避免覆盖完成处理中显示的消息
+                self._flush_status()
                 self.superpixel_merge_finished.emit(self.pending_merge_labels)
-        self.update()
+                # 高亮的待合并区域会变化，需要重绘
+                self.update()
 
     def _handle_auto_detect_ctrl(self, ctrl_pressed: bool):
         """自动检测模式Ctrl处理"""
@@ -166,19 +291,38 @@ class ImageCanvas(QWidget):
         if ctrl_pressed:
             # 按住Ctrl - 进入检测模式
             self.setCursor(Qt.CrossCursor)
-            self.statusbar_msg.emit("检测模式: 左键点击检测，右键取消，松开Ctrl完成")
+            self._emit_status("检测模式: 左键点击检测，右键取消，松开Ctrl完成")
         else:
             # 松开Ctrl - 触发完成
             self.setCursor(Qt.ArrowCursor)
-            self.statusbar_msg.emit("选择模式")
+            self._emit_status("选择模式")
             if self.temp_roi:
+                self._flush_status()
                 self.auto_detect_finished.emit(self.temp_roi)
                 self.temp_roi = None
-        self.update()
+                # 预览框被清除，需要重绘
+                self.update()
+
+    def _emit_status(self, text: str):
+        """发送状态栏提示（空闲时立即发送，30ms内的后续提示合并为最后一条）"""
+        if self._status_timer.isActive():
+            self._pending_status = text
+            return
+        self.statusbar_msg.emit(text)
+        self._status_timer.start()
+
+    def _flush_status(self):
+        """发出合并后的状态栏提示"""
+        self._status_timer.stop()
+        text = self._pending_status
+        self._pending_status = None
+        if text is not None:
+            self.statusbar_msg.emit(text)
 
     def set_pixmap(self, pixmap: QPixmap):
         """设置图片"""
         self.pixmap = pixmap
+        self._bgr_cache = None
         self.roi_collection.clear()
         self._update_display()
         self.update()
@@ -187,12 +331,30 @@ class ImageCanvas(QWidget):
         """获取当前图片"""
         return self.pixmap
 
+    def get_bgr_ndarray(self) -> Optional[np.ndarray]:
+        """
+        获取当前图片的BGR数组（供颜色/区域识别使用）
+
+        第一次调用时转换并缓存，换图后重新转换；返回只读数组，调用方需要修改时自行copy
+        """
+        if not self.pixmap or self.pixmap.isNull():
+            return None
+        key = self.pixmap.cacheKey()
+        if self._bgr_cache is None or self._bgr_cache[0] != key:
+            img = qpixmap_to_cv2(self.pixmap)
+            if img is None:
+                return None
+            img.flags.writeable = False
+            self._bgr_cache = (key, img)
+        return self._bgr_cache[1]
+
     def set_mode(self, mode: str):
         """设置模式: select/draw"""
         self.mode = mode
         if mode == "draw":
             self.roi_collection.selected_index = -1
             self.roi_selected.emit(-1)
+        # 统一用update()而不是repaint()：Qt会把同一轮事件循环里的多次请求合并成一次绘制
         self.update()
 
     def _update_display(self):
@@ -202,19 +364,9 @@ class ImageCanvas(QWidget):
 
         if self.fit_to_window:
             # 适应窗口模式
-            widget_w = self.width()
-            widget_h = self.height()
-            img_w = self.pixmap.width()
-            img_h = self.pixmap.height()
-
-            scale_w = widget_w / img_w
-            scale_h = widget_h / img_h
-            self.scale = max(self.min_scale, min(scale_w, scale_h))
-
-            self.pixmap_display = self.pixmap.scaled(
-                int(img_w * self.scale), int(img_h * self.scale),
-                Qt.KeepAspectRatio, Qt.SmoothTransformation
-            )
+            self.scale = self._fit_scale()
+            size = self._display_size()
+            self.pixmap_display = self._scaled_display(size.width(), size.height())
             self.offset = QPoint(0, 0)
             self.setMinimumSize(200, 150)
         else:
@@ -223,6 +375,38 @@ class ImageCanvas(QWidget):
             self.pixmap_display = self.pixmap
             self.setFixedSize(self.pixmap.width(), self.pixmap.height())
 
+    def _fit_scale(self) -> float:
+        """适应窗口时的缩放比例"""
+        scale_w = self.width() / self.pixmap.width()
+        scale_h = self.height() / self.pixmap.height()
+        return max(self.min_scale, min(scale_w, scale_h))
+
+    def _display_size(self) -> QSize:
+        """图片在屏幕上的显示尺寸（调整窗口期间显示图可能还没按新尺寸重新缩放）"""
+        if not self.fit_to_window:
+            return self.pixmap.size()
+        # 与QPixmap.scaled(KeepAspectRatio)得到的尺寸一致
+        return self.pixmap.size().scaled(
+            int(self.pixmap.width() * self.scale), int(self.pixmap.height() * self.scale),
+            Qt.KeepAspectRatio
+        )
+
+    def _scaled_display(self, width: int, height: int) -> QPixmap:
+        """获取缩放后的显示图（平滑缩放结果缓存在QPixmapCache中）"""
+        key = f"canvas:{self.pixmap.cacheKey()}:{width}x{height}"
+        cached = QPixmapCache.find(key)
+        if cached is not None and not cached.isNull():
+            return cached
+
+        scaled = self.pixmap.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        QPixmapCache.insert(key, scaled)
+        return scaled
+
+    def _update_display_and_repaint(self):
+        """窗口大小停止变化后重新缩放显示图"""
+        self._update_display()
+        self.update()
+
     def toggle_fit_mode(self):
         """切换适应窗口/1:1显示"""
         self.fit_to_window = not self.fit_to_window
@@ -233,7 +417,12 @@ class ImageCanvas(QWidget):
     def resizeEvent(self, event):
         """窗口大小改变"""
         super().resizeEvent(event)
-        self._update_display()
+        if self.pixmap and self.fit_to_window:
+            # 坐标映射立即跟随新尺寸，显示图暂时拉伸绘制，停止调整后再重新缩放
+            self.scale = self._fit_scale()
+            self._resize_timer.start()
+        else:
+            self._update_display()
 
     # ==================== 鼠标事件 ====================
 
@@ -242,29 +431,19 @@ class ImageCanvas(QWidget):
         if not self.pixmap:
             return
 
+        # 轮询放慢后刚按下的Ctrl可能还没检测到
+        if self._ctrl_timer_enabled:
+            self._sync_ctrl_state(event.modifiers())
+
         img_pos = self._screen_to_image(event.pos())
         screen_pos = event.pos()
 
         if event.button() == Qt.LeftButton:
-            # 根据当前模式处理
-            if self.crop_mode == "manual" and self.mode == "draw":
-                # 手动框选模式的绘制模式
-                self.is_drawing = True
-                self.draw_start = img_pos
-                self.draw_current = img_pos
-                self.update()
-
-            elif self.crop_mode == "superpixel" and self._ctrl_active:
-                # 超像素模式 - 只有Ctrl按下时才触发
-                self.superpixel_merge_clicked.emit(img_pos.x(), img_pos.y())
-
-            elif self.crop_mode == "auto_detect" and self._ctrl_active:
-                # 自动检测模式 - 只有Ctrl按下时才触发
-                self.auto_detect_clicked.emit(img_pos.x(), img_pos.y())
-
-            else:
-                # 选择模式 - 处理ROI选择/拖拽/调整
-                self._handle_select_mode_press(screen_pos, img_pos)
+            # 手动模式在绘制模式下、超像素/自动检测模式在Ctrl按下时走各自的处理，
+            # 否则为选择模式 - 处理ROI选择/拖拽/调整
+            active = self.mode == "draw" if self.crop_mode == "manual" else self._ctrl_active
+            handler = self._press_handlers.get(self.crop_mode) if active else None
+            (handler or self._handle_select_mode_press)(screen_pos, img_pos)
 
         elif event.button() == Qt.RightButton:
             # 右键处理
@@ -274,12 +453,27 @@ class ImageCanvas(QWidget):
             elif self.crop_mode == "auto_detect" and self._ctrl_active and self.temp_roi:
                 # 自动检测模式 - 只有Ctrl按下时才触发取消
                 self.temp_roi = None
-                self.statusbar_msg.emit("已取消检测")
+                self._emit_status("已取消检测")
                 self.update()
             elif self.crop_mode in ("manual", "superpixel", "auto_detect") and not self._ctrl_active:
                 # Ctrl松开时显示右键菜单
                 self._show_context_menu(event.pos())
 
+    def _press_manual_draw(self, screen_pos: QPoint, img_pos: QPoint):
+        """手动框选模式的绘制模式 - 开始框选"""
+        self.is_drawing = True
+        self.draw_start = img_pos
+        self.draw_current = img_pos
+        self.update()
+
+    def _press_superpixel(self, screen_pos: QPoint, img_pos: QPoint):
+        """超像素模式 - 只有Ctrl按下时才触发"""
+        self.superpixel_merge_clicked.emit(img_pos.x(), img_pos.y())
+
+    def _press_auto_detect(self, screen_pos: QPoint, img_pos: QPoint):
+        """自动检测模式 - 只有Ctrl按下时才触发"""
+        self.auto_detect_clicked.emit(img_pos.x(), img_pos.y())
+
     def _handle_select_mode_press(self, screen_pos: QPoint, img_pos: QPoint):
         """选择模式的鼠标按下处理"""
         # 1. 检查是否点击了调整手柄
@@ -314,16 +508,45 @@ class ImageCanvas(QWidget):
         if not self.pixmap:
             return
 
-        img_pos = self._screen_to_image(event.pos())
-        screen_pos = event.pos()
+        # 绘制/拖拽/调整时逐个处理；悬停时按帧间隔合并事件
+        if not (self.is_drawing or self.is_dragging or self.is_resizing):
+            now = time.monotonic_ns()
+            elapsed = now - self._last_move_ns
+            if elapsed < self._move_min_interval_ns:
+                self._pending_move_pos = event.pos()
+                if not self._move_timer.isActive():
+                    self._move_timer.start(max(1, (self._move_min_interval_ns - elapsed) // 1_000_000))
+                return
+            self._last_move_ns = now
+            self._pending_move_pos = None
+
+        self._handle_mouse_move(event.pos())
+
+    def _flush_move(self):
+        """处理节流期间保留的最后一次悬停移动"""
+        pos = self._pending_move_pos
+        self._pending_move_pos = None
+        # 期间已开始绘制/拖拽时，旧位置不再有意义
+        if pos is None or not self.pixmap or self.is_drawing or self.is_dragging or self.is_resizing:
+            return
+        self._last_move_ns = time.monotonic_ns()
+        self._handle_mouse_move(pos)
+
+    def _handle_mouse_move(self, screen_pos: QPoint):
+        """处理鼠标移动（坐标显示、绘制、拖拽、调整和光标更新）"""
+        img_pos = self._screen_to_image(screen_pos)
 
-        # 发送鼠标位置
-        self.mouse_moved.emit(img_pos.x(), img_pos.y())
+        # 发送鼠标位置（同一图片像素内移动时不重复发送）
+        xy = (img_pos.x(), img_pos.y())
+        if xy != self._last_moved_xy:
+            self._last_moved_xy = xy
+            self.mouse_moved.emit(*xy)
 
         # 处理绘制
         if self.is_drawing:
+            dirty = self._drawing_screen_bbox()
             self.draw_current = img_pos
-            self.update()
+            self.update(dirty.united(self._drawing_screen_bbox()))
             return
 
         # 处理调整大小
@@ -359,10 +582,33 @@ class ImageCanvas(QWidget):
                 new_y = max(0, min(new_rect.y(), img_h - roi.height))
                 new_rect.moveTo(new_x, new_y)
 
-            roi.rect = new_rect
+            dirty = self._roi_screen_bbox(roi)
+            roi.set_rect_no_stamp(new_rect)
+            self.roi_collection.mark_dirty()
             self.drag_start_img = img_pos
-            self.roi_modified.emit(selected_idx)
-            self.update()
+            self._queue_modified(roi)
+            # 只重绘移动前后ROI覆盖的范围
+            self.update(dirty.united(self._roi_screen_bbox(roi)))
+
+    def _queue_modified(self, roi: ROI):
+        """记录被修改的ROI，稍后合并发出roi_modified"""
+        if not any(r is roi for r in self._modified_pending):
+            self._modified_pending.append(roi)
+        if not self._modified_timer.isActive():
+            self._modified_timer.start()
+
+    def flush_modified_sync(self):
+        """立即发出积压的roi_modified（保存等需要最新状态的操作前调用）"""
+        self._modified_timer.stop()
+        pending = self._modified_pending
+        if not pending:
+            return
+        self._modified_pending = []
+
+        # 积压期间ROI可能已被删除或移位，按对象找回当前索引
+        for index, roi in enumerate(self.roi_collection):
+            if any(r is roi for r in pending):
+                self.roi_modified.emit(index)
 
     def mouseReleaseEvent(self, event):
         """鼠标释放"""
@@ -371,9 +617,14 @@ class ImageCanvas(QWidget):
             if self.is_drawing:
                 self._finish_drawing()
 
-            # 完成拖拽
+            # 拖拽/调整结束时立即发出最后一次修改通知
+            if self.is_dragging or self.is_resizing:
+                self.flush_modified_sync()
+
+            # 完成拖拽（拖拽过程中不更新修改时间，释放时统一更新一次）
             if self.is_dragging:
                 self.is_dragging = False
+                self.roi_collection.commit_modification(self.roi_collection.selected_index)
                 # 重新检测光标下的内容
                 self._update_cursor(event.pos())
 
@@ -381,10 +632,17 @@ class ImageCanvas(QWidget):
             if self.is_resizing:
                 self.is_resizing = False
                 self.resize_handle = -1
+                self.roi_collection.commit_modification(self.roi_collection.selected_index)
                 self._update_cursor(event.pos())
 
     def _finish_drawing(self):
         """完成框选"""
+        # 需要重绘：框选预览、原选中ROI（取消高亮）以及新建的ROI
+        dirty = self._drawing_screen_bbox()
+        previous = self.roi_collection.get_selected()
+        if previous:
+            dirty = dirty.united(self._roi_screen_bbox(previous))
+
         self.is_drawing = False
         rect = QRect(self.draw_start, self.draw_current).normalized()
 
@@ -396,6 +654,7 @@ class ImageCanvas(QWidget):
             roi.rect = rect
             idx = self.roi_collection.add(roi)
             self.roi_collection.selected_index = idx
+            dirty = dirty.united(self._roi_screen_bbox(roi))
 
             self.roi_created.emit(roi)
             self.roi_selected.emit(idx)
@@ -405,7 +664,55 @@ class ImageCanvas(QWidget):
                 self.set_mode("select")
                 self.setCursor(Qt.ArrowCursor)
 
-        self.update()
+        self.update(dirty)
+
+    def _roi_screen_bbox(self, roi: ROI, margin: int = 8) -> QRect:
+        """ROI在屏幕上的重绘范围（含边框、调整手柄和名称标签）"""
+        screen_rect = QRect(
+            self._image_to_screen(QPoint(roi.x, roi.y)),
+            QSize(int(roi.width * self.scale), int(roi.height * self.scale))
+        )
+        bbox = screen_rect.adjusted(-margin, -margin, margin, margin)
+
+        # 名称标签画在ROI上方，可能比ROI更宽（与_draw_roi的布局一致）
+        label = roi.node_name or roi.name
+        if label:
+            text_size = self._label_size(label)
+            text_h = text_size.height() + 4
+            label_rect = QRect(screen_rect.left(), screen_rect.top() - text_h,
+                               text_size.width() + 10, text_h)
+            bbox = bbox.united(label_rect.adjusted(-2, -2, 2, 2))
+        return bbox
+
+    def _label_size(self, label: str) -> QSize:
+        """ROI名称标签的文字尺寸（按控件字体计算并缓存）"""
+        size = self._label_size_cache.get(label)
+        if size is None:
+            if len(self._label_size_cache) >= 1024:
+                self._label_size_cache.clear()
+            size = self.fontMetrics().boundingRect(label).size()
+            self._label_size_cache[label] = size
+        return size
+
+    def changeEvent(self, event):
+        """控件字体变化时清空标签尺寸缓存"""
+        if event.type() == QEvent.FontChange:
+            self._label_size_cache.clear()
+        super().changeEvent(event)
+
+    def _drawing_screen_bbox(self, margin: int = 8) -> QRect:
+        """正在框选的矩形及其尺寸文字在屏幕上的重绘范围"""
+        rect = QRect(self.draw_start, self.draw_current).normalized()
+        screen_rect = QRect(
+            self._image_to_screen(rect.topLeft()),
+            self._image_to_screen(rect.bottomRight())
+        )
+        bbox = screen_rect.adjusted(-margin, -margin, margin, margin)
+
+        size_text = f"{rect.width()} x {rect.height()}"
+        text_rect = self.fontMetrics().boundingRect(size_text)
+        text_rect.moveBottomLeft(QPoint(screen_rect.left(), screen_rect.top() - 5))
+        return bbox.united(text_rect.adjusted(-margin, -margin, margin, margin))
 
     def _constrain_rect(self, rect: QRect) -> QRect:
         """限制矩形在图片范围内"""
@@ -456,9 +763,11 @@ class ImageCanvas(QWidget):
             selected_idx = self.roi_collection.selected_index
             if selected_idx >= 0:
                 roi = self.roi_collection.get(selected_idx)
-                roi.rect = self._constrain_rect(new_rect)
-                self.roi_modified.emit(selected_idx)
-                self.update()
+                dirty = self._roi_screen_bbox(roi)
+                roi.set_rect_no_stamp(self._constrain_rect(new_rect))
+                self.roi_collection.mark_dirty()
+                self._queue_modified(roi)
+                self.update(dirty.united(self._roi_screen_bbox(roi)))
 
     def _screen_to_image(self, pos: QPoint) -> QPoint:
         """屏幕坐标转图片坐标"""
@@ -474,10 +783,8 @@ class ImageCanvas(QWidget):
 
     def _select_roi_at(self, img_pos: QPoint) -> int:
         """获取点击位置的ROI索引"""
-        for i in range(len(self.roi_collection) - 1, -1, -1):
-            if self.roi_collection[i].contains(img_pos):
-                return i
-        return -1
+        # 重叠时取最上层（最后绘制）的ROI
+        return self.roi_collection.hit_test(img_pos, last=True)
 
     def _get_resize_handle_at(self, screen_pos: QPoint) -> int:
         """获取调整手柄索引"""
@@ -491,10 +798,14 @@ class ImageCanvas(QWidget):
             QSize(int(roi.width * self.scale), int(roi.height * self.scale))
         )
 
-        handle_size = 10
-        half = handle_size // 2
         half_hit = 8
 
+        # 鼠标不在扩展后的选中框附近时不可能命中手柄，直接返回
+        px, py = screen_pos.x(), screen_pos.y()
+        if (px < screen_rect.left() - half_hit or px > screen_rect.right() + half_hit or
+                py < screen_rect.top() - half_hit or py > screen_rect.bottom() + half_hit):
+            return -1
+
         handles = [
             (screen_rect.left(), screen_rect.top()),
             (screen_rect.center().x(), screen_rect.top()),
@@ -507,7 +818,7 @@ class ImageCanvas(QWidget):
         ]
 
         for i, (hx, hy) in enumerate(handles):
-            if abs(screen_pos.x() - hx) <= half_hit and abs(screen_pos.y() - hy) <= half_hit:
+            if abs(px - hx) <= half_hit and abs(py - hy) <= half_hit:
                 return i
         return -1
 
@@ -595,10 +906,13 @@ class ImageCanvas(QWidget):
     # ==================== 键盘事件 ====================
 
     def keyPressEvent(self, event):
-        """键盘按下 - 处理快捷键（不处理Ctrl）"""
+        """键盘按下 - 处理快捷键（Ctrl只用于立即同步状态）"""
         key = event.key()
         modifiers = event.modifiers()
 
+        if key == Qt.Key_Control and self._ctrl_timer_enabled:
+            self._sync_ctrl_state(modifiers | Qt.ControlModifier)
+
         # Delete - 删除选中ROI
         if key == Qt.Key_Delete:
             if self.delete_selected_roi():
@@ -619,6 +933,7 @@ class ImageCanvas(QWidget):
             roi = self.roi_collection.get_selected()
             if roi:
                 step = 10 if modifiers == Qt.ShiftModifier else 1
+                dirty = self._roi_screen_bbox(roi)
 
                 if key == Qt.Key_Left:
                     roi.translate(-step, 0)
@@ -628,81 +943,92 @@ class ImageCanvas(QWidget):
                     roi.translate(0, -step)
                 elif key == Qt.Key_Down:
                     roi.translate(0, step)
+                self.roi_collection.mark_dirty()
 
-                self.roi_modified.emit(self.roi_collection.selected_index)
-                self.update()
+                # 按住方向键自动重复时，多次微调合并为一次通知
+                self._queue_modified(roi)
+                self.update(dirty.united(self._roi_screen_bbox(roi)))
                 return
 
         super().keyPressEvent(event)
 
+    def keyReleaseEvent(self, event):
+        """键盘松开 - 松开Ctrl时立即同步状态"""
+        if event.key() == Qt.Key_Control and self._ctrl_timer_enabled:
+            self._sync_ctrl_state(event.modifiers() & ~Qt.ControlModifier)
+        super().keyReleaseEvent(event)
+
     # ==================== 绘制 ====================
 
     def paintEvent(self, event):
         """绘制"""
+        dirty = event.rect()
+        # ROI框、手柄和边框都是整数坐标的水平/竖直线，不开抗锯齿；只有超像素多边形需要
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
 
-        # 绘制背景
-        painter.fillRect(self.rect(), QColor("#1e1e1e"))
+        # 绘制背景（只填充重绘区域，下面各块也只在与重绘区域相交时绘制）
+        painter.fillRect(dirty, QColor("#1e1e1e"))
 
         if not self.pixmap or not self.pixmap_display:
             painter.setPen(QColor("#666"))
-            font = QFont("Microsoft YaHei", 12)
-            painter.setFont(font)
+            painter.setFont(self._font_empty)
             painter.drawText(self.rect(), Qt.AlignCenter, "请加载图片或截图")
             return
 
         # 绘制图片阴影
-        shadow_rect = QRect(self.offset.x() + 3, self.offset.y() + 3,
-                           self.pixmap_display.width(), self.pixmap_display.height())
-        painter.fillRect(shadow_rect, QColor(0, 0, 0, 100))
-
-        # 绘制图片
-        painter.drawPixmap(self.offset.x(), self.offset.y(), self.pixmap_display)
+        img_rect = QRect(self.offset, self._display_size())
+        shadow_rect = img_rect.translated(3, 3)
+        if dirty.intersects(shadow_rect):
+            painter.fillRect(shadow_rect.intersected(dirty), QColor(0, 0, 0, 100))
+
+        # 绘制图片（调整窗口期间显示图尺寸可能与目标不同，由QPainter临时拉伸）
+        if self.pixmap_display.size() == img_rect.size():
+            self._blit(painter, self.offset, self.pixmap_display, dirty)
+        else:
+            painter.drawPixmap(img_rect, self.pixmap_display)
 
-        # 绘制图片边框
-        img_rect = QRect(self.offset.x(), self.offset.y(),
-                        self.pixmap_display.width(), self.pixmap_display.height())
-        painter.setPen(QPen(QColor("#444"), 1))
-        painter.drawRect(img_rect)
+        # 绘制图片边框（重绘区域完全在图片内部时碰不到边框）
+        if not img_rect.adjusted(2, 2, -2, -2).contains(dirty):
+            painter.setPen(QPen(QColor("#444"), 1))
+            painter.drawRect(img_rect)
 
         # 绘制原点标记
         origin = self._image_to_screen(QPoint(0, 0))
-        painter.setPen(QPen(QColor(255, 0, 0), 2))
-        painter.drawLine(origin.x() - 5, origin.y(), origin.x() + 5, origin.y())
-        painter.drawLine(origin.x(), origin.y() - 5, origin.x(), origin.y() + 5)
-
-        # 绘制ROI
-        for i, roi in enumerate(self.roi_collection):
-            self._draw_roi(painter, roi, i == self.roi_collection.selected_index)
+        if dirty.intersects(QRect(origin.x() - 7, origin.y() - 7, 15, 15)):
+            painter.setPen(QPen(QColor(255, 0, 0), 2))
+            painter.drawLine(origin.x() - 5, origin.y(), origin.x() + 5, origin.y())
+            painter.drawLine(origin.x(), origin.y() - 5, origin.x(), origin.y() + 5)
+
+        # 绘制ROI：未选中的ROI整层贴图，只有选中的ROI逐帧绘制（局部重绘且不在范围内时跳过）
+        layer = self._get_roi_layer()
+        if layer is not None:
+            self._blit(painter, layer[0], layer[1], dirty)
+        selected = self.roi_collection.get_selected()
+        if selected is not None:
+            if dirty.contains(self.rect()) or dirty.intersects(self._roi_screen_bbox(selected)):
+                self._draw_roi(painter, selected, True)
 
         # 绘制超像素边界
         if self.show_superpixel and self.superpixel_overlay and not self.superpixel_overlay.isNull():
-            painter.drawPixmap(self.offset.x(), self.offset.y(), self.superpixel_overlay)
+            self._blit(painter, self.offset, self.superpixel_overlay, dirty)
 
             # 高亮选中的超像素
             if self.pending_merge_labels:
                 painter.setBrush(QColor(255, 255, 0, 100))
                 painter.setPen(QPen(QColor(255, 200, 0), 2))
 
+                contours = getattr(self, '_superpixel_contours', {})
+                painter.setRenderHint(QPainter.Antialiasing, True)
                 for label in self.pending_merge_labels:
-                    if hasattr(self, '_superpixel_contours') and label in self._superpixel_contours:
-                        contour = self._superpixel_contours[label]
-                        if contour is not None and len(contour) > 0:
-                            points = []
-                            for pt in contour:
-                                sx = int(pt[0][0] * self.scale + self.offset.x())
-                                sy = int(pt[0][1] * self.scale + self.offset.y())
-                                points.append(QPoint(sx, sy))
-                            if len(points) >= 3:
-                                polygon = QPolygon(points)
-                                painter.drawPolygon(polygon)
+                    polygon = self._contour_polygon(label, contours.get(label))
+                    if polygon is not None:
+                        painter.drawPolygon(polygon)
+                painter.setRenderHint(QPainter.Antialiasing, False)
 
             # 显示合并模式提示（只在有选中区域时显示）
             if self.pending_merge_labels:
                 painter.setPen(QColor(255, 255, 0))
-                font = QFont("Microsoft YaHei", 10, QFont.Bold)
-                painter.setFont(font)
+                painter.setFont(self._font_status)
                 status_text = f"合并模式: 已选{len(self.pending_merge_labels)}个区域"
                 painter.drawText(10, 30, status_text)
 
@@ -732,10 +1058,91 @@ class ImageCanvas(QWidget):
             painter.drawRect(screen_rect)
 
             painter.setPen(QColor(255, 255, 0))
-            font = QFont("Microsoft YaHei", 10, QFont.Bold)
-            painter.setFont(font)
+            painter.setFont(self._font_status)
             painter.drawText(10, 30, f"预览: 松开Ctrl完成 ({roi.width}x{roi.height})")
 
+    @staticmethod
+    def _blit(painter: QPainter, pos: QPoint, pixmap: QPixmap, dirty: QRect):
+        """把pixmap画到pos处，只拷贝与重绘区域相交的部分"""
+        dpr = pixmap.devicePixelRatioF()
+        target = QRect(pos, (QSizeF(pixmap.size()) / dpr).toSize()).intersected(dirty)
+        if target.isEmpty():
+            return
+        source = QRectF(target.translated(-pos))
+        painter.drawPixmap(QRectF(target), pixmap,
+                           QRectF(source.topLeft() * dpr, source.size() * dpr))
+
+    def _contour_polygon(self, label: int, contour):
+        """获取超像素轮廓在屏幕坐标下的QPolygon（不足3个点时返回None）"""
+        if contour is None or len(contour) == 0:
+            return None
+
+        view = (self.scale, self.offset.x(), self.offset.y())
+        if view != self._polygon_cache_view:
+            self._polygon_cache.clear()
+            self._polygon_cache_view = view
+
+        cached = self._polygon_cache.get(label)
+        if cached is not None and cached[0] is contour:
+            return cached[1]
+
+        polygon = None
+        pts = np.asarray(contour).reshape(-1, 2)
+        if len(pts) >= 3:
+            # 与逐点int(pt * scale + offset)的截断方式一致
+            screen = (pts * self.scale + (self.offset.x(), self.offset.y())).astype(np.int64)
+            polygon = QPolygon([QPoint(x, y) for x, y in screen.tolist()])
+        self._polygon_cache[label] = (contour, polygon)
+        return polygon
+
+    def _get_roi_layer(self):
+        """
+        获取未选中ROI的预渲染图层
+
+        缓存key包含显示参数和每个未选中ROI的位置/颜色/标签，任何一项变化都会重建，
+        因此外部直接修改ROI也不需要手动失效
+
+        Returns:
+            (屏幕左上角, QPixmap)，没有需要绘制的ROI时返回None
+        """
+        selected_index = self.roi_collection.selected_index
+        key = (
+            self.scale, self.offset.x(), self.offset.y(), self.width(), self.height(),
+            self.devicePixelRatioF(), self.font().key(), selected_index,
+            # 选中的ROI不在图层里，拖拽它时图层不需要重建
+            tuple((r.x, r.y, r.width, r.height, r.color, r.node_name or r.name)
+                  for i, r in enumerate(self.roi_collection) if i != selected_index)
+        )
+        if key == self._roi_layer_key:
+            return self._roi_layer
+
+        self._roi_layer_key = key
+        self._roi_layer = None
+
+        rois = [roi for i, roi in enumerate(self.roi_collection) if i != selected_index]
+        bounds = QRect()
+        for roi in rois:
+            bounds = bounds.united(self._roi_screen_bbox(roi))
+        # 只需覆盖可见区域，放大时不会生成超大图层
+        bounds = bounds.intersected(self.rect())
+        if bounds.isEmpty():
+            return None
+
+        dpr = self.devicePixelRatioF()
+        layer = QPixmap(bounds.size() * dpr)
+        layer.setDevicePixelRatio(dpr)
+        layer.fill(Qt.transparent)
+
+        painter = QPainter(layer)
+        painter.setFont(self.font())
+        painter.translate(-bounds.topLeft())
+        for roi in rois:
+            self._draw_roi(painter, roi, False)
+        painter.end()
+
+        self._roi_layer = (bounds.topLeft(), layer)
+        return self._roi_layer
+
     def _draw_roi(self, painter: QPainter, roi: ROI, is_selected: bool):
         """绘制单个ROI"""
         screen_rect = QRect(
@@ -762,9 +1169,9 @@ class ImageCanvas(QWidget):
         # 绘制标签
         label = roi.node_name or roi.name
         if label:
-            text_rect = painter.fontMetrics().boundingRect(label)
-            text_w = text_rect.width() + 10
-            text_h = text_rect.height() + 4
+            text_size = self._label_size(label)
+            text_w = text_size.width() + 10
+            text_h = text_size.height() + 4
 
             label_rect = QRect(screen_rect.left(), screen_rect.top() - text_h, text_w, text_h)
             painter.fillRect(label_rect, QColor(0, 0, 0, 180))
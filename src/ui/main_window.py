@@ -7,6 +7,9 @@
 import os
 import sys
 import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from itertools import islice
 
 # 抑制OpenCV/libpng警告
 os.environ['OPENCV_LOG_LEVEL'] = 'ERROR'
@@ -26,17 +29,66 @@ from PyQt5.QtWidgets import (
     QProgressBar, QDialog, QDialogButtonBox, QProgressDialog,
     QSpinBox, QStackedWidget
 )
-from PyQt5.QtCore import Qt, QDir, QSize
+from PyQt5.QtCore import Qt, QDir, QSize, QObject, QThread, QTimer, pyqtSignal, pyqtSlot
 from PyQt5.QtGui import QKeySequence, QPixmap, QIcon, QFont
 
 from .image_canvas import ImageCanvas
 from ..core.screenshot import ScreenshotManager
 from ..core.crop_engine import CropEngine
 from ..core.export_manager import ExportManager
-from ..core.auto_detect import AutoDetector
-from ..core.smart_segment import SmartSegmenter
-from ..core.superpixel_segment import SuperpixelSegmenter, SuperpixelMergeTool
+from ..core.auto_detect import AutoDetector, warmup_color_mask
 from ..models.roi import ROI
+from ..utils.image_convert import cv2_to_qpixmap, qpixmap_to_cv2
+
+# 文件夹中识别为图片的扩展名
+IMAGE_EXTS = frozenset({'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp'})
+
+# 文件名中的非法字符替换为下划线
+_FILENAME_TRANS = str.maketrans({c: '_' for c in '\\/:*?"<>|'})
+
+# 悬浮工具条样式
+FLOATING_TOOLBAR_QSS = """
+    QWidget {
+        background-color: #2d2d2d;
+        border-radius: 6px;
+        border: 1px solid #444;
+    }
+    QComboBox {
+        background-color: #3d3d3d;
+        color: white;
+        border: 1px solid #555;
+        border-radius: 3px;
+        padding: 3px;
+        min-width: 100px;
+    }
+    QComboBox::drop-down {
+        border: none;
+    }
+    QComboBox QAbstractItemView {
+        background-color: #3d3d3d;
+        color: white;
+        selection-background-color: #007bff;
+    }
+    QPushButton {
+        background-color: #0d6efd;
+        color: white;
+        border: none;
+        border-radius: 3px;
+        padding: 5px 10px;
+    }
+    QPushButton:hover {
+        background-color: #0b5ed7;
+    }
+    QPushButton:disabled {
+        background-color: #6c757d;
+    }
+    QLabel {
+        color: #ddd;
+        background: transparent;
+        border: none;
+        font-size: 12px;
+    }
+"""
 
 
 class ROIDialog(QDialog):
@@ -47,6 +99,19 @@ class ROIDialog(QDialog):
     - 区域-滑动：方向、速度
     """
 
+    IMAGE_DESC = (
+        "图片类型：导出透明PNG，用于脚本中的找图匹配。\n"
+        "- 判断存在：仅检测图片是否出现\n"
+        "- 判断存在后点击：检测到后执行点击"
+    )
+    ACTION_DESC = {
+        "click": "点击：在区域中心执行点击操作，可配置单次或循环。",
+        "ocr": "OCR：识别区域内的文字内容。",
+        "swipe": "滑动：在区域内执行滑动手势。"
+    }
+    # 区域动作对应的配置页面
+    ACTION_PAGES = {"click": 1, "ocr": 2, "swipe": 3}
+
     def __init__(self, parent=None, default_name="", roi_type="image", action=""):
         super().__init__(parent)
         self.setWindowTitle("配置ROI")
@@ -87,25 +152,16 @@ class ROIDialog(QDialog):
         basic_group.setLayout(basic_layout)
         layout.addWidget(basic_group)
 
-        # 动态配置区域
+        # 动态配置区域：0图片 / 1区域-点击 / 2区域-OCR / 3区域-滑动，
+        # 各页面第一次切换到时才创建（见_show_page）
         self.config_stack = QStackedWidget()
-
-        # 1. 图片配置页面
-        self.image_page = self._create_image_page()
-        self.config_stack.addWidget(self.image_page)
-
-        # 2. 区域-点击配置页面
-        self.click_page = self._create_click_page()
-        self.config_stack.addWidget(self.click_page)
-
-        # 3. 区域-OCR配置页面（简单，无额外配置）
-        self.ocr_page = self._create_ocr_page()
-        self.config_stack.addWidget(self.ocr_page)
-
-        # 4. 区域-滑动配置页面
-        self.swipe_page = self._create_swipe_page()
-        self.config_stack.addWidget(self.swipe_page)
-
+        self._page_factories = {
+            0: self._create_image_page,
+            1: self._create_click_page,
+            2: self._create_ocr_page,
+            3: self._create_swipe_page,
+        }
+        self._pages = {}
         layout.addWidget(self.config_stack)
 
         # 说明文字
@@ -131,6 +187,17 @@ class ROIDialog(QDialog):
         if default_name:
             self.on_node_name_changed(default_name)
 
+    def _show_page(self, index: int):
+        """切换到配置页面，不存在时先创建"""
+        page = self._pages.get(index)
+        if page is None:
+            page = self._page_factories[index]()
+            self._pages[index] = page
+            self.config_stack.addWidget(page)
+            if index == 1:
+                self.on_click_mode_changed()
+        self.config_stack.setCurrentWidget(page)
+
     def _create_image_page(self):
         """创建图片配置页面"""
         page = QWidget()
@@ -209,16 +276,18 @@ class ROIDialog(QDialog):
     def on_node_name_changed(self, text):
         """节点名称改变时，自动更新图片文件名（仅在图片类型时）"""
         # 只在图片类型时同步
-        if self.type_combo.currentData() != "image":
+        if self.type_combo.currentData() != "image" or 0 not in self._pages:
+            return
+
+        new_img_name = f"{text}.png" if text else ""
+        current_img_name = self.image_name_input.text()
+        if current_img_name == new_img_name:
             return
 
-        current_img_name = self.image_name_input.text().strip()
-        if not current_img_name:
-            # 空值，直接设置
-            self.image_name_input.setText(f"{text}.png" if text else "")
-        elif current_img_name.endswith('.png'):
-            # 图片名以.png结尾，直接更新为节点名.png
-            self.image_name_input.setText(f"{text}.png" if text else "")
+        # 空值或以.png结尾时跟随节点名，其他内容视为用户手动填写，不覆盖
+        current_img_name = current_img_name.strip()
+        if not current_img_name or current_img_name.endswith('.png'):
+            self.image_name_input.setText(new_img_name)
 
     def on_type_changed(self):
         """类型改变时更新UI"""
@@ -229,12 +298,8 @@ class ROIDialog(QDialog):
         self.action_combo.setVisible(is_region)
 
         if roi_type == "image":
-            self.config_stack.setCurrentIndex(0)  # 图片页面
-            self.desc_label.setText(
-                "图片类型：导出透明PNG，用于脚本中的找图匹配。\n"
-                "- 判断存在：仅检测图片是否出现\n"
-                "- 判断存在后点击：检测到后执行点击"
-            )
+            self._show_page(0)  # 图片页面
+            self.desc_label.setText(self.IMAGE_DESC)
         else:
             # 区域类型，根据动作显示不同页面
             self.on_action_changed()
@@ -242,17 +307,10 @@ class ROIDialog(QDialog):
     def on_action_changed(self):
         """区域动作改变时更新UI"""
         action = self.action_combo.currentData()
-
-        action_desc = {
-            "click": "点击：在区域中心执行点击操作，可配置单次或循环。",
-            "ocr": "OCR：识别区域内的文字内容。",
-            "swipe": "滑动：在区域内执行滑动手势。"
-        }
-        self.desc_label.setText(action_desc.get(action, ""))
+        self.desc_label.setText(self.ACTION_DESC.get(action, ""))
 
         # 切换对应页面
-        page_map = {"click": 1, "ocr": 2, "swipe": 3}
-        self.config_stack.setCurrentIndex(page_map.get(action, 2))
+        self._show_page(self.ACTION_PAGES.get(action, 2))
 
     def on_click_mode_changed(self):
         """点击模式改变"""
@@ -262,7 +320,8 @@ class ROIDialog(QDialog):
     def showEvent(self, event):
         """显示时初始化状态"""
         super().showEvent(event)
-        self.on_click_mode_changed()
+        if 1 in self._pages:
+            self.on_click_mode_changed()
 
     def get_config(self):
         """获取配置结果"""
@@ -304,9 +363,118 @@ class ROIDialog(QDialog):
         return config
 
 
+class DetectWorker(QObject):
+    """点选检测工作对象 - 在后台线程中运行AutoDetector.detect_at_point"""
+
+    done = pyqtSignal(object, object)  # (ROI或None, 请求)
+    failed = pyqtSignal(str, object)   # (错误信息, 请求)
+
+    def __init__(self, detector: AutoDetector):
+        super().__init__()
+        self.detector = detector
+
+    @pyqtSlot(object)
+    def detect(self, request: dict):
+        """执行一次检测，request包含img/x/y/merge_all"""
+        try:
+            roi = self.detector.detect_at_point(request['img'], request['x'], request['y'],
+                                                merge_all=request['merge_all'])
+        except Exception as e:
+            self.failed.emit(str(e), request)
+            return
+        self.done.emit(roi, request)
+
+
+class SuperpixelWorker(QObject):
+    """超像素工作对象 - 在后台线程中分割并生成叠加图"""
+
+    done = pyqtSignal(object, object, object)  # (分割器, 叠加图BGR数组或None, 请求)
+    failed = pyqtSignal(str, object)           # (错误信息, 请求)
+
+    @pyqtSlot(object)
+    def segment(self, request: dict):
+        """执行一次分割，request包含img/region_size"""
+        try:
+            from ..core.superpixel_segment import SuperpixelSegmenter
+
+            segmenter = SuperpixelSegmenter(region_size=request['region_size'], ruler=10.0)
+            # 已在后台线程中，顺便为所有区域提取轮廓，点选合并时不再在主线程中现算
+            regions = segmenter.segment(request['img'], extract_contours=True)
+            vis = segmenter.visualize(request['img'], alpha=0.3) if regions else None
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self.failed.emit(str(e), request)
+            return
+        self.done.emit(segmenter, vis, request)
+
+
+class ExportWorker(QObject):
+    """导出工作对象 - 在后台线程中批量切图并生成数据文件"""
+
+    done = pyqtSignal(object, object)  # (切图结果列表, 格式 -> 文件路径)
+    failed = pyqtSignal(str)
+
+    def __init__(self, crop_engine: CropEngine, export_mgr: ExportManager):
+        super().__init__()
+        self.crop_engine = crop_engine
+        self.export_mgr = export_mgr
+
+    @pyqtSlot(object)
+    def export(self, request: dict):
+        """执行一次导出，request包含image(BGR数组或QImage)/rois/prefix/source_info/formats/roi_dicts"""
+        image = request['image']
+        if isinstance(image, np.ndarray):
+            crop_all = self.crop_engine.crop_all_from_ndarray
+        else:
+            crop_all = self.crop_engine.crop_all_from_image
+        try:
+            crop_results = crop_all(image, request['rois'], request['prefix'])
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self.failed.emit(str(e))
+            return
+
+        # 根据选择导出
+        rois = request['rois']
+        source_info = request['source_info']
+        formats = request['formats']
+        results = {}
+        if 'json' in formats:
+            try:
+                results['json'] = self.export_mgr.export_json(
+                    rois, source_info, roi_dicts=request['roi_dicts'])
+            except Exception as e:
+                print(f"导出JSON失败: {e}")
+
+        if 'autojs' in formats:
+            try:
+                results['autojs'] = self.export_mgr.export_autojs(rois, source_info)
+            except Exception as e:
+                print(f"导出Auto.js失败: {e}")
+
+        if 'python' in formats:
+            try:
+                results['python'] = self.export_mgr.export_python(rois, source_info)
+            except Exception as e:
+                print(f"导出Python失败: {e}")
+
+        self.done.emit(crop_results, results)
+
+
 class MainWindow(QMainWindow):
     """主窗口"""
 
+    # 投递到检测线程的请求（跨线程信号自动排队）
+    _detect_requested = pyqtSignal(object)
+    # 投递到超像素线程的请求
+    _superpixel_requested = pyqtSignal(object)
+    # 投递到导出线程的请求
+    _export_requested = pyqtSignal(object)
+    # 后台查询到的ADB状态：(ADB是否可用, 设备数)
+    _adb_status_ready = pyqtSignal(bool, int)
+
     def __init__(self):
         super().__init__()
 
@@ -318,10 +486,49 @@ class MainWindow(QMainWindow):
         self.crop_engine = CropEngine()
         self.export_mgr = ExportManager()
         self.auto_detector = AutoDetector()
-        self.smart_segmenter = SmartSegmenter()
-        self.superpixel_segmenter = SuperpixelSegmenter()
+        # 分割器大多数会话用不到，第一次访问时才导入模块并创建（见同名属性）
+        self._smart_segmenter = None
+        self._superpixel_segmenter = None
         self.superpixel_merge = None
 
+        # 自动检测模式的点击检测放到后台线程；检测中再点击时只保留最新一次请求
+        self._detect_thread = QThread(self)
+        self._detect_worker = DetectWorker(self.auto_detector)
+        self._detect_worker.moveToThread(self._detect_thread)
+        self._detect_requested.connect(self._detect_worker.detect)
+        self._detect_worker.done.connect(self._on_detect_done)
+        self._detect_worker.failed.connect(self._on_detect_failed)
+        self._detect_thread.start()
+        # 检测线程会用到Numba并行核，先在主线程启动它的线程池（进入事件循环后执行，不拖慢启动）
+        QTimer.singleShot(0, warmup_color_mask)
+        self._detect_busy = False
+        self._detect_pending = None
+
+        # 超像素分割耗时数秒，同样放到后台线程，避免阻塞事件循环
+        self._sp_thread = QThread(self)
+        self._sp_worker = SuperpixelWorker()
+        self._sp_worker.moveToThread(self._sp_thread)
+        self._superpixel_requested.connect(self._sp_worker.segment)
+        self._sp_worker.done.connect(self._on_superpixel_done)
+        self._sp_worker.failed.connect(self._on_superpixel_failed)
+        self._sp_thread.start()
+        self._sp_progress = None
+        # 分割结果缓存：(pixmap.cacheKey(), 区域大小) -> (分割器, 叠加图)，同一张图同一粒度重新生成时直接复用
+        self._sp_cache = OrderedDict()
+        self._sp_cache_size = 4
+
+        # 导出全部时的切图和数据文件生成放到后台线程
+        self._export_thread = QThread(self)
+        self._export_worker = ExportWorker(self.crop_engine, self.export_mgr)
+        self._export_worker.moveToThread(self._export_thread)
+        self._export_requested.connect(self._export_worker.export)
+        self._export_worker.done.connect(self._on_export_done)
+        self._export_worker.failed.connect(self._on_export_failed)
+        self._export_thread.start()
+        self._export_progress = None
+        # 导出选项对话框（首次导出时创建，之后复用）
+        self._export_dialog = None
+
         # 切图模式: "superpixel" | "auto_detect" | "manual"
         self.crop_mode = "manual"
         self.superpixel_generated = False  # 是否已生成超像素
@@ -333,8 +540,10 @@ class MainWindow(QMainWindow):
             'roi': None,    # 自动检测时选中的ROI
         }
 
-        # 待导出切图列表
-        self.pending_crops = []
+        # 待导出切图列表（按roi_id索引，保持添加顺序）
+        self.pending_crops = OrderedDict()
+        # 待导出切图的名称计数，用于重名检查（只能通过_add_pending等方法修改pending_crops）
+        self._pending_names = Counter()
 
         # 当前状态
         self.current_image_path = ""
@@ -346,7 +555,7 @@ class MainWindow(QMainWindow):
         self.output_dir = os.path.join(os.getcwd(), "res_output")
         os.makedirs(self.output_dir, exist_ok=True)
         self.crop_engine.set_output_dir(self.output_dir)
-        self.export_mgr.output_dir = self.output_dir
+        self.export_mgr.set_output_dir(self.output_dir)
 
         self.init_ui()
         self.init_menu()
@@ -354,12 +563,67 @@ class MainWindow(QMainWindow):
         self.init_shortcuts()
         self.init_statusbar()
 
+        # 鼠标坐标标签的刷新节流（拖拽时画布逐个发送mouse_moved）
+        self._pending_mouse_xy = None
+        self._mouse_label_timer = QTimer(self)
+        self._mouse_label_timer.setSingleShot(True)
+        self._mouse_label_timer.setInterval(16)
+        self._mouse_label_timer.timeout.connect(self._flush_mouse_pos)
+
+        # ADB状态每5秒刷新一次（窗口隐藏或不在前台时跳过），加载本地图片等与ADB无关的操作不再触发；
+        # adb devices在screenshot_mgr的线程池中执行，结果通过信号回到界面线程。启动后先查询一次
+        self._adb_status_future = None
+        self._adb_status_ready.connect(self._on_adb_status_ready)
+        self._adb_status_timer = QTimer(self)
+        self._adb_status_timer.setInterval(5000)
+        self._adb_status_timer.timeout.connect(self._on_adb_status_tick)
+        self._adb_status_timer.start()
+        QTimer.singleShot(0, self.update_adb_status)
+
         # 连接信号
         self.connect_canvas_signals()
 
         # 初始化默认模式（确保画布状态一致）
         self.set_crop_mode("manual")
 
+    @property
+    def smart_segmenter(self):
+        """GrabCut分割器（延迟创建）"""
+        if self._smart_segmenter is None:
+            from ..core.smart_segment import SmartSegmenter
+            self._smart_segmenter = SmartSegmenter()
+        return self._smart_segmenter
+
+    @property
+    def superpixel_segmenter(self):
+        """超像素分割器（延迟创建，生成超像素时会替换为按粒度新建的实例）"""
+        if self._superpixel_segmenter is None:
+            from ..core.superpixel_segment import SuperpixelSegmenter
+            self._superpixel_segmenter = SuperpixelSegmenter()
+        return self._superpixel_segmenter
+
+    @superpixel_segmenter.setter
+    def superpixel_segmenter(self, segmenter):
+        self._superpixel_segmenter = segmenter
+
+    def closeEvent(self, event):
+        """关闭窗口时停止ADB状态刷新以及检测、超像素和导出线程"""
+        # 导出进行中不允许关闭：正在执行的导出不会被quit打断，强行关闭会留下写了一半的文件
+        if self._export_progress is not None:
+            QMessageBox.information(self, "提示", "正在导出，请等待导出完成后再关闭")
+            event.ignore()
+            return
+
+        self._adb_status_timer.stop()
+        threads = (self._detect_thread, self._sp_thread, self._export_thread)
+        for thread in threads:
+            thread.quit()
+        # 检测和超像素结果可以丢弃，最多等2秒；导出线程必须等到真正退出
+        self._detect_thread.wait(2000)
+        self._sp_thread.wait(2000)
+        self._export_thread.wait()
+        super().closeEvent(event)
+
     def init_ui(self):
         """初始化UI"""
         central = QWidget()
@@ -532,49 +796,13 @@ class MainWindow(QMainWindow):
         self.floating_toolbar.mouseMoveEvent = self._toolbar_mouse_move
         self.floating_toolbar.mouseReleaseEvent = self._toolbar_mouse_release
         self._toolbar_drag_pos = None
+        self._toolbar_pending_pos = None
+        self._toolbar_move_timer = QTimer(self)
+        self._toolbar_move_timer.setSingleShot(True)
+        self._toolbar_move_timer.setInterval(16)
+        self._toolbar_move_timer.timeout.connect(self._apply_toolbar_pos)
         # 保持为普通子窗口，不使用Qt.Tool，这样不会跑到主窗口外面
-        self.floating_toolbar.setStyleSheet("""
-            QWidget {
-                background-color: #2d2d2d;
-                border-radius: 6px;
-                border: 1px solid #444;
-            }
-            QComboBox {
-                background-color: #3d3d3d;
-                color: white;
-                border: 1px solid #555;
-                border-radius: 3px;
-                padding: 3px;
-                min-width: 100px;
-            }
-            QComboBox::drop-down {
-                border: none;
-            }
-            QComboBox QAbstractItemView {
-                background-color: #3d3d3d;
-                color: white;
-                selection-background-color: #007bff;
-            }
-            QPushButton {
-                background-color: #0d6efd;
-                color: white;
-                border: none;
-                border-radius: 3px;
-                padding: 5px 10px;
-            }
-            QPushButton:hover {
-                background-color: #0b5ed7;
-            }
-            QPushButton:disabled {
-                background-color: #6c757d;
-            }
-            QLabel {
-                color: #ddd;
-                background: transparent;
-                border: none;
-                font-size: 12px;
-            }
-        """)
+        self.floating_toolbar.setStyleSheet(FLOATING_TOOLBAR_QSS)
 
         layout = QHBoxLayout(self.floating_toolbar)
         layout.setContentsMargins(8, 4, 8, 4)
@@ -641,13 +869,26 @@ class MainWindow(QMainWindow):
             # 确保不超出边界
             new_pos.setX(max(0, min(new_pos.x(), parent_rect.width() - toolbar_rect.width())))
             new_pos.setY(max(0, min(new_pos.y(), parent_rect.height() - toolbar_rect.height())))
-            self.floating_toolbar.move(new_pos)
+            # 每16ms最多移动一次，期间只保留最新位置
+            self._toolbar_pending_pos = new_pos
+            if not self._toolbar_move_timer.isActive():
+                self._apply_toolbar_pos()
+                self._toolbar_move_timer.start()
             event.accept()
 
+    def _apply_toolbar_pos(self):
+        """把工具条移动到最新的拖动位置"""
+        pos = self._toolbar_pending_pos
+        self._toolbar_pending_pos = None
+        if pos is not None:
+            self.floating_toolbar.move(pos)
+
     def _toolbar_mouse_release(self, event):
         """工具条鼠标释放 - 结束拖动"""
         if event.button() == Qt.LeftButton:
             self._toolbar_drag_pos = None
+            self._toolbar_move_timer.stop()
+            self._apply_toolbar_pos()
             event.accept()
 
     def connect_canvas_signals(self):
@@ -670,43 +911,47 @@ class MainWindow(QMainWindow):
     # ==================== 信号处理 ====================
 
     def on_mouse_moved(self, x, y):
-        """鼠标移动"""
-        self.label_mouse_pos.setText(f"X: {x}, Y: {y}")
-
-    def on_point_clicked(self, x: int, y: int, continuous: bool = False):
+        """鼠标移动（坐标标签最多约60Hz刷新，间隔内只保留最新坐标）"""
+        self._pending_mouse_xy = (x, y)
+        if not self._mouse_label_timer.isActive():
+            self._flush_mouse_pos()
+            self._mouse_label_timer.start()
+
+    def _flush_mouse_pos(self):
+        """把最新的鼠标坐标写到标签上"""
+        xy = self._pending_mouse_xy
+        self._pending_mouse_xy = None
+        if xy is not None:
+            self.label_mouse_pos.setText(f"X: {xy[0]}, Y: {xy[1]}")
+
+    def on_point_clicked(self, x: int, y: int, continuous: bool = False, modifiers: int = None):
         """点选识别 - 使用颜色连通区域检测，添加命名和待导出列表
 
         Args:
             x, y: 点击位置
             continuous: 是否连续模式（Ctrl按住时不显示消息）
+            modifiers: 点击事件携带的修饰键（未提供时读取当前键盘状态）
         """
-        from PyQt5.QtWidgets import QApplication
-        from PyQt5.QtCore import Qt
-
         pixmap = self.canvas.get_pixmap()
         if not pixmap:
             return
 
         # 检测是否按住Shift - 合并所有相似颜色
-        modifiers = QApplication.keyboardModifiers()
-        merge_all = modifiers & Qt.ShiftModifier
+        if modifiers is None:
+            modifiers = int(QApplication.keyboardModifiers())
+        merge_all = bool(modifiers & Qt.ShiftModifier)
 
         mode_text = "合并相似颜色" if merge_all else "识别连通区域"
         if not continuous:
             self.statusbar.showMessage(f"正在{mode_text} ({x}, {y})...")
 
         try:
-            roi = self.auto_detector.detect_at_point(pixmap, x, y, merge_all=merge_all)
+            roi = self.auto_detector.detect_at_point(self.canvas.get_bgr_ndarray(), x, y, merge_all=merge_all)
 
             if roi:
                 # 检查是否已存在相同位置的ROI（避免连续模式下重复添加）
-                if continuous:
-                    for existing in self.canvas.roi_collection:
-                        if (abs(existing.x - roi.x) < 5 and
-                            abs(existing.y - roi.y) < 5 and
-                            abs(existing.width - roi.width) < 5 and
-                            abs(existing.height - roi.height) < 5):
-                            return  # 已存在，跳过
+                if continuous and self.canvas.roi_collection.find_similar(roi) >= 0:
+                    return  # 已存在，跳过
 
                 # 弹出命名对话框
                 if not continuous:
@@ -729,9 +974,9 @@ class MainWindow(QMainWindow):
                 self.canvas.update()
 
                 # 添加到待导出列表
-                self.pending_crops.append({
+                self._add_pending({
                     'roi': roi,
-                    'regions': None,  # 自动检测没有regions
+                    'mask': None,  # 自动检测没有超像素mask
                     'name': roi.name,
                     'type': 'auto_detect'
                 })
@@ -752,25 +997,57 @@ class MainWindow(QMainWindow):
             traceback.print_exc()
 
     def on_auto_detect_click(self, x: int, y: int):
-        """自动检测模式：点击立即检测并显示预览"""
-        pixmap = self.canvas.get_pixmap()
-        if not pixmap:
+        """自动检测模式：点击后在后台线程检测，完成后显示预览"""
+        img = self.canvas.get_bgr_ndarray()
+        if img is None:
             return
 
-        # 显示进度提示
+        request = {'img': img, 'x': x, 'y': y, 'merge_all': False}
         self.statusbar.showMessage(f"正在检测位置 ({x}, {y})...")
-        QApplication.processEvents()
+        if self._detect_busy:
+            # 上一次检测还没结束：替换掉排队中的旧请求
+            self._detect_pending = request
+            return
+        self._submit_detect(request)
+
+    def _submit_detect(self, request: dict):
+        """把检测请求投递到检测线程"""
+        self._detect_busy = True
+        self._detect_requested.emit(request)
+
+    def _finish_detect(self) -> bool:
+        """一次检测结束；有排队的新请求时投递它并返回True（当前结果已过时）"""
+        self._detect_busy = False
+        pending = self._detect_pending
+        if pending is None:
+            return False
+        self._detect_pending = None
+        self._submit_detect(pending)
+        return True
+
+    def _detect_still_valid(self, request: dict) -> bool:
+        """检测期间换图、切换模式或松开Ctrl后，结果不再显示"""
+        return (self.canvas.crop_mode == "auto_detect" and self.canvas._ctrl_active and
+                self.canvas.get_bgr_ndarray() is request['img'])
+
+    def _on_detect_done(self, roi, request: dict):
+        """检测线程返回结果"""
+        if self._finish_detect() or not self._detect_still_valid(request):
+            return
 
-        try:
-            roi = self.auto_detector.detect_at_point(pixmap, x, y, merge_all=False)
-            if roi:
-                self.canvas.temp_roi = roi
-                self.statusbar.showMessage(f"检测到区域: {roi.width}x{roi.height}, 松开Ctrl完成命名")
-                self.canvas.update()
-            else:
-                self.statusbar.showMessage(f"位置 ({x}, {y}) 未能识别")
-        except Exception as e:
-            self.statusbar.showMessage(f"检测失败: {str(e)}")
+        x, y = request['x'], request['y']
+        if roi:
+            self.canvas.temp_roi = roi
+            self.statusbar.showMessage(f"检测到区域: {roi.width}x{roi.height}, 松开Ctrl完成命名")
+            self.canvas.update()
+        else:
+            self.statusbar.showMessage(f"位置 ({x}, {y}) 未能识别")
+
+    def _on_detect_failed(self, message: str, request: dict):
+        """检测线程抛出异常"""
+        if self._finish_detect() or not self._detect_still_valid(request):
+            return
+        self.statusbar.showMessage(f"检测失败: {message}")
 
     def on_auto_detect_finish(self, roi: ROI):
         """自动检测完成（Ctrl释放）：添加ROI到画布并弹出配置对话框"""
@@ -798,10 +1075,7 @@ class MainWindow(QMainWindow):
         if dialog.exec_() != QDialog.Accepted:
             # 用户取消，删除刚创建的ROI
             # 找到并删除刚创建的ROI（通过roi_id匹配）
-            for i, existing_roi in enumerate(self.canvas.roi_collection):
-                if existing_roi.roi_id == roi.roi_id:
-                    self.canvas.roi_collection.remove(i)
-                    break
+            self.canvas.roi_collection.remove(self.canvas.roi_collection.index_of(roi.roi_id))
             self.canvas.update()
             # 重置画布状态（对话框期间可能丢失键盘事件）
             self._reset_canvas_state()
@@ -831,12 +1105,7 @@ class MainWindow(QMainWindow):
 
         # 检查重名（基于node_name）
         base_name = roi.node_name
-        existing_names = {c['name'] for c in self.pending_crops}
-        final_name = base_name
-        suffix = 1
-        while final_name in existing_names:
-            final_name = f"{base_name}_{suffix}"
-            suffix += 1
+        final_name = self._unique_pending_name(base_name)
 
         if final_name != base_name:
             roi.node_name = final_name
@@ -859,10 +1128,10 @@ class MainWindow(QMainWindow):
             type_desc = "区域(无动作)"
 
         # 添加到待导出列表
-        self.pending_crops.append({
+        self._add_pending({
             'roi_id': roi.roi_id,
             'roi': roi,
-            'regions': None,
+            'mask': None,
             'name': roi.node_name,
             'type': roi.roi_type,
             'action': roi.action
@@ -905,9 +1174,7 @@ class MainWindow(QMainWindow):
 
         if roi_to_delete:
             # 使用roi_id匹配，避免对象引用问题
-            original_count = len(self.pending_crops)
-            self.pending_crops = [crop for crop in self.pending_crops if crop.get('roi_id') != roi_to_delete.roi_id]
-            if len(self.pending_crops) < original_count:
+            if self._remove_pending_roi(roi_to_delete.roi_id):
                 self.update_pending_crop_list()
 
         self.update_roi_info()
@@ -941,9 +1208,12 @@ class MainWindow(QMainWindow):
     # ==================== 超像素分割 ====================
 
     def run_superpixel(self):
-        """执行超像素分割"""
-        pixmap = self.canvas.get_pixmap()
-        if not pixmap:
+        """执行超像素分割（在后台线程中进行，完成后由_on_superpixel_done处理）"""
+        if self._sp_progress is not None:
+            return
+
+        img = self.canvas.get_bgr_ndarray()
+        if img is None:
             QMessageBox.warning(self, "错误", "请先加载图片")
             return
 
@@ -951,6 +1221,13 @@ class MainWindow(QMainWindow):
         region_sizes = [20, 30, 50, 80]
         region_size = region_sizes[self.combo_sp_size.currentIndex()]
 
+        key = (self.canvas.get_pixmap().cacheKey(), region_size)
+        cached = self._sp_cache.get(key)
+        if cached is not None:
+            self._sp_cache.move_to_end(key)
+            self._apply_superpixel(*cached)
+            return
+
         # 显示进度对话框
         progress = QProgressDialog("正在生成超像素...\n这可能需要几秒钟", None, 0, 0, self)
         progress.setWindowTitle("处理中")
@@ -958,52 +1235,69 @@ class MainWindow(QMainWindow):
         progress.setMinimumDuration(0)
         progress.setCancelButton(None)
         progress.show()
-        QApplication.processEvents()
+        self._sp_progress = progress
 
         self.statusbar.showMessage(f"正在生成超像素 (区域大小: {region_size}px)...")
         self.btn_regenerate_sp.setEnabled(False)
         self.btn_regenerate_sp.setText("处理中...")
-        QApplication.processEvents()
 
-        try:
-            # 创建新的分割器
-            self.superpixel_segmenter = SuperpixelSegmenter(region_size=region_size, ruler=10.0)
-            regions = self.superpixel_segmenter.segment(pixmap)
+        # QPixmap不是线程安全的，只把BGR数组交给后台线程
+        self._superpixel_requested.emit({'img': img, 'region_size': region_size, 'key': key})
 
-            progress.close()
+    def _finish_superpixel(self):
+        """关闭进度对话框并恢复按钮"""
+        self._sp_progress.close()
+        self._sp_progress = None
+        self.btn_regenerate_sp.setEnabled(True)
 
-            if regions:
-                # 创建合并工具
-                self.superpixel_merge = SuperpixelMergeTool(self.superpixel_segmenter)
+    def _on_superpixel_done(self, segmenter, vis, request: dict):
+        """超像素线程返回结果"""
+        self._finish_superpixel()
+        if self.canvas.get_bgr_ndarray() is not request['img']:
+            # 分割期间图片已经更换，结果作废
+            self.btn_regenerate_sp.setText("生成")
+            self.statusbar.showMessage("图片已更换，超像素结果已丢弃")
+            return
 
-                # 生成可视化叠加图
-                img = self._qpixmap_to_cv2(pixmap)
-                if img is not None:
-                    vis = self.superpixel_segmenter.visualize(img, alpha=0.3)
-                    self.superpixel_overlay = self._cv2_to_qpixmap(vis)
+        if not segmenter.regions:
+            self.superpixel_segmenter = segmenter
+            QMessageBox.warning(self, "错误", "超像素分割失败")
+            self.btn_regenerate_sp.setText("生成")
+            self.canvas.update()
+            return
 
-                self.superpixel_mode = True
-                self.superpixel_generated = True
-                self.btn_regenerate_sp.setText("重新生成")
+        overlay = self._cv2_to_qpixmap(vis)
+        self._sp_cache[request['key']] = (segmenter, overlay)
+        while len(self._sp_cache) > self._sp_cache_size:
+            self._sp_cache.popitem(last=False)
+        self._apply_superpixel(segmenter, overlay)
 
-                # 同步到画布
-                self.canvas.show_superpixel = True
-                self.canvas.superpixel_overlay = self.superpixel_overlay
-                self.canvas.superpixel_selected = set()
+    def _apply_superpixel(self, segmenter, overlay: QPixmap):
+        """使用分割结果：创建合并工具并同步叠加图到画布"""
+        from ..core.superpixel_segment import SuperpixelMergeTool
 
-                self.statusbar.showMessage(f"超像素生成完成: {len(regions)} 个区域")
-            else:
-                QMessageBox.warning(self, "错误", "超像素分割失败")
-                self.btn_regenerate_sp.setText("生成")
+        self.superpixel_segmenter = segmenter
+        # 创建合并工具
+        self.superpixel_merge = SuperpixelMergeTool(segmenter)
+        self.superpixel_overlay = overlay
 
-        except Exception as e:
-            progress.close()
-            QMessageBox.warning(self, "错误", f"超像素分割失败: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            self.btn_regenerate_sp.setText("生成")
+        self.superpixel_mode = True
+        self.superpixel_generated = True
+        self.btn_regenerate_sp.setText("重新生成")
 
-        self.btn_regenerate_sp.setEnabled(True)
+        # 同步到画布
+        self.canvas.show_superpixel = True
+        self.canvas.superpixel_overlay = overlay
+        self.canvas.superpixel_selected = set()
+
+        self.statusbar.showMessage(f"超像素生成完成: {len(segmenter.regions)} 个区域")
+        self.canvas.update()
+
+    def _on_superpixel_failed(self, message: str, request: dict):
+        """超像素线程抛出异常"""
+        self._finish_superpixel()
+        QMessageBox.warning(self, "错误", f"超像素分割失败: {message}")
+        self.btn_regenerate_sp.setText("生成")
         self.canvas.update()
 
     def toggle_sp_boundary(self, state):
@@ -1074,9 +1368,9 @@ class MainWindow(QMainWindow):
         progress.show()
         QApplication.processEvents()
 
-        # 获取选中的区域（使用字典优化查找）
-        region_map = {r.label: r for r in self.superpixel_segmenter.regions}
-        regions = [region_map[label] for label in labels_set if label in region_map]
+        # 获取选中的区域（按标签字典查找）
+        segmenter = self.superpixel_segmenter
+        regions = [r for r in map(segmenter.get_region, labels_set) if r is not None]
 
         if len(regions) < 1:
             progress.close()
@@ -1088,13 +1382,7 @@ class MainWindow(QMainWindow):
         progress.close()
         if roi:
             # 检查重名
-            base_name = f"crop_{len(self.pending_crops)+1}"
-            existing_names = {c['name'] for c in self.pending_crops}
-            suggested_name = base_name
-            suffix = 1
-            while suggested_name in existing_names:
-                suggested_name = f"{base_name}_{suffix}"
-                suffix += 1
+            suggested_name = self._unique_pending_name(f"crop_{len(self.pending_crops)+1}")
 
             # 弹出ROI配置对话框（与自动检测/手动框选统一）
             dialog = ROIDialog(self, default_name=suggested_name, roi_type="image")
@@ -1122,10 +1410,11 @@ class MainWindow(QMainWindow):
                         roi.swipe_speed = config["swipe_speed"]
 
                 # 添加到待导出列表
-                self.pending_crops.append({
+                self._add_pending({
                     'roi_id': roi.roi_id,
                     'roi': roi,
-                    'regions': regions,
+                    # 只保存合并后的外接框mask，不引用区域对象（否则会一直持有整图标签图）
+                    'mask': segmenter.merged_mask(regions),
                     'name': roi.node_name,
                     'type': roi.roi_type,
                     'action': roi.action
@@ -1183,26 +1472,19 @@ class MainWindow(QMainWindow):
         if labels_map is None:
             return False
 
-        h, w = labels_map.shape
-
-        # 获取目标区域的坐标
-        target_coords = np.argwhere(labels_map == label)
-        if len(target_coords) == 0:
+        region = self.superpixel_segmenter.get_region(label)
+        if region is None:
             return False
 
-        # 检查8邻域是否有已选区域
-        for cy, cx in target_coords[::10]:  # 采样加速
-            for dy in [-1, 0, 1]:
-                for dx in [-1, 0, 1]:
-                    if dy == 0 and dx == 0:
-                        continue
-                    ny, nx = cy + dy, cx + dx
-                    if 0 <= ny < h and 0 <= nx < w:
-                        neighbor_label = labels_map[ny, nx]
-                        if neighbor_label in selected_labels:
-                            return True
-
-        return False
+        # 只在区域外接矩形外扩1像素的窗口内比较：膨胀一次得到8邻域的外圈
+        x, y, bw, bh = region.bbox
+        h, w = labels_map.shape
+        x0, y0 = max(x - 1, 0), max(y - 1, 0)
+        window = labels_map[y0:min(y + bh + 1, h), x0:min(x + bw + 1, w)]
+        target = (window == label).astype(np.uint8)
+        ring = cv2.dilate(target, np.ones((3, 3), np.uint8)) > target
+        neighbors = np.unique(window[ring])
+        return bool(np.isin(neighbors, np.fromiter(selected_labels, dtype=neighbors.dtype)).any())
 
     def merge_selected_superpixels(self):
         """手动合并按钮（备用）"""
@@ -1233,113 +1515,86 @@ class MainWindow(QMainWindow):
 
     def _qpixmap_to_cv2(self, pixmap: QPixmap) -> np.ndarray:
         """QPixmap转OpenCV格式"""
-        from PyQt5.QtGui import QImage
-
-        if pixmap.isNull():
-            return None
-
-        image = pixmap.toImage()
-        if image.format() != QImage.Format_RGB888:
-            image = image.convertToFormat(QImage.Format_RGB888)
-
-        width = image.width()
-        height = image.height()
-        ptr = image.bits()
-        ptr.setsize(image.byteCount())
-
-        arr = np.array(ptr).reshape(height, width, 3)
-        arr = cv2.cvtColor(arr, cv2.COLOR_RGB2BGR)
-
-        return arr
+        return qpixmap_to_cv2(pixmap)
 
     def _cv2_to_qpixmap(self, img: np.ndarray) -> QPixmap:
         """OpenCV格式转QPixmap"""
-        from PyQt5.QtGui import QImage
+        return cv2_to_qpixmap(img)
 
-        if len(img.shape) == 3:
-            rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        else:
-            rgb = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
+    def _save_superpixel_crop(self, pixmap, roi: ROI, mask=None, filename: str = None):
+        """保存透明背景切图 - 支持超像素和普通ROI（pixmap可以是QPixmap或BGR数组）"""
+        img = pixmap if isinstance(pixmap, np.ndarray) else self._qpixmap_to_cv2(pixmap)
+        if img is None:
+            return None
+        return self._write_transparent_crop(img, roi, mask, self._crop_filepath(roi, filename))
+
+    def _crop_filepath(self, roi: ROI, filename: str = None) -> str:
+        """透明切图的保存路径（读取前缀输入框，只能在主线程调用）"""
+        # 使用传入的filename或从ROI名字生成
+        if filename is None:
+            # 使用node_name或name作为文件名，保留中文字符
+            name = roi.node_name or roi.name
+            # 移除文件名中的非法字符
+            safe_name = name.translate(_FILENAME_TRANS).strip()
+            if not safe_name:
+                safe_name = f"crop_{int(time.time())}"
+            filename = f"{safe_name}.png"
+
+        # 添加前缀
+        prefix = self.prefix_input.text().strip()
+        if prefix:
+            filename = f"{prefix}{filename}"
 
-        h, w = rgb.shape[:2]
-        bytes_per_line = 3 * w
-        qt_image = QImage(rgb.data, w, h, bytes_per_line, QImage.Format_RGB888)
-        return QPixmap.fromImage(qt_image)
+        return os.path.join(self.output_dir, filename)
 
-    def _save_superpixel_crop(self, pixmap: QPixmap, roi: ROI, regions: list = None, filename: str = None):
-        """保存透明背景切图 - 支持超像素和普通ROI"""
-        try:
-            # 转换图片
-            img = self._qpixmap_to_cv2(pixmap)
-            if img is None:
-                return None
+    @staticmethod
+    def _write_transparent_crop(img: np.ndarray, roi: ROI, mask, filepath: str):
+        """
+        裁剪、生成透明mask并编码写入文件，成功返回路径（不访问界面，可在工作线程中调用）
 
+        mask为超像素合并得到的(x, y, 外接框mask)，None时使用ROI的轮廓或矩形
+        """
+        try:
             h, w = img.shape[:2]
 
-            # 创建mask
-            if regions:
-                # 超像素模式：合并所有region的mask
-                merged_mask = np.zeros((h, w), dtype=np.uint8)
-                for region in regions:
-                    if region.mask.shape == (h, w):
-                        merged_mask = cv2.bitwise_or(merged_mask, region.mask)
+            # 裁剪到ROI区域（确保在范围内）
+            x = max(0, roi.x)
+            y = max(0, roi.y)
+            rw = min(roi.width, w - x)
+            rh = min(roi.height, h - y)
+
+            # 创建mask：只分配ROI附近的小图，不再逐区域改写整图大小的mask
+            if mask is not None:
+                # 超像素模式：把合并mask与ROI窗口重叠的部分拷过来（ROI合并后可能被移动或缩放）
+                mx, my, merged_mask = mask
+                roi_mask = np.zeros((rh, rw), dtype=np.uint8)
+                left, top = max(x, mx), max(y, my)
+                right = min(x + rw, mx + merged_mask.shape[1])
+                bottom = min(y + rh, my + merged_mask.shape[0])
+                if right > left and bottom > top:
+                    roi_mask[top - y:bottom - y, left - x:right - x] = \
+                        merged_mask[top - my:bottom - my, left - mx:right - mx]
             else:
                 # 普通ROI模式：使用ROI的轮廓或矩形
-                merged_mask = np.zeros((h, w), dtype=np.uint8)
-                x, y, rw, rh = roi.x, roi.y, roi.width, roi.height
-                # 确保在范围内
-                x = max(0, x)
-                y = max(0, y)
-                rw = min(rw, w - x)
-                rh = min(rh, h - y)
-                # 填充矩形区域
                 if hasattr(roi, 'contour') and roi.contour is not None:
-                    # 有不规则轮廓，使用轮廓填充
-                    cv2.drawContours(merged_mask, [roi.contour], -1, 255, -1)
+                    # 有不规则轮廓，使用轮廓填充（平移到ROI坐标系）
+                    roi_mask = np.zeros((rh, rw), dtype=np.uint8)
+                    cv2.drawContours(roi_mask, [roi.contour], -1, 255, -1, offset=(-x, -y))
                 else:
                     # 矩形ROI
-                    merged_mask[y:y+rh, x:x+rw] = 255
-
-            # 裁剪到ROI区域
-            x, y, rw, rh = roi.x, roi.y, roi.width, roi.height
-            x = max(0, x)
-            y = max(0, y)
-            rw = min(rw, w - x)
-            rh = min(rh, h - y)
-
-            roi_img = img[y:y+rh, x:x+rw].copy()
-            roi_mask = merged_mask[y:y+rh, x:x+rw].copy()
+                    roi_mask = np.full((rh, rw), 255, dtype=np.uint8)
 
             # 创建BGRA透明图片
             bgra = np.zeros((rh, rw, 4), dtype=np.uint8)
-            bgra[:, :, :3] = roi_img
+            bgra[:, :, :3] = img[y:y+rh, x:x+rw]
             bgra[:, :, 3] = roi_mask
-
-            # 使用传入的filename或从ROI名字生成
-            if filename is None:
-                # 使用node_name或name作为文件名，保留中文字符
-                name = roi.node_name or roi.name
-                # 移除文件名中的非法字符
-                import re
-                safe_name = re.sub(r'[\\/:*?"<>|]', '_', name).strip()
-                if not safe_name:
-                    safe_name = f"crop_{int(time.time())}"
-                filename = f"{safe_name}.png"
-
-            # 添加前缀
-            prefix = self.prefix_input.text().strip()
-            if prefix:
-                filename = f"{prefix}{filename}"
-
-            filepath = os.path.join(self.output_dir, filename)
+            # 完全透明处的颜色不可见，清零后成片相同，PNG编码更快、文件更小
+            bgra[roi_mask == 0] = 0
 
             # 使用Python文件写入支持中文路径（cv2.imwrite不支持中文）
             # cv2.imencode将图像编码为内存缓冲区，然后Python写入文件
-            ext = os.path.splitext(filename)[1].lower()
-            if ext == '.png':
-                retval, buffer = cv2.imencode('.png', bgra)
-            else:
-                retval, buffer = cv2.imencode('.png', bgra)  # 默认PNG
+            # 扩展名不是.png时也按PNG编码（OpenCV默认的压缩级别已是最快档）
+            retval, buffer = cv2.imencode('.png', bgra)
 
             if retval:
                 with open(filepath, 'wb') as f:
@@ -1360,8 +1615,8 @@ class MainWindow(QMainWindow):
 
     def update_pending_crop_list(self):
         """更新待导出切图列表显示 - 包含类型信息"""
-        self.crop_list_widget.clear()
-        for i, crop in enumerate(self.pending_crops):
+        texts = []
+        for i, crop in enumerate(self.pending_crops.values()):
             roi = crop['roi']
             # 显示类型图标
             if roi.roi_type == 'image':
@@ -1373,8 +1628,23 @@ class MainWindow(QMainWindow):
                 action_names = {'click': '点击', 'ocr': 'OCR', 'swipe': '滑动', '': '区域'}
                 type_info = action_names.get(roi.action, '区域')
 
-            item_text = f"{i+1}. {type_icon} {roi.node_name or roi.name} ({roi.width}x{roi.height}) [{type_info}]"
-            self.crop_list_widget.addItem(item_text)
+            texts.append(f"{i+1}. {type_icon} {roi.node_name or roi.name} ({roi.width}x{roi.height}) [{type_info}]")
+
+        # 只改动有变化的行，多出的行从末尾删除、不足的追加，期间暂停重绘
+        widget = self.crop_list_widget
+        widget.setUpdatesEnabled(False)
+        try:
+            common = min(widget.count(), len(texts))
+            for row in range(common):
+                item = widget.item(row)
+                if item.text() != texts[row]:
+                    item.setText(texts[row])
+            for row in range(widget.count() - 1, len(texts) - 1, -1):
+                widget.takeItem(row)
+            if len(texts) > common:
+                widget.addItems(texts[common:])
+        finally:
+            widget.setUpdatesEnabled(True)
 
     def on_crop_list_menu(self, pos):
         """切图列表右键菜单"""
@@ -1389,7 +1659,7 @@ class MainWindow(QMainWindow):
     def delete_pending_crop(self, index: int):
         """删除待导出切图"""
         if 0 <= index < len(self.pending_crops):
-            del self.pending_crops[index]
+            self._remove_pending_at(index)
             self.update_pending_crop_list()
             self.statusbar.showMessage(f"已删除，剩余{len(self.pending_crops)}个待导出")
 
@@ -1397,15 +1667,11 @@ class MainWindow(QMainWindow):
         """选中已切图列表项时显示ROI坐标预览"""
         index = self.crop_list_widget.row(item)
         if 0 <= index < len(self.pending_crops):
-            crop = self.pending_crops[index]
+            crop = self._pending_entry_at(index)
             roi = crop.get('roi')
             # 如果roi对象丢失，通过roi_id查找
             if roi is None:
-                roi_id = crop.get('roi_id')
-                for canvas_roi in self.canvas.roi_collection:
-                    if canvas_roi.roi_id == roi_id:
-                        roi = canvas_roi
-                        break
+                roi = self.canvas.roi_collection.find_by_id(crop.get('roi_id'))
 
             if roi:
                 # 显示节点名和类型
@@ -1420,11 +1686,10 @@ class MainWindow(QMainWindow):
                 )
 
                 # 在画布上选中对应的ROI（使用roi_id匹配）
-                for i, canvas_roi in enumerate(self.canvas.roi_collection):
-                    if canvas_roi.roi_id == roi.roi_id:
-                        self.canvas.roi_collection.selected_index = i
-                        self.canvas.update()
-                        break
+                index = self.canvas.roi_collection.index_of(roi.roi_id)
+                if index >= 0:
+                    self.canvas.roi_collection.selected_index = index
+                    self.canvas.update()
 
     def export_all_crops(self):
         """导出所有待导出切图 - 图片类型导出PNG，区域类型只导JSON"""
@@ -1433,7 +1698,7 @@ class MainWindow(QMainWindow):
             return
 
         # 统计需要导出的图片数量
-        image_crops = [c for c in self.pending_crops
+        image_crops = [c for c in self.pending_crops.values()
                        if c.get('roi') and c['roi'].roi_type == 'image']
 
         # 检查图片文件是否已存在
@@ -1459,82 +1724,85 @@ class MainWindow(QMainWindow):
 
         # 显示进度
         total_items = len(self.pending_crops)
-        progress = QProgressDialog("正在导出...", None, 0, total_items, self)
+        # 最后一格留给JSON坐标文件
+        progress = QProgressDialog("正在导出...", None, 0, total_items + 1, self)
         progress.setWindowTitle("导出进度")
         progress.setWindowModality(Qt.WindowModal)
         progress.show()
 
-        pixmap = self.canvas.get_pixmap()
+        # 整图只转换一次，各切图的裁剪与PNG编码互不相关，交给线程池并行（cv2编码时释放GIL）
+        img = self.canvas.get_bgr_ndarray()
         png_exported = 0  # 图片导出计数
         region_count = 0  # 区域计数
         failed_items = []
+        jobs = []  # (crop, 文件名, future)
+        # 写入JSON的ROI（包含图片和区域），在主线程按列表顺序收集好再交给线程池序列化
+        from ..models.roi import ROICollection
+        export_collection = ROICollection()
 
-        for i, crop in enumerate(self.pending_crops):
-            progress.setValue(i)
-            QApplication.processEvents()
-
+        executor = ThreadPoolExecutor(max_workers=max(1, self.crop_engine.max_workers))
+        for crop in self.pending_crops.values():
             roi = crop.get('roi')
             # 如果roi对象丢失，通过roi_id查找
             if roi is None:
-                roi_id = crop.get('roi_id')
-                for canvas_roi in self.canvas.roi_collection:
-                    if canvas_roi.roi_id == roi_id:
-                        roi = canvas_roi
-                        break
+                roi = self.canvas.roi_collection.find_by_id(crop.get('roi_id'))
 
             if roi is None:
                 failed_items.append(f"{crop.get('name', 'unknown')} (ROI不存在)")
                 continue
+            export_collection.add(roi)
 
             # 根据类型决定导出方式
             if roi.roi_type == 'image':
                 # 图片类型：导出PNG
-                regions = crop['regions']
+                mask = crop.get('mask')
                 # 使用roi.node_name作为文件名（支持中文）
                 name = roi.node_name or roi.name
-                filename = f"{name}.png"
-                filepath = self._save_superpixel_crop(pixmap, roi, regions, filename)
-                if filepath:
-                    png_exported += 1
-                    crop['exported'] = True
-                else:
-                    failed_items.append(name)
+                filepath = self._crop_filepath(roi, f"{name}.png")
+                future = executor.submit(self._write_transparent_crop, img, roi, mask, filepath)
+                jobs.append((crop, name, future))
             else:
                 # 区域类型：只计数，不导PNG
                 region_count += 1
                 crop['exported'] = True
 
-        progress.setValue(total_items)
+        # 按完成顺序推进进度条，结果仍按列表顺序汇总
+        done = total_items - len(jobs)
+        progress.setValue(done)
+        for _ in as_completed([job[2] for job in jobs]):
+            done += 1
+            progress.setValue(done)
+            QApplication.processEvents()
+
+        for crop, name, future in jobs:
+            if future.result():
+                png_exported += 1
+                crop['exported'] = True
+            else:
+                failed_items.append(name)
 
-        # 导出ROI坐标JSON（包含图片和区域）
+        # 导出ROI坐标JSON：序列化和写文件也放到线程池，等待期间进度框保持响应
         json_exported = False
-        if png_exported > 0 or region_count > 0:
+        if (png_exported > 0 or region_count > 0) and len(export_collection) > 0:
             try:
-                # 构建ROI集合用于导出JSON
-                from ..models.roi import ROICollection
-                export_collection = ROICollection()
-                for crop in self.pending_crops:
-                    roi = crop.get('roi')
-                    if roi is None:
-                        roi_id = crop.get('roi_id')
-                        for canvas_roi in self.canvas.roi_collection:
-                            if canvas_roi.roi_id == roi_id:
-                                roi = canvas_roi
-                                break
-                    if roi:
-                        export_collection.add(roi)
-
-                if len(export_collection) > 0:
-                    json_path = self.export_mgr.export_json(
-                        export_collection,
-                        source_info={
-                            "image": os.path.basename(self.current_image_path) if self.current_image_path else "unknown",
-                            "export_count": png_exported + region_count
-                        }
-                    )
-                    json_exported = True
+                roi_dicts = export_collection.to_list()
+                json_future = executor.submit(
+                    self.export_mgr.export_json,
+                    export_collection,
+                    source_info={
+                        "image": os.path.basename(self.current_image_path) if self.current_image_path else "unknown",
+                        "export_count": png_exported + region_count
+                    },
+                    roi_dicts=roi_dicts
+                )
+                while not wait([json_future], timeout=0.05).done:
+                    QApplication.processEvents()
+                json_path = json_future.result()
+                json_exported = True
             except Exception as e:
                 print(f"导出JSON失败: {e}")
+        executor.shutdown()
+        progress.setValue(total_items + 1)
 
         # 导出完成后不清空列表，让用户确认后再手动清空
         self.update_pending_crop_list()
@@ -1563,6 +1831,47 @@ class MainWindow(QMainWindow):
             status_msg += " 和JSON坐标"
         self.statusbar.showMessage(status_msg + "，列表保留")
 
+    def _add_pending(self, entry: dict):
+        """添加待导出项（自动检测项没有roi_id字段，用其ROI对象的id作键）"""
+        key = entry.get('roi_id') or entry['roi'].roi_id
+        if key in self.pending_crops:
+            self._pop_pending(key)
+        self.pending_crops[key] = entry
+        self._pending_names[entry['name']] += 1
+
+    def _pop_pending(self, key):
+        """按键删除待导出项并更新名称计数"""
+        entry = self.pending_crops.pop(key)
+        self._pending_names[entry['name']] -= 1
+        if self._pending_names[entry['name']] <= 0:
+            del self._pending_names[entry['name']]
+        return entry
+
+    def _pending_entry_at(self, index: int) -> dict:
+        """按列表位置取待导出项"""
+        return next(islice(self.pending_crops.values(), index, None))
+
+    def _remove_pending_at(self, index: int):
+        """按列表位置删除待导出项"""
+        self._pop_pending(next(islice(self.pending_crops, index, None)))
+
+    def _remove_pending_roi(self, roi_id) -> bool:
+        """删除与ROI关联的待导出项，返回是否有删除"""
+        crop = self.pending_crops.get(roi_id)
+        if crop is None or crop.get('roi_id') != roi_id:
+            return False
+        self._pop_pending(roi_id)
+        return True
+
+    def _unique_pending_name(self, base_name: str) -> str:
+        """生成与待导出项不重名的名称（重名时追加_1、_2...）"""
+        name = base_name
+        suffix = 1
+        while name in self._pending_names:
+            name = f"{base_name}_{suffix}"
+            suffix += 1
+        return name
+
     def clear_pending_crops(self):
         """清空待导出列表"""
         if not self.pending_crops:
@@ -1571,6 +1880,7 @@ class MainWindow(QMainWindow):
         reply = QMessageBox.question(self, "确认", f"确定要清空 {len(self.pending_crops)} 个待导出切图吗?")
         if reply == QMessageBox.Yes:
             self.pending_crops.clear()
+            self._pending_names.clear()
             self.update_pending_crop_list()
             self.statusbar.showMessage("已清空待导出列表")
 
@@ -1590,7 +1900,7 @@ class MainWindow(QMainWindow):
         self.canvas.set_mode("select")
         self.canvas.setCursor(Qt.ArrowCursor)
 
-        # 启动Ctrl状态检测定时器（100ms）
+        # 启动Ctrl状态检测定时器（自适应间隔）
         self.canvas.start_ctrl_timer()
 
         if crop_mode == "superpixel":
@@ -1628,26 +1938,29 @@ class MainWindow(QMainWindow):
         """加载文件夹"""
         self.current_folder = folder_path
 
-        # 获取图片文件
-        image_exts = ['.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp']
+        # 获取图片文件（scandir自带文件类型，不需要逐个stat）
         self.image_files = []
 
         try:
-            for filename in sorted(os.listdir(folder_path)):
-                ext = os.path.splitext(filename)[1].lower()
-                if ext in image_exts:
-                    self.image_files.append(os.path.join(folder_path, filename))
+            with os.scandir(folder_path) as it:
+                names = sorted(e.name for e in it
+                               if os.path.splitext(e.name)[1].lower() in IMAGE_EXTS and e.is_file())
         except Exception as e:
             QMessageBox.warning(self, "错误", f"无法读取文件夹: {str(e)}")
             return
+        self.image_files = [os.path.join(folder_path, name) for name in names]
 
-        # 更新列表
-        self.list_widget.clear()
-        for img_path in self.image_files:
-            item = QListWidgetItem(os.path.basename(img_path))
-            item.setData(Qt.UserRole, img_path)
-            item.setToolTip(img_path)
-            self.list_widget.addItem(item)
+        # 更新列表（批量添加期间暂停重绘）
+        self.list_widget.setUpdatesEnabled(False)
+        try:
+            self.list_widget.clear()
+            for img_path in self.image_files:
+                item = QListWidgetItem(os.path.basename(img_path))
+                item.setData(Qt.UserRole, img_path)
+                item.setToolTip(img_path)
+                self.list_widget.addItem(item)
+        finally:
+            self.list_widget.setUpdatesEnabled(True)
 
         self.label_image_count.setText(f"共 {len(self.image_files)} 张")
         self.statusbar.showMessage(f"已加载文件夹: {folder_path}")
@@ -1704,30 +2017,49 @@ class MainWindow(QMainWindow):
 
         self.statusbar.showMessage(f"已加载: {file_path} ({pixmap.width()}x{pixmap.height()})")
 
-        # 更新ADB状态显示
-        self.update_adb_status()
-
     def paste_image(self):
         """从剪贴板粘贴"""
-        clipboard = QApplication.clipboard()
-        mime_data = clipboard.mimeData()
-
-        if mime_data.hasImage():
-            pixmap = QPixmap(mime_data.imageData())
-            self.canvas.set_pixmap(pixmap)
-            self.current_image_path = "clipboard"
-            self.prefix_input.setText("clipboard_")
-            self.statusbar.showMessage("已从剪贴板加载图片")
-        else:
+        # 直接取剪贴板图片，不经过mimeData/QVariant再构造QPixmap
+        pixmap = QApplication.clipboard().pixmap()
+        if pixmap.isNull():
             QMessageBox.information(self, "提示", "剪贴板中没有图片")
+            return
+
+        self.canvas.set_pixmap(pixmap)
+        self.current_image_path = "clipboard"
+        self.prefix_input.setText("clipboard_")
+        self.statusbar.showMessage("已从剪贴板加载图片")
 
     # ==================== 截图功能 ====================
 
+    def _on_adb_status_tick(self):
+        """定时刷新ADB状态（窗口不可见或不在前台时不查询）"""
+        if self.isVisible() and self.isActiveWindow():
+            self.update_adb_status()
+
     def update_adb_status(self):
+        """在后台刷新ADB状态显示（截图后手动刷新时重新开始定时计时）"""
+        self._adb_status_timer.start()
+        # 上一次查询还没结束时不重复提交
+        if self._adb_status_future is not None and not self._adb_status_future.done():
+            return
+        try:
+            self._adb_status_future = self.screenshot_mgr._pool.submit(self._poll_adb_status)
+        except RuntimeError:
+            # 线程池已关闭（程序退出中）
+            self._adb_status_future = None
+
+    def _poll_adb_status(self):
+        """线程池中执行：查询设备数后发信号回界面线程"""
+        # 只显示设备数，不需要get_adb_info里的雷电设备筛选
+        available = self.screenshot_mgr.adb_available
+        count = len(self.screenshot_mgr.get_devices()) if available else 0
+        self._adb_status_ready.emit(available, count)
+
+    def _on_adb_status_ready(self, available: bool, count: int):
         """更新ADB状态显示"""
-        info = self.screenshot_mgr.get_adb_info()
-        if info['adb_available']:
-            self.label_adb_status.setText(f"ADB: 可用 ({len(info['devices'])}设备)")
+        if available:
+            self.label_adb_status.setText(f"ADB: 可用 ({count}设备)")
             self.label_adb_status.setStyleSheet("color: #28a745;")
         else:
             self.label_adb_status.setText("ADB: 不可用")
@@ -1741,11 +2073,26 @@ class MainWindow(QMainWindow):
 
             pixmap = self.screenshot_mgr.capture_ld_player(0)
 
+            # 找不到ADB时由用户决定是否全盘搜索（可能需要几分钟）
+            if pixmap is None and not self.screenshot_mgr.adb_available:
+                reply = QMessageBox.question(
+                    self, "未找到ADB",
+                    "未找到ADB程序，是否全盘搜索？\n（搜索可能需要较长时间）",
+                    QMessageBox.Yes | QMessageBox.No
+                )
+                if reply == QMessageBox.Yes:
+                    self.statusbar.showMessage("正在搜索ADB...")
+                    QApplication.processEvents()
+                    if self.screenshot_mgr.rescan():
+                        pixmap = self.screenshot_mgr.capture_ld_player(0)
+                    self.update_adb_status()
+
             if pixmap and not pixmap.isNull():
                 self.canvas.set_pixmap(pixmap)
                 self.current_image_path = "ld_player_screenshot"
                 self.prefix_input.setText("ld_")
                 self.statusbar.showMessage(f"已从雷电模拟器截图 ({pixmap.width()}x{pixmap.height()})")
+                # ADB状态在后台查询，不阻塞截图显示
                 self.update_adb_status()
             else:
                 QMessageBox.warning(
@@ -1790,12 +2137,13 @@ class MainWindow(QMainWindow):
 
     def clear_all_rois(self):
         """清空所有ROI"""
-        if len(self.canvas.roi_collection) == 0:
+        count = len(self.canvas.roi_collection)
+        if count == 0:
             return
 
         reply = QMessageBox.question(
             self, "确认",
-            f"确定要删除所有 {len(self.canvas.roi_collection)} 个ROI吗?",
+            f"确定要删除所有 {count} 个ROI吗?",
             QMessageBox.Yes | QMessageBox.No
         )
         if reply == QMessageBox.Yes:
@@ -1809,28 +2157,24 @@ class MainWindow(QMainWindow):
         if folder:
             self.output_dir = folder
             self.crop_engine.set_output_dir(folder)
-            self.export_mgr.output_dir = folder
+            self.export_mgr.set_output_dir(folder)
             os.makedirs(folder, exist_ok=True)
             self.statusbar.showMessage(f"输出目录已更改: {folder}")
 
     # ==================== 导出 ====================
 
-    def export_all_data(self):
-        """导出所有数据"""
-        collection = self.canvas.roi_collection
+    def _ensure_export_dialog(self) -> QDialog:
+        """创建导出选项对话框（只创建一次）"""
+        if self._export_dialog is not None:
+            return self._export_dialog
 
-        if len(collection) == 0:
-            QMessageBox.information(self, "提示", "没有ROI可导出")
-            return
-
-        # 询问导出模式
-        from PyQt5.QtWidgets import QCheckBox, QDialog, QVBoxLayout, QDialogButtonBox, QLabel
         dialog = QDialog(self)
         dialog.setWindowTitle("导出选项")
         dialog.setMinimumWidth(300)
 
         layout = QVBoxLayout(dialog)
-        layout.addWidget(QLabel(f"即将导出 {len(collection)} 个ROI\n选择要导出的内容:"))
+        dialog.info_label = QLabel()
+        layout.addWidget(dialog.info_label)
 
         # 复选框
         cb_images = QCheckBox("切图文件 (PNG)")
@@ -1838,17 +2182,20 @@ class MainWindow(QMainWindow):
         cb_images.setEnabled(False)  # 必须导出切图
         layout.addWidget(cb_images)
 
-        cb_json = QCheckBox("ROI数据 (JSON)")
-        cb_json.setChecked(True)
-        layout.addWidget(cb_json)
+        dialog.cb_json = QCheckBox("ROI数据 (JSON)")
+        dialog.cb_json.setChecked(True)
+        layout.addWidget(dialog.cb_json)
+
+        dialog.cb_autojs = QCheckBox("Auto.js脚本")
+        dialog.cb_autojs.setChecked(False)
+        layout.addWidget(dialog.cb_autojs)
 
-        cb_autojs = QCheckBox("Auto.js脚本")
-        cb_autojs.setChecked(False)
-        layout.addWidget(cb_autojs)
+        dialog.cb_python = QCheckBox("Python脚本")
+        dialog.cb_python.setChecked(False)
+        layout.addWidget(dialog.cb_python)
 
-        cb_python = QCheckBox("Python脚本")
-        cb_python.setChecked(False)
-        layout.addWidget(cb_python)
+        dialog.cb_fast_png = QCheckBox("快速PNG（压缩率稍低，导出更快）")
+        layout.addWidget(dialog.cb_fast_png)
 
         # 按钮
         btn_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
@@ -1856,6 +2203,24 @@ class MainWindow(QMainWindow):
         btn_box.rejected.connect(dialog.reject)
         layout.addWidget(btn_box)
 
+        self._export_dialog = dialog
+        return dialog
+
+    def export_all_data(self):
+        """导出所有数据（切图和数据文件在后台线程中生成，完成后由_on_export_done提示）"""
+        if self._export_progress is not None:
+            return
+        collection = self.canvas.roi_collection
+        count = len(collection)
+
+        if count == 0:
+            QMessageBox.information(self, "提示", "没有ROI可导出")
+            return
+
+        # 询问导出模式（复选框保留上次的选择）
+        dialog = self._ensure_export_dialog()
+        dialog.info_label.setText(f"即将导出 {count} 个ROI\n选择要导出的内容:")
+        dialog.cb_fast_png.setChecked(self.crop_engine.png_compression == CropEngine.FAST_PNG_COMPRESSION)
         if dialog.exec_() != QDialog.Accepted:
             return
 
@@ -1872,30 +2237,54 @@ class MainWindow(QMainWindow):
             "height": pixmap.height()
         }
 
-        # 先执行切图
-        prefix = self.prefix_input.text().strip()
-        self.statusbar.showMessage("正在切图...")
-        crop_results = self.crop_engine.crop_all(pixmap, collection.rois, prefix)
+        # 导出进行中不会再次进入这里，可以直接修改切图引擎的压缩级别
+        self.crop_engine.png_compression = (
+            CropEngine.FAST_PNG_COMPRESSION if dialog.cb_fast_png.isChecked()
+            else CropEngine.BALANCED_PNG_COMPRESSION)
+
+        formats = set()
+        if dialog.cb_json.isChecked():
+            formats.add('json')
+        if dialog.cb_autojs.isChecked():
+            formats.add('autojs')
+        if dialog.cb_python.isChecked():
+            formats.add('python')
+
+        # 在主线程准备好快照：图片、固定ROI列表和JSON字典，工作线程不再访问界面数据。
+        # 不透明图片直接用画布缓存的只读BGR数组（与识别共用，不再整图转换）；带透明通道的仍转QImage以保留alpha
+        rois = list(collection)
+        if pixmap.hasAlphaChannel():
+            image = pixmap.toImage()
+        else:
+            image = self.canvas.get_bgr_ndarray()
+        request = {
+            'image': image,
+            'rois': rois,
+            'prefix': self.prefix_input.text().strip(),
+            'source_info': source_info,
+            'formats': formats,
+            'roi_dicts': [roi.to_dict() for roi in rois] if 'json' in formats else None,
+        }
 
-        # 根据选择导出
-        results = {}
-        if cb_json.isChecked():
-            try:
-                results['json'] = self.export_mgr.export_json(collection, source_info)
-            except Exception as e:
-                print(f"导出JSON失败: {e}")
+        progress = QProgressDialog("正在切图...", None, 0, 0, self)
+        progress.setWindowTitle("导出中")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.setCancelButton(None)
+        progress.show()
+        self._export_progress = progress
+        self.statusbar.showMessage("正在切图...")
+        self._export_requested.emit(request)
 
-        if cb_autojs.isChecked():
-            try:
-                results['autojs'] = self.export_mgr.export_autojs(collection, source_info)
-            except Exception as e:
-                print(f"导出Auto.js失败: {e}")
+    def _finish_export(self):
+        """关闭导出进度对话框"""
+        if self._export_progress is not None:
+            self._export_progress.close()
+            self._export_progress = None
 
-        if cb_python.isChecked():
-            try:
-                results['python'] = self.export_mgr.export_python(collection, source_info)
-            except Exception as e:
-                print(f"导出Python失败: {e}")
+    def _on_export_done(self, crop_results: list, results: dict):
+        """导出线程完成"""
+        self._finish_export()
 
         # 显示结果
         msg = f"导出完成!\n\n已生成 {len(crop_results)} 个切图文件\n"
@@ -1909,6 +2298,12 @@ class MainWindow(QMainWindow):
         QMessageBox.information(self, "导出成功", msg)
         self.statusbar.showMessage(f"已导出 {len(crop_results)} 个切图{f'和{len(results)}个数据文件' if results else ''}到 {self.output_dir}")
 
+    def _on_export_failed(self, message: str):
+        """导出线程抛出异常"""
+        self._finish_export()
+        QMessageBox.warning(self, "错误", f"导出失败: {message}")
+        self.statusbar.showMessage("导出失败")
+
     # ==================== 菜单和工具栏 ====================
 
     def init_menu(self):
@@ -26,6 +26,9 @@ class ROIListPanel(QWidget):
     roi_selected = pyqtSignal(int)
     roi_deleted = pyqtSignal(int)
     roi_copied = pyqtSignal(object)
+
+    # ROI颜色字符串 -> QColor
+    _colors = {}
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -100,37 +103,65 @@ class ROIListPanel(QWidget):
         self.refresh_list()
     
     def refresh_list(self):
-        """刷新列表显示"""
-        self.list_widget.clear()
-        
-        if not self.roi_collection:
-            self.label_count.setText("(0)")
-            return
-        
-        for i, roi in enumerate(self.roi_collection):
-            item = QListWidgetItem()
-            
+        """刷新列表显示：只改动有变化的行，多出的行从末尾删除、不足的追加（期间暂停重绘和信号）"""
+        # 循环内频繁使用的方法先取到局部变量
+        rows = []
+        append = rows.append
+        for i, roi in enumerate(self.roi_collection or (), 1):
             # 显示信息
-            center = roi.center
-            text = f"{i+1}. {roi.name}\n"
-            text += f"   位置: ({roi.x}, {roi.y}) 大小: {roi.width}x{roi.height}\n"
-            text += f"   中心: ({center[0]}, {center[1]})"
-            
-            item.setText(text)
-            item.setData(Qt.UserRole, i)  # 存储索引
-            
-            # 设置颜色标识
-            color = QColor(roi.color)
-            item.setForeground(color)
-            
-            self.list_widget.addItem(item)
-        
-        self.label_count.setText(f"({len(self.roi_collection)})")
-        
-        # 保持选中状态
-        if self.roi_collection.selected_index >= 0:
-            self.list_widget.setCurrentRow(self.roi_collection.selected_index)
-    
+            center_x, center_y = roi.center
+            append((
+                f"{i}. {roi.name}\n"
+                f"   位置: ({roi.x}, {roi.y}) 大小: {roi.width}x{roi.height}\n"
+                f"   中心: ({center_x}, {center_y})",
+                roi.color
+            ))
+
+        widget = self.list_widget
+        item_at = widget.item
+        to_color = self._color
+        widget.setUpdatesEnabled(False)
+        widget.blockSignals(True)
+        try:
+            common = min(widget.count(), len(rows))
+            for row in range(common):
+                item = item_at(row)
+                text, color = rows[row]
+                if item.text() != text:
+                    item.setText(text)
+                # 设置颜色标识
+                color = to_color(color)
+                if item.foreground().color() != color:
+                    item.setForeground(color)
+            for row in range(widget.count() - 1, len(rows) - 1, -1):
+                widget.takeItem(row)
+            for row in range(common, len(rows)):
+                text, color = rows[row]
+                item = QListWidgetItem(text)
+                item.setData(Qt.UserRole, row)  # 存储索引
+                item.setForeground(to_color(color))
+                widget.addItem(item)
+
+            self.label_count.setText(f"({len(rows)})")
+
+            # 保持选中状态
+            if self.roi_collection and self.roi_collection.selected_index >= 0:
+                widget.setCurrentRow(self.roi_collection.selected_index)
+            else:
+                # 行不再重建，取消选中或删除选中ROI后需清掉旧的高亮
+                widget.setCurrentRow(-1)
+        finally:
+            widget.blockSignals(False)
+            widget.setUpdatesEnabled(True)
+
+    @classmethod
+    def _color(cls, name: str) -> QColor:
+        """颜色字符串转QColor（按字符串缓存，ROI颜色种类很少）"""
+        color = cls._colors.get(name)
+        if color is None:
+            color = cls._colors[name] = QColor(name)
+        return color
+
     def on_item_clicked(self, item: QListWidgetItem):
         """列表项被点击"""
         idx = item.data(Qt.UserRole)
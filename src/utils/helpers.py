@@ -3,38 +3,45 @@
 工具函数
 """
 
+import itertools
 import os
-import random
+from functools import lru_cache
+
+# ROI标识颜色（按顺序轮流使用，相邻两个ROI颜色不同）
+_COLORS = (
+    "#FF5733", "#33FF57", "#3357FF", "#FF33F6",
+    "#F6FF33", "#33FFF6", "#FF8033", "#8033FF",
+    "#33FF80", "#FF3380", "#80FF33", "#3380FF"
+)
+_color_index = itertools.count()
 
 
 def generate_color() -> str:
-    """生成随机颜色"""
-    colors = [
-        "#FF5733", "#33FF57", "#3357FF", "#FF33F6",
-        "#F6FF33", "#33FFF6", "#FF8033", "#8033FF",
-        "#33FF80", "#FF3380", "#80FF33", "#3380FF"
-    ]
-    return random.choice(colors)
+    """生成颜色（在调色板中轮流取色）"""
+    return _COLORS[next(_color_index) % len(_COLORS)]
 
 
 def ensure_dir(path: str) -> bool:
-    """确保目录存在"""
+    """确保目录存在（已存在时只做一次stat，不再调用makedirs）"""
+    if os.path.isdir(path):
+        return True
     try:
         os.makedirs(path, exist_ok=True)
         return True
-    except:
+    except OSError:
         return False
 
 
+@lru_cache(maxsize=4096)
 def get_file_extension(filename: str) -> str:
-    """获取文件扩展名"""
+    """获取文件扩展名（结果缓存，文件夹内来回切图时同一文件名不重复解析）"""
     return os.path.splitext(filename)[1].lower()
 
 
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+
 def format_size(size_bytes: int) -> str:
-    """格式化文件大小"""
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if size_bytes < 1024:
-            return f"{size_bytes:.1f} {unit}"
-        size_bytes /= 1024
-    return f"{size_bytes:.1f} TB"
+    """格式化文件大小（按二进制位数直接定位单位，不逐级除1024）"""
+    index = min((int(size_bytes).bit_length() - 1) // 10, 4) if size_bytes >= 1024 else 0
+    return f"{size_bytes / (1 << (10 * index)):.1f} {_SIZE_UNITS[index]}"
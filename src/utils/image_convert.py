@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+QPixmap / OpenCV 图像格式转换
+"""
+
+import sys
+from typing import Optional
+
+import cv2
+import numpy as np
+from PyQt5.QtGui import QPixmap, QImage
+
+# 小端机器上RGB32/ARGB32在内存中按B,G,R,A排列，前三个通道就是BGR
+_BGRX_FORMATS = (QImage.Format_RGB32, QImage.Format_ARGB32) if sys.byteorder == 'little' else ()
+
+# Qt 5.14起支持BGR888，与OpenCV的BGR内存布局一致
+_BGR888_FORMAT = getattr(QImage, 'Format_BGR888', None)
+
+
+def _qimage_view(image: QImage, channels: int) -> np.ndarray:
+    """
+    在QImage像素缓冲区上建立只读视图（零拷贝）
+
+    按行跨度bytesPerLine去掉每行末尾的对齐填充，返回(height, width, channels)
+    视图引用QImage内存，调用方需在QImage释放前完成拷贝
+    """
+    width = image.width()
+    height = image.height()
+    # sip.voidptr.asarray直接包装缓冲区，不经过setsize再转换
+    size = image.sizeInBytes() if hasattr(image, 'sizeInBytes') else image.byteCount()
+    buf = image.constBits().asarray(size)
+    view = np.frombuffer(buf, dtype=np.uint8).reshape(height, image.bytesPerLine())
+    return view[:, :width * channels].reshape(height, width, channels)
+
+
+def qimage_to_cv2(image: QImage) -> Optional[np.ndarray]:
+    """QImage转OpenCV格式（BGR，返回独立拷贝）"""
+    if image.isNull():
+        return None
+
+    if image.format() in _BGRX_FORMATS:
+        # 常见的屏幕截图格式：直接取BGR通道，省去convertToFormat的一次整图转换
+        # 必须显式copy：视图引用的QImage可能是临时对象，ascontiguousarray在视图已连续时不会拷贝
+        view = _qimage_view(image, 4)
+        return view[:, :, :3].copy()
+
+    if image.format() == _BGR888_FORMAT:
+        # 已是BGR字节序（Qt 5.14+），只需按行拷贝，无需颜色转换
+        return _qimage_view(image, 3).copy()
+
+    if image.format() != QImage.Format_RGB888:
+        image = image.convertToFormat(QImage.Format_RGB888)
+
+    # cvtColor输出新数组，返回值不再引用QImage内存（整个转换只有这一次拷贝）。
+    # 不能直接返回 view[..., ::-1]：convertToFormat生成的临时QImage释放后视图即失效
+    return cv2.cvtColor(_qimage_view(image, 3), cv2.COLOR_RGB2BGR)
+
+
+def qimage_bgra_view(image: QImage) -> Optional[np.ndarray]:
+    """
+    ARGB32格式QImage的BGRA只读视图（零拷贝，仅小端机器可用）
+
+    视图引用QImage内存，调用方需保证QImage在使用视图期间一直存活
+    """
+    if image.isNull() or image.format() != QImage.Format_ARGB32 or not _BGRX_FORMATS:
+        return None
+    return _qimage_view(image, 4)
+
+
+def qpixmap_to_cv2(pixmap: QPixmap) -> Optional[np.ndarray]:
+    """QPixmap转OpenCV格式（BGR）"""
+    if pixmap is None or pixmap.isNull():
+        return None
+    return qimage_to_cv2(pixmap.toImage())
+
+
+def cv2_to_qpixmap(img: np.ndarray) -> QPixmap:
+    """OpenCV格式（BGR或灰度）转QPixmap"""
+    img = np.ascontiguousarray(img)
+    height, width = img.shape[:2]
+    if img.ndim == 2:
+        # 灰度图直接按Grayscale8包装，不先扩展成三通道
+        image = QImage(img.data, width, height, width, QImage.Format_Grayscale8)
+    elif _BGR888_FORMAT is not None:
+        # Qt 5.14+直接包装BGR数据，省去cvtColor生成的中间数组
+        image = QImage(img.data, width, height, 3 * width, _BGR888_FORMAT)
+    else:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        image = QImage(img.data, width, height, 3 * width, QImage.Format_RGB888)
+    # fromImage会拷贝像素，返回的QPixmap不再引用数组内存
+    return QPixmap.fromImage(image)
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+JSON编解码
+安装了orjson时使用orjson（快5-10倍），否则回退到标准库json
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj) -> bytes:
+    """序列化为UTF-8字节（缩进2格，中文不转义）"""
+    if orjson is not None:
+        return orjson.dumps(
+            obj,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def loads(data):
+    """反序列化（接受bytes或str）"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -7,9 +7,28 @@
 import sys
 import subprocess
 import os
+import importlib.util
+
+from src import __version__
+
+# 依赖检查通过后写入的标记文件，按Python版本和工具版本区分，升级任一方都会重新检查
+DEPS_OK_MARKER = os.path.join(
+    os.path.expanduser("~"), ".android_roi_tool",
+    f"deps_ok_py{sys.version_info[0]}{sys.version_info[1]}_{__version__}")
+
+def _mark_dependencies_ok():
+    """写入依赖检查通过标记，写入失败不影响启动"""
+    try:
+        os.makedirs(os.path.dirname(DEPS_OK_MARKER), exist_ok=True)
+        open(DEPS_OK_MARKER, "w").close()
+    except OSError:
+        pass
 
 def check_and_install_dependencies():
     """检查并安装依赖"""
+    if os.path.exists(DEPS_OK_MARKER):
+        return
+
     required_packages = [
         ("PyQt5", "PyQt5>=5.15.0"),
         ("PIL", "Pillow>=9.0.0"),
@@ -17,26 +36,32 @@ def check_and_install_dependencies():
         ("numpy", "numpy>=1.21.0"),
     ]
 
+    # 只查找模块位置、不执行导入（按模块名查找，opencv-python-headless等变体也能识别）
     missing = []
     for module, package in required_packages:
-        try:
-            __import__(module)
+        if importlib.util.find_spec(module) is not None:
             print(f"[OK] {package} installed")
-        except ImportError:
+        else:
             missing.append(package)
             print(f"[MISSING] {package} not installed")
 
     if missing:
         print(f"\nInstalling missing dependencies: {', '.join(missing)}")
         try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "--user"] + missing)
+            # 不检查pip新版本、不交互等待输入；优先用预编译wheel，避免从源码编译numpy/opencv
+            subprocess.check_call([
+                sys.executable, "-m", "pip", "install", "--user",
+                "--disable-pip-version-check", "--no-input", "--prefer-binary",
+            ] + missing)
             print("Dependencies installed!")
+            _mark_dependencies_ok()
         except subprocess.CalledProcessError as e:
             print(f"Failed to install dependencies: {e}")
             print("Please manually run: pip install " + " ".join(missing))
             sys.exit(1)
     else:
         print("\nAll dependencies installed, starting application...")
+        _mark_dependencies_ok()
 
 def main():
     """主函数"""